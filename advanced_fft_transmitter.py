@@ -1,14 +1,92 @@
 import numpy as np
-from scipy.io import wavfile
+from functools import lru_cache
 import struct
 import time
 import os
+from fec import get_code, block_code, RepetitionCode
+from air_header import encode_header, MODULATIONS
+from ofdm import get_modem
+from metrics import METRICS
+from packet_codec import encode_fountain, fountain_layout, PACKET_OVERHEAD, FOUNTAIN_HEADER_SIZE
+
+# أقصى فرق مسموح بين الإطار المولد من بنك النغمات (float32) والطريقة القديمة (حلقة np.sin بدقة float64)
+# بعد التطبيع، أي أقل من 1/3 من أصغر خطوة في int16.
+SYNTH_TOLERANCE = 1e-5
+
+# الطول الافتراضي لدفعة Carousel النافورة: ربع رموز البيانات، فالمنضم المتأخر يفقد ربع دورة على الأكثر
+# ويكمل من الدفعات التالية. لكل دفعة Preamble وترويسة وفجوة (~0.85 ثانية)، فلا تقل عن FOUNTAIN_MIN_BURST رمز.
+FOUNTAIN_BURST_FRACTION = 4
+FOUNTAIN_MIN_BURST = 8
+
+
+@lru_cache(maxsize=8)
+def _tone_bank(sample_rate, duration, num_samples, freq_key):
+    """
+    بنك النغمات: مصفوفة (القنوات × العينات) تحتوي على موجة جيبية لكل قناة.
+    تُحسب مرة واحدة لكل تركيبة (معدل العينة، الترددات، المدة) ثم يعاد استخدامها لكل الإطارات.
+    """
+    frequencies = np.frombuffer(freq_key, dtype=np.float64)
+    t = np.linspace(0, duration, num_samples, endpoint=False)
+    bank = np.sin(2 * np.pi * np.outer(frequencies, t)).astype(np.float32)
+    bank.flags.writeable = False
+    return bank
+
+
+def bits_to_array(bits):
+    """تحويل البتات (نص من '0'/'1' أو مصفوفة) إلى مصفوفة uint8 من 0 و 1."""
+    if isinstance(bits, str):
+        return (np.frombuffer(bits.encode('ascii'), dtype=np.uint8) == ord('1')).astype(np.uint8)
+    return np.asarray(bits, dtype=np.uint8)
+
+
+def preamble_waveform(kind, sample_rate, duration, freq_min, freq_max, tone_freq=18000):
+    """
+    إشارة البداية (Preamble) المشتركة بين المرسل والمستقبل:
+    - "chirp": مسح خطي من freq_min إلى freq_max، ذروة ترابط حادة تسمح بالتزامن على مستوى العينة الواحدة.
+    - "tone": نغمة 18kHz ثابتة (الإشارة الأصلية، للتوافق).
+    """
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    if kind == "tone":
+        return np.sin(2 * np.pi * tone_freq * t)
+    sweep_rate = (freq_max - freq_min) / duration
+    return np.sin(2 * np.pi * (freq_min * t + sweep_rate * t ** 2 / 2))
+
+
+def wav_header(num_samples, sample_rate, dtype=np.int16):
+    """ترويسة WAV أحادية القناة لعدد عينات معروف مسبقاً (int16 PCM أو float32)."""
+    dtype = np.dtype(dtype)
+    audio_format = 3 if dtype.kind == 'f' else 1  # 3 = IEEE float, 1 = PCM
+    block_align = dtype.itemsize
+    data_size = num_samples * block_align
+    return (struct.pack('<4sI4s', b'RIFF', 36 + data_size, b'WAVE') +
+            struct.pack('<4sIHHIIHH', b'fmt ', 16, audio_format, 1, sample_rate,
+                        sample_rate * block_align, block_align, 8 * block_align) +
+            struct.pack('<4sI', b'data', data_size))
+
+
+def to_pcm(signal, dtype=np.int16):
+    """تحويل إشارة float (بين -1 و 1) إلى صيغة الإخراج المطلوبة."""
+    if np.dtype(dtype) == np.int16:
+        return (signal * 32767).astype(np.int16)
+    return signal.astype(dtype, copy=False)
+
 
 class FFTTransmitter:
-    def __init__(self, sample_rate=44100, num_channels=1000, freq_min=300, freq_max=15000):
+    def __init__(self, sample_rate=44100, num_channels=1000, freq_min=300, freq_max=15000, fec="rs",
+                 preamble="chirp", modulation="ook", symbol_duration=0.05, carousel="repeat", fountain_burst=None):
         """
         إعداد جهاز الإرسال بـ 1000 قناة ترددية متوازية.
+        fec: ترميز تصحيح الأخطاء ("rs" أو "rs16" أو "rs64" أو "repeat" للتوافق مع المستقبلات القديمة).
+        preamble: شكل إشارة البداية ("chirp" أو "tone" للنغمة الأصلية 18kHz).
+        modulation: تعديل البيانات ("ook" الأصلي، أو "qpsk" / "qam16" عبر OFDM لسعة أعلى).
+        symbol_duration: مدة رمز OFDM بالثواني (تُعلن في الترويسة مثل مدة إطار OOK).
+        carousel: "repeat" (تكرار نفس الدورة) أو "fountain" (كل دورة تحمل fountain_burst رمز نافورة جديد،
+        افتراضياً ربع رموز البيانات ولا تقل عن FOUNTAIN_MIN_BURST، فيكمل المنضم المتأخر من الدفعات التالية).
         """
+        if modulation not in MODULATIONS:
+            raise ValueError(f"تعديل غير معروف: {modulation}")
+        if carousel not in ("repeat", "fountain"):
+            raise ValueError(f"نوع Carousel غير معروف: {carousel}")
         self.sample_rate = sample_rate
         self.num_channels = num_channels
         self.freq_min = freq_min
@@ -16,84 +94,329 @@ class FFTTransmitter:
         
         # توليد الترددات لكل قناة (1000 قناة موزعة خطياً)
         self.frequencies = np.linspace(self.freq_min, self.freq_max, self.num_channels)
-        
+        self.fec = get_code(fec)
+        self.modulation = modulation
+        if modulation != "ook" and isinstance(self.fec, RepetitionCode):
+            raise ValueError("تعديل OFDM يحتاج ترويسة البث، لا يمكن استخدامه مع ترميز التكرار القديم")
+        if carousel == "fountain" and isinstance(self.fec, RepetitionCode):
+            raise ValueError("Carousel النافورة يحتاج ترويسة البث، لا يمكن استخدامه مع ترميز التكرار القديم")
+
+        # توقيت البث: إشارة بداية (Preamble)، فجوة صغيرة بعد كل إطار، وفجوة كبيرة بين الدورات
+        self.preamble = preamble
+        self.preamble_duration = 0.1
+        self.preamble_freq = 18000
+        self.gap_duration = 0.05
+        self.cycle_gap_duration = 0.5
+        # إطارات الترويسة تُبث دائماً بـ OOK وبهذه المدة، لأن المستقبل لا يعرف التعديل قبل قراءتها
+        self.header_frame_duration = 0.2
+        # مدة رمز OFDM (بدون البادئة الدورية): الرموز القصيرة أكثر تحملاً لفرق ساعة العينات بين المرسل والمستقبل
+        # (الحوامل المتباعدة 20Hz تتحمل ~300ppm بـ QPSK، بينما 16-QAM تحتاج قناة أنظف)
+        self.symbol_duration = symbol_duration
+        # Carousel النافورة: كل رمز حزمة مستقلة بحجم كلمة Reed-Solomon واحدة (بدون خلط بين الكلمات)،
+        # فالإطار التالف يُفقد رمزاً أو اثنين فقط، والمستقبل يكمل من رموز أي دورات لاحقة (كلها مختلفة)
+        # بدلاً من انتظار دورة كاملة سليمة.
+        self.carousel = carousel
+        self.fountain_burst = fountain_burst
+        self.fountain_fec = block_code(self.fec)
+
+    def data_frame_duration(self, frame_duration=0.2):
+        """مدة إطارات البيانات: frame_duration في OOK، أو مدة رمز OFDM."""
+        return frame_duration if self.modulation == "ook" else self.symbol_duration
+
+    def encode_bytes(self, data, frame_duration=0.2, fec=None):
+        """
+        ترميز بيانات ثنائية (bytes / bytearray / memoryview) للبث، ويعيد مصفوفتي بتات NumPy:
+        (بتات الترويسة محشوة إلى إطارات كاملة، بتات البيانات بعد FEC).
+        الترميز القديم (تكرار كل بت مرتين) يُبث بدون ترويسة كما كان.
+        fec: ترميز مختلف لهذه الدورة فقط (مثل دورات النافورة)، وإلا ترميز جهاز الإرسال.
+        """
+        fec = fec or self.fec
+        frame_duration = self.data_frame_duration(frame_duration)
+        if isinstance(fec, RepetitionCode):
+            return np.zeros(0, dtype=np.uint8), fec.encode(data)
+
+        # الترويسة تحدد الترميز والتعديل ومدة الإطار وطول الحمولة، وتشغل إطاراً كاملاً (أو أكثر) قبل البيانات
+        header = encode_header(fec.code_id, len(data), MODULATIONS[self.modulation],
+                               int(round(frame_duration * 1000)))
+        header_bits = np.zeros(-(-len(header) // self.num_channels) * self.num_channels, dtype=np.uint8)
+        header_bits[:len(header)] = header
+        return header_bits, fec.encode(data)
+
+    def bytes_to_bits(self, data, frame_duration=0.2):
+        """
+        تحويل بيانات ثنائية (bytes / bytearray / memoryview) إلى مصفوفة بتات NumPy مع إضافة FEC.
+        لا حاجة لـ Base64: البايتات تُبث كما هي.
+        """
+        return np.concatenate(self.encode_bytes(data, frame_duration))
+
+    def payload_to_bytes(self, payload):
+        """تحويل الحمولة (نص أو بايتات) إلى البايتات التي ستُبث فعلياً."""
+        if isinstance(payload, str):
+            # ضغط بسيط: إزالة المسافات الزائدة (مثال للضغط)
+            return " ".join(payload.split()).encode('utf-8')
+        return payload
+
+    def payload_to_bits(self, payload, frame_duration=0.2):
+        """تحويل الحمولة (نص أو بايتات) إلى مصفوفة بتات جاهزة للبث."""
+        return self.bytes_to_bits(self.payload_to_bytes(payload), frame_duration)
+
+    def config(self):
+        """كل الإعدادات التي تؤثر على الصوت الناتج (تُستخدم كمفتاح للتخزين المؤقت)."""
+        return {
+            "sample_rate": self.sample_rate,
+            "num_channels": self.num_channels,
+            "freq_min": self.freq_min,
+            "freq_max": self.freq_max,
+            "fec": self.fec.name,
+            "modulation": self.modulation,
+            "preamble": self.preamble,
+            "preamble_duration": self.preamble_duration,
+            "preamble_freq": self.preamble_freq,
+            "gap_duration": self.gap_duration,
+            "cycle_gap_duration": self.cycle_gap_duration,
+            "header_frame_duration": self.header_frame_duration,
+            "symbol_duration": self.symbol_duration,
+            "carousel": self.carousel,
+            "fountain_burst": self.fountain_burst,
+        }
+
+    def bits_to_frames(self, bits):
+        """تقسيم مصفوفة البتات إلى مصفوفة إطارات (الإطارات × القنوات) مع حشو الإطار الأخير بالأصفار."""
+        num_frames = -(-len(bits) // self.num_channels)
+        frames = np.zeros(num_frames * self.num_channels, dtype=np.uint8)
+        frames[:len(bits)] = bits
+        return frames.reshape(num_frames, self.num_channels)
+
     def text_to_bits(self, text):
-        """تحويل النص إلى سلسلة من البتات مع إضافة FEC (تكرار البتات كشكل بسيط من الحماية)."""
-        # ضغط بسيط: إزالة المسافات الزائدة (مثال للضغط)
-        compressed_text = " ".join(text.split())
-        
-        bits = ""
-        for char in compressed_text:
-            bits += bin(ord(char))[2:].zfill(8)
-            
-        # إضافة FEC: تكرار كل بت مرتين (Repetition Code) لضمان الوصول
-        # في المشاريع المتقدمة نستخدم Raptor Codes أو Reed-Solomon
-        fec_bits = ""
-        for b in bits:
-            fec_bits += b * 2 # تكرار البت للحماية
-            
-        return fec_bits
+        """تحويل النص إلى سلسلة من البتات '0'/'1' مع إضافة FEC (واجهة نصية للتوافق مع الإصدارات السابقة)."""
+        bits = self.payload_to_bits(text)
+        return (bits + ord('0')).tobytes().decode('ascii')
+
+    def tone_bank(self, duration):
+        """بنك النغمات المخزن مؤقتاً لهذا الجهاز ولمدة الإطار المطلوبة."""
+        num_samples = int(self.sample_rate * duration)
+        freq_key = np.ascontiguousarray(self.frequencies, dtype=np.float64).tobytes()
+        return _tone_bank(self.sample_rate, duration, num_samples, freq_key)
+
+    def generate_frames(self, frames_bits, duration=0.1):
+        """
+        توليد عدة إطارات دفعة واحدة كمصفوفة ثنائية الأبعاد (الإطارات × العينات).
+        كل صف في frames_bits هو بتات إطار واحد (نص '0'/'1' أو مصفوفة)، ويتم التوليد
+        بعملية ضرب مصفوفات واحدة مع بنك النغمات بدلاً من حلقة np.sin لكل قناة.
+        """
+        bank = self.tone_bank(duration)
+        matrix = np.zeros((len(frames_bits), self.num_channels), dtype=np.float32)
+        if isinstance(frames_bits, np.ndarray) and frames_bits.ndim == 2:
+            active_bits = frames_bits[:, :self.num_channels]
+            matrix[:, :active_bits.shape[1]] = active_bits
+        else:
+            for row, bits in enumerate(frames_bits):
+                # التأكد من أن عدد البتات لا يتجاوز عدد القنوات
+                active_bits = bits_to_array(bits)[:self.num_channels]
+                matrix[row, :len(active_bits)] = active_bits
+
+        # جمع الموجات الجيبية للقنوات النشطة (التي قيمتها 1) لكل الإطارات معاً
+        signals = matrix @ bank
+
+        # تطبيع كل إطار على حدة لمنع التشويه (Normalization)
+        peaks = np.max(np.abs(signals), axis=1, keepdims=True)
+        peaks[peaks == 0] = 1.0
+        signals /= peaks
+        return signals
 
     def generate_frame(self, bits, duration=0.1):
         """
         توليد إطار صوتي واحد يحتوي على البيانات (نغمات متوازية).
         """
-        t = np.linspace(0, duration, int(self.sample_rate * duration), endpoint=False)
-        signal = np.zeros_like(t)
-        
-        # التأكد من أن عدد البتات لا يتجاوز عدد القنوات
-        active_bits = bits[:self.num_channels]
-        
-        # جمع الموجات الجيبية للقنوات النشطة (التي قيمتها 1)
-        for i, bit in enumerate(active_bits):
-            if bit == '1':
-                # استخدام تردد القناة i
-                signal += np.sin(2 * np.pi * self.frequencies[i] * t)
-        
-        # تطبيع الإشارة لمنع التشويه (Normalization)
-        if np.max(np.abs(signal)) > 0:
-            signal = signal / np.max(np.abs(signal))
-            
-        return signal
+        return self.generate_frames([bits], duration=duration)[0]
+
+    def preamble_signal(self):
+        return preamble_waveform(self.preamble, self.sample_rate, self.preamble_duration,
+                                 self.freq_min, self.freq_max, self.preamble_freq)
 
-    def generate_signal(self, text, filename="output.wav", frame_duration=0.2, num_repeats=3):
+    def ofdm_modem(self, symbol_duration):
+        """مودم OFDM المشترك مع المستقبل لهذا النطاق الترددي ومدة الرمز."""
+        return get_modem(self.sample_rate, self.freq_min, self.freq_max, symbol_duration, self.modulation)
+
+    def cycle_segments(self, payload, frame_duration=0.2, fec=None):
         """
-        توليد ملف صوتي كامل يحتوي على النص المشفر مع ميزة Data Carousel (إعادة البث).
+        تقسيم دورة البث إلى مقاطع (التعديل، الصفوف، مدة الإطار):
+        إطارات الترويسة بـ OOK، ثم البيانات كإطارات OOK (الإطارات × القنوات) أو رموز OFDM (الرموز × بتات الرمز).
         """
-        bits = self.text_to_bits(text)
-        print(f"جاري تحويل النص إلى {len(bits)} بت (شاملة FEC)...")
-        
-        all_signals = []
-        
-        # تنفيذ Data Carousel: تكرار البث بالكامل لضمان الالتقاط
-        for repeat in range(num_repeats):
-            print(f"--- جاري توليد الدورة {repeat + 1} من البث (Carousel) ---")
-            
-            # إضافة إشارة بداية (Preamble) - تردد عالي جداً لتمييز بداية البث
-            preamble_t = np.linspace(0, 0.1, int(self.sample_rate * 0.1), endpoint=False)
-            preamble = np.sin(2 * np.pi * 18000 * preamble_t) # 18kHz
-            all_signals.append(preamble)
-            
-            # تقسيم البتات إلى إطارات
-            for i in range(0, len(bits), self.num_channels):
-                frame_bits = bits[i:i + self.num_channels]
-                if len(frame_bits) < self.num_channels:
-                    frame_bits = frame_bits.ljust(self.num_channels, '0')
-                
-                frame_signal = self.generate_frame(frame_bits, duration=frame_duration)
-                all_signals.append(frame_signal)
-                
-                # فجوة صغيرة
-                all_signals.append(np.zeros(int(self.sample_rate * 0.05)))
-            
-            # فجوة كبيرة بين الدورات
-            all_signals.append(np.zeros(int(self.sample_rate * 0.5)))
-            
-        # دمج كل الإطارات
-        final_signal = np.concatenate(all_signals)
-        final_signal_int = np.int16(final_signal * 32767)
-        
-        wavfile.write(filename, self.sample_rate, final_signal_int)
+        with METRICS.timer("pack"):
+            header_bits, data_bits = self.encode_bytes(self.payload_to_bytes(payload), frame_duration, fec)
+            segments = []
+            if len(header_bits):
+                segments.append(("ook", self.bits_to_frames(header_bits), self.header_frame_duration))
+            if self.modulation == "ook":
+                segments.append(("ook", self.bits_to_frames(data_bits), frame_duration))
+            else:
+                modem = self.ofdm_modem(self.symbol_duration)
+                segments.append(("ofdm", modem.bits_to_symbols(data_bits), self.symbol_duration))
+        return segments
+
+    def segment_length(self, kind, rows, duration):
+        """عدد العينات في مقطع: (إطار + فجوة) لكل إطار OOK، أو (بادئة دورية + رمز) لكل رمز OFDM."""
+        if kind == "ofdm":
+            return len(rows) * self.ofdm_modem(duration).symbol_size
+        return len(rows) * (int(self.sample_rate * duration) + int(self.sample_rate * self.gap_duration))
+
+    def cycle_length(self, segments):
+        """عدد العينات في دورة Carousel واحدة."""
+        return (int(self.sample_rate * self.preamble_duration) +
+                sum(self.segment_length(*segment) for segment in segments) +
+                int(self.sample_rate * self.cycle_gap_duration))
+
+    def iter_cycle_blocks(self, segments, dtype=np.int16, batch_frames=64):
+        """
+        توليد دورة Carousel واحدة ككتل PCM متتالية: Preamble ثم (إطار + فجوة) أو رموز OFDM لكل دفعة ثم الفجوة الكبيرة.
+        الذاكرة محدودة بدفعة batch_frames من الإطارات.
+        """
+        # إضافة إشارة بداية (Preamble) لتحديد بداية الدورة بدقة عند الاستقبال
+        yield to_pcm(self.preamble_signal(), dtype)
+
+        for kind, rows, duration in segments:
+            for start in range(0, len(rows), batch_frames):
+                yield self.segment_block(kind, rows[start:start + batch_frames], duration, dtype)
+
+        # فجوة كبيرة بين الدورات
+        yield np.zeros(int(self.sample_rate * self.cycle_gap_duration), dtype=dtype)
+
+    def segment_block(self, kind, rows, duration, dtype=np.int16):
+        """PCM لدفعة من صفوف مقطع واحد (نفس الكتلة مهما كان من يولدها: iter_cycle_blocks أو عمليات parallel_codec)."""
+        if kind == "ofdm":
+            # رموز OFDM متلاصقة: البادئة الدورية تحل محل الفجوة
+            return to_pcm(self.ofdm_modem(duration).modulate(rows), dtype).reshape(-1)
+        frame_size = int(self.sample_rate * duration)
+        gap_size = int(self.sample_rate * self.gap_duration)
+        frame_signals = self.generate_frames(rows, duration=duration)
+        # كل إطار متبوع بفجوة صغيرة
+        block = np.zeros((len(frame_signals), frame_size + gap_size), dtype=dtype)
+        block[:, :frame_size] = to_pcm(frame_signals, dtype)
+        return block.reshape(-1)
+
+    def fountain_bursts(self, payload, num_repeats=3):
+        """
+        حمولات دورات Carousel النافورة: نفس عدد الرموز الذي يبثه التكرار (num_repeats × k)،
+        لكن كلها مختلفة، مقسمة إلى دورات من fountain_burst رمز. الرموز الأولى هي البيانات نفسها.
+        طول كل رمز مع ترويسة حزمته = بيانات كلمة Reed-Solomon واحدة.
+        """
+        data = self.payload_to_bytes(payload)
+        symbol_size = self.fountain_fec.max_data - PACKET_OVERHEAD - FOUNTAIN_HEADER_SIZE
+        k, symbol_size = fountain_layout(len(data), symbol_size)
+        burst = self.fountain_burst or min(k, max(FOUNTAIN_MIN_BURST, -(-k // FOUNTAIN_BURST_FRACTION)))
+        total = max(num_repeats, 1) * k
+        return [encode_fountain(data, range(start, min(start + burst, total)), symbol_size)
+                for start in range(0, total, burst)]
+
+    def carousel_layout(self, payload, frame_duration=0.2, num_repeats=3):
+        """
+        ترتيب دورات البث: ([(حمولة الدورة، ترميز FEC أو None، مواقع بداياتها بالعينات)]، عدد العينات الكلي).
+        - Carousel التكرار: دورة واحدة تتكرر num_repeats مرة متتالية.
+        - Carousel النافورة: كل دفعة رموز دورة مستقلة.
+        - قائمة حمولات (مثل طبقات صورة متدرجة): كل حمولة دورة مستقلة بالترتيب، فتُفك الأولى قبل اكتمال البقية،
+          والتسلسل كله يتكرر num_repeats مرة.
+        """
+        if isinstance(payload, (list, tuple)):
+            items, repeats = [(layer, None) for layer in payload], num_repeats
+        elif self.carousel == "fountain":
+            items, repeats = [(burst, self.fountain_fec) for burst in self.fountain_bursts(payload, num_repeats)], 1
+        else:
+            items, repeats = [(payload, None)], num_repeats
+
+        lengths = [self.cycle_length(self.cycle_segments(item, frame_duration, fec)) for item, fec in items]
+        sequence = sum(lengths)
+        layout = []
+        offset = 0
+        for (item, fec), length in zip(items, lengths):
+            layout.append((item, fec, offset + sequence * np.arange(repeats)))
+            offset += length
+        return layout, sequence * repeats
+
+    def signal_length(self, payload, frame_duration=0.2, num_repeats=3):
+        """عدد العينات في البث الكامل (كل دورات الـ Carousel)."""
+        return self.carousel_layout(payload, frame_duration, num_repeats)[1]
+
+    def render_cycle(self, payload, frame_duration=0.2, dtype=np.int16):
+        """توليد دورة Carousel كاملة مرة واحدة كمصفوفة PCM جاهزة للتكرار."""
+        segments = self.cycle_segments(payload, frame_duration)
+        return np.concatenate(list(self.iter_cycle_blocks(segments, dtype)))
+
+    def iter_signal_blocks(self, payload, frame_duration=0.2, num_repeats=3, dtype=np.int16,
+                           stream=False, batch_frames=64):
+        """
+        توليد البث الكامل (Data Carousel) ككتل PCM متتالية بترتيب carousel_layout.
+        - الوضع العادي: كل دورة متكررة تُولَّد مرة واحدة ثم تُعاد (الذاكرة = الدورات المختلفة).
+        - وضع التدفق stream=True: تُولَّد الإطارات دفعة بدفعة في كل دورة (الذاكرة = batch_frames إطار).
+        - الدورات التي لا تتكرر (Carousel النافورة) تُولَّد كل منها عند الحاجة إليها.
+        """
+        layout, _ = self.carousel_layout(payload, frame_duration, num_repeats)
+        order = sorted((start, index) for index, (_, _, starts) in enumerate(layout) for start in starts)
+        rendered = {}
+        for _, index in order:
+            if index in rendered:
+                yield rendered[index]
+                continue
+            item, fec, starts = layout[index]
+            blocks = self.iter_cycle_blocks(self.cycle_segments(item, frame_duration, fec), dtype, batch_frames)
+            if stream or len(starts) == 1:
+                yield from blocks
+                continue
+            rendered[index] = np.concatenate(list(blocks))
+            yield rendered[index]
+
+    def write_signal(self, payload, sink, frame_duration=0.2, num_repeats=3, dtype=np.int16,
+                     stream=False, batch_frames=64, parallel=None):
+        """
+        كتابة البث كملف WAV إلى مسار أو كائن ملف (file-like) كتلة بكتلة دون تجميع البث كاملاً في الذاكرة.
+        parallel: مجمع عمليات (parallel_codec.ParallelCodec) لتوزيع دفعات الإطارات على عدة أنوية (نفس الملف الناتج).
+        يعيد عدد العينات المكتوبة.
+        """
+        if parallel is not None:
+            # العمل يجري في عمليات أخرى: يُقاس كمرحلة render واحدة في هذه العملية
+            with METRICS.timer("render"):
+                num_samples = parallel.write_signal(self, payload, sink, frame_duration, num_repeats, dtype,
+                                                    batch_frames)
+            self._count_on_air(payload, num_samples, num_repeats)
+            return num_samples
+        if isinstance(sink, (str, os.PathLike)):
+            with open(sink, 'wb') as f:
+                return self.write_signal(payload, f, frame_duration, num_repeats, dtype, stream, batch_frames)
+
+        num_samples = self.signal_length(payload, frame_duration, num_repeats)
+        sink.write(wav_header(num_samples, self.sample_rate, dtype))
+        # زمن توليد كل كتلة (render) وزمن كتابتها (wav_write) منفصلان
+        blocks = self.iter_signal_blocks(payload, frame_duration, num_repeats, dtype, stream, batch_frames)
+        while True:
+            with METRICS.timer("render"):
+                block = next(blocks, None)
+            if block is None:
+                break
+            with METRICS.timer("wav_write"):
+                sink.write(memoryview(np.ascontiguousarray(block)).cast('B'))
+            METRICS.count("wav_bytes", block.nbytes)
+        self._count_on_air(payload, num_samples, num_repeats)
+        return num_samples
+
+    def _count_on_air(self, payload, num_samples, num_repeats):
+        """عدادات البتات الفعلية على الهواء: بايتات الحمولة المبثوثة (كل الدورات) وثواني البث."""
+        items = payload if isinstance(payload, (list, tuple)) else [payload]
+        METRICS.count("payload_bytes", num_repeats * sum(len(self.payload_to_bytes(item)) for item in items))
+        METRICS.count("on_air_seconds", num_samples / self.sample_rate)
+
+    def generate_signal(self, payload, filename="output.wav", frame_duration=0.2, num_repeats=3, stream=False,
+                        parallel=None):
+        """
+        توليد ملف صوتي كامل يحتوي على الحمولة المشفرة (نص أو بايتات) مع ميزة Data Carousel (إعادة البث).
+        تُولَّد الدورة مرة واحدة فقط ثم تُكتب إلى الملف num_repeats مرة.
+        """
+        # الحمولة قد تكون قائمة دورات (طبقات صورة متدرجة): مجموع بتات كل الدورات
+        items = payload if isinstance(payload, (list, tuple)) else [payload]
+        bits = sum(len(self.payload_to_bits(item, frame_duration)) for item in items)
+        print(f"جاري تحويل النص إلى {bits} بت (شاملة FEC)، التعديل: {self.modulation}...")
+        print(f"--- جاري توليد دورة البث (Carousel) وتكرارها {num_repeats} مرة ---")
+
+        self.write_signal(payload, filename, frame_duration, num_repeats, stream=stream, parallel=parallel)
         print(f"تم حفظ ملف البث الدوري بنجاح: {filename}")
         return filename
 
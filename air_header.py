@@ -0,0 +1,61 @@
+import struct
+import zlib
+import numpy as np
+
+# ترويسة البث: تسبق البيانات في كل دورة وتحدد طريقة فك التشفير
+# magic (2) | version (1) | fec (1) | modulation (1) | frame_ms (2) | length (4) | crc16 (2)
+# الترويسة نفسها تُبث دائماً بتعديل OOK وبمدة الإطار الافتراضية، و frame_ms هي مدة إطارات (أو رموز) البيانات بعدها
+HEADER_MAGIC = b"\xa5\x5a"
+HEADER_VERSION = 2
+HEADER_FORMAT = ">2sBBBHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT) + 2
+# كل بت في الترويسة يُكرر 3 مرات (تصويت الأغلبية) لأنها تُقرأ قبل معرفة الترميز المستخدم
+HEADER_REPEAT = 3
+HEADER_BITS = HEADER_SIZE * 8 * HEADER_REPEAT
+
+# أنواع التعديل (Modulation)
+MOD_OOK = 0  # نغمة موجودة = 1، غائبة = 0 (الوضع الأصلي)
+MOD_QPSK = 1  # OFDM بـ 2 بت لكل حامل
+MOD_QAM16 = 2  # OFDM بـ 4 بت لكل حامل
+MODULATIONS = {"ook": MOD_OOK, "qpsk": MOD_QPSK, "qam16": MOD_QAM16}
+MODULATION_NAMES = {value: name for name, value in MODULATIONS.items()}
+
+def encode_header(fec_id, length, modulation=MOD_OOK, frame_ms=200):
+    """بناء بتات الترويسة (مع تكرار كل بت HEADER_REPEAT مرات)."""
+    body = struct.pack(HEADER_FORMAT, HEADER_MAGIC, HEADER_VERSION, fec_id, modulation, frame_ms, length)
+    header = body + struct.pack(">H", zlib.crc32(body) & 0xffff)
+    return np.repeat(np.unpackbits(np.frombuffer(header, dtype=np.uint8)), HEADER_REPEAT)
+
+# ترويسة فشل CRC الخاص بها لكن بصمتها شبه سليمة: دورة تالفة من جهاز إرسال حديث، وليست بثاً قديماً بدون ترويسة
+MAGIC_MAX_ERRORS = 2
+
+def _vote(bits):
+    votes = np.asarray(bits[:HEADER_BITS], dtype=np.uint8).reshape(-1, HEADER_REPEAT).sum(axis=1)
+    return np.packbits(votes * 2 > HEADER_REPEAT).tobytes()
+
+def has_header(bits):
+    """
+    هل تبدأ البتات بترويسة (حتى لو كانت تالفة)؟ البصمة بعد التصويت تختلف بـ MAGIC_MAX_ERRORS بت على الأكثر.
+    إذا لم تُقرأ الترويسة و has_header صحيحة فالدورة مفقودة، ولا يجوز فكها بترميز التكرار القديم.
+    """
+    if len(bits) < HEADER_BITS:
+        return False
+    magic = np.frombuffer(_vote(bits)[:len(HEADER_MAGIC)], dtype=np.uint8)
+    errors = np.unpackbits(magic ^ np.frombuffer(HEADER_MAGIC, dtype=np.uint8)).sum()
+    return int(errors) <= MAGIC_MAX_ERRORS
+
+def decode_header(bits):
+    """
+    قراءة الترويسة من أول HEADER_BITS بت. يعيد قاموساً بالحقول، أو None إذا لم تكن هناك ترويسة صالحة
+    (مثلاً بث قديم بترميز التكرار بدون ترويسة).
+    """
+    if len(bits) < HEADER_BITS:
+        return None
+    header = _vote(bits)
+    body, crc = header[:-2], struct.unpack(">H", header[-2:])[0]
+    if not body.startswith(HEADER_MAGIC) or zlib.crc32(body) & 0xffff != crc:
+        return None
+    _, version, fec_id, modulation, frame_ms, length = struct.unpack(HEADER_FORMAT, body)
+    if version != HEADER_VERSION or modulation not in MODULATION_NAMES:
+        return None
+    return {"version": version, "fec": fec_id, "modulation": modulation, "frame_ms": frame_ms, "length": length}
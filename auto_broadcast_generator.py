@@ -1,14 +1,16 @@
-import requests
-import json
-import os
-from advanced_fft_transmitter import FFTTransmitter
+from render_cache import RenderCache
+from upstream_cache import UpstreamCache
+from delta_codec import DeltaEncoder
+
+# تخزين مؤقت لاستجابات المصادر (الطقس والوقت) حسب مدة صلاحية كل مصدر
+UPSTREAM_CACHE = UpstreamCache()
 
 def get_weather(city="Cairo"):
     """جلب حالة الطقس (مثال باستخدام API مجاني أو محاكاة)"""
     try:
         # ملاحظة: في النسخة النهائية يمكن استخدام OpenWeatherMap API
         # هنا سنقوم بمحاكاة البيانات أو استخدام خدمة بسيطة
-        response = requests.get(f"https://wttr.in/{city}?format=3")
+        response = UPSTREAM_CACHE.get(f"https://wttr.in/{city}?format=3")
         if response.status_code == 200:
             return response.text.strip()
     except:
@@ -26,7 +28,7 @@ def get_news():
 def create_broadcast_payload():
     weather = get_weather()
     news = get_news()
-    timestamp = requests.get("http://worldtimeapi.org/api/timezone/Etc/UTC").json()['datetime'][:16]
+    timestamp = UPSTREAM_CACHE.get("http://worldtimeapi.org/api/timezone/Etc/UTC").json()['datetime'][:16]
     
     payload = f"[{timestamp}] {weather} | {news}"
     return payload
@@ -36,10 +38,14 @@ def main():
     payload = create_broadcast_payload()
     print(f"Payload to broadcast: {payload}")
     
+    from advanced_fft_transmitter import FFTTransmitter
     transmitter = FFTTransmitter()
     # توليد ملف صوتي باسم ثابت ليتم استخدامه في البث
     output_file = "live_broadcast.wav"
-    transmitter.generate_signal(payload, output_file, num_repeats=5)
+    # بث الفرق عن آخر Keyframe فقط (النسخ السابقة محفوظة في ملف لأن البرنامج يعمل مرة في كل دورة)
+    packet = DeltaEncoder("auto-broadcast", state_path="broadcast_delta_state.json").encode(payload)
+    # إعادة استخدام الملف المخزن إذا لم تتغير الحمولة منذ الدورة السابقة
+    RenderCache().render(transmitter, packet, output_file, num_repeats=5)
     print(f"Broadcast file generated: {output_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver, ChannelLevels
+from channel_simulator import Channel, PRESETS
+
+# منحنيات BER / PER / الإنتاجية الفعلية للمودم عبر قنوات محاكاة، لاختيار عدد القنوات ومدة الإطار وعدد الدورات.
+# كل نقطة (إعداد المودم × القناة) تُقاس بعدة محاولات، والنقاط تتوزع على أنوية المعالج.
+
+CHUNK = 4410  # 0.1 ثانية
+
+# عوائق القنوات النموذجية كل منها على حدة، لمعرفة أيها يحد الأداء
+IMPAIRMENTS = {
+    "band 300-10k": Channel(low=300, high=10000),
+    "band 300-12k": Channel(low=300, high=12000),
+    "room echo": Channel(echoes=((0.003, 0.4), (0.011, 0.2))),
+    "fm echo": Channel(echoes=((0.0005, 0.2),)),
+    "mp3 holes": Channel(high=16000, hole_fraction=0.03, mask_db=60),
+    "clock 80ppm": Channel(ppm=80, drift_ppm_per_s=0.5),
+    "dropouts": Channel(dropout_rate=0.05, dropout_duration=0.15),
+}
+
+
+def data_frame_offsets(transmitter, payload, frame_duration, num_repeats):
+    """(مواقع بداية إطارات البيانات في البث المرسل، بتاتها) لكل دورة: الترتيب نفسه في iter_cycle_blocks."""
+    segments = transmitter.cycle_segments(payload, frame_duration)
+    kind, rows, duration = segments[-1]
+    cycle = transmitter.cycle_length(segments)
+    start = int(transmitter.sample_rate * transmitter.preamble_duration)
+    start += sum(transmitter.segment_length(*segment) for segment in segments[:-1])
+    slot = int(transmitter.sample_rate * duration) + int(transmitter.sample_rate * transmitter.gap_duration)
+    offsets = np.arange(num_repeats)[:, np.newaxis] * cycle + start + np.arange(len(rows)) * slot
+    return offsets, rows
+
+
+def raw_bit_errors(receiver, signal, channel, offsets, rows, frame_size, gap_size):
+    """
+    BER الخام قبل FEC بتوقيت مثالي (مواقع الإطارات معروفة من المرسل ومحوّلة بساعة القناة):
+    نفس قرار المستقبل (مستويات كل قناة من الفجوات والبتات، ChannelLevels) لكل دورة على حدة.
+    """
+    errors = 0
+    total = 0
+    sample_index = np.arange(frame_size)
+    gap_index = np.arange(-gap_size // 2, 0)
+    for cycle_offsets in offsets:
+        starts = np.round(channel.time_map(cycle_offsets, receiver.sample_rate, len(signal))).astype(np.intp)
+        valid = starts + frame_size <= len(signal)
+        if not valid.any():
+            continue
+        starts = starts[valid]
+        frames = signal[starts[:, np.newaxis] + sample_index].astype(np.float32) / 32768
+        gaps = signal[starts[:, np.newaxis] + gap_index].astype(np.float32) / 32768
+        soft = receiver.soft_frames(frames, ChannelLevels(receiver.num_channels), gaps)
+        errors += int(np.sum((soft > 0) != rows[valid].astype(bool)))
+        total += rows[valid].size
+    return errors, total
+
+
+def decode_cycles(receiver, signal, payload):
+    """(عدد الدورات التي أعادت الحمولة الصحيحة، عدد العينات المستمع إليها حتى أول نجاح أو None)."""
+    consumed = [0]
+
+    def chunks():
+        for start in range(0, len(signal), CHUNK):
+            consumed[0] = min(start + CHUNK, len(signal))
+            yield signal[start:start + CHUNK]
+
+    ok = 0
+    first = None
+    for data, stats in receiver.decode_packets(chunks()):
+        if not stats["failed"] and data == payload:
+            ok += 1
+            first = first or consumed[0]
+    return ok, first
+
+
+def measure_point(point):
+    """
+    نقطة واحدة: point = (عدد القنوات، مدة الإطار، معاملات القناة، حجم الحمولة، الدورات، المحاولات، البذرة).
+    تعيد: BER الخام، PER (كل دورة تُفك منفردة)، متوسط زمن الاستماع حتى الفك مع الجمع المرن، وعدد مرات الفشل الكامل.
+    """
+    num_channels, frame_duration, channel_params, payload_size, num_repeats, trials, seed = point
+    rng = np.random.default_rng(seed)
+    channel = Channel(**channel_params)
+    transmitter = FFTTransmitter(num_channels=num_channels)
+    single = RadioReceiver(num_channels=num_channels, combine_depth=1)
+    combining = RadioReceiver(num_channels=num_channels)
+    sample_rate = transmitter.sample_rate
+    frame_size = int(sample_rate * frame_duration)
+    gap_size = int(sample_rate * transmitter.gap_duration)
+
+    cycle_seconds = len(transmitter.render_cycle(rng.bytes(payload_size), frame_duration)) / sample_rate
+    bit_errors = bits = cycles_ok = 0
+    needed = []
+    for _ in range(trials):
+        payload = rng.bytes(payload_size)
+        clean = np.concatenate(list(transmitter.iter_signal_blocks(payload, frame_duration, num_repeats)))
+        received = channel.apply(clean, sample_rate, rng)
+
+        offsets, rows = data_frame_offsets(transmitter, payload, frame_duration, num_repeats)
+        errors, total = raw_bit_errors(single, received, channel, offsets, rows, frame_size, gap_size)
+        bit_errors += errors
+        bits += total
+        cycles_ok += min(decode_cycles(single, received, payload)[0], num_repeats)
+        # زمن الاستماع حتى أول فك ناجح (المستمع يبدأ مع أول دورة)
+        first = decode_cycles(combining, received, payload)[1]
+        needed.append(first / sample_rate if first else None)
+
+    successes = [n for n in needed if n is not None]
+    mean_needed = float(np.mean(successes)) if successes else None
+    success_rate = len(successes) / trials
+    return {
+        "num_channels": num_channels,
+        "frame_duration": frame_duration,
+        "channel": channel_params,
+        "ber": bit_errors / max(bits, 1),
+        "per": 1 - cycles_ok / (trials * num_repeats),
+        "cycle_seconds": cycle_seconds,
+        # الإنتاجية بدورة منفردة: بتات الحمولة في كل دورة تنجح ÷ زمن الدورة
+        "goodput": (cycles_ok / (trials * num_repeats)) * payload_size * 8 / cycle_seconds,
+        "seconds_needed": mean_needed,
+        "cycles_needed": mean_needed / cycle_seconds if mean_needed else None,
+        # الإنتاجية الفعلية للمستمع: بتات الحمولة ÷ زمن الاستماع حتى تكتمل (مع جمع الدورات)
+        "effective_goodput": success_rate * payload_size * 8 / mean_needed if mean_needed else 0.0,
+        "failures": trials - len(successes),
+    }
+
+
+def sweep(points, workers=None):
+    """قياس كل النقاط بالتوازي (عملية لكل نواة)، بنفس ترتيب points."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [measure_point(point) for point in points]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(measure_point, points))
+
+
+def label_of(channels):
+    """اسم القناة في الجدول من معاملاتها."""
+    names = {repr(channel.params()): name for name, channel in channels.items()}
+    return lambda result: names[repr(result["channel"])]
+
+
+def print_rows(results, label):
+    for result in results:
+        needed = f"{result['seconds_needed']:5.1f}s" if result["seconds_needed"] else f"{'∞':>6}"
+        print(f"{label(result):>14} | {result['num_channels']:5d} | {result['frame_duration']:5.2f} | "
+              f"{result['ber']:8.2e} | {result['per']:5.0%} | {result['goodput']:7.0f} | {needed} | "
+              f"{result['effective_goodput']:7.0f} | {result['failures']}")
+
+
+def run_benchmark(snrs=(10, 15, 20, 25, 30), channel_counts=(250, 500, 1000), frame_durations=(0.1, 0.2),
+                  payload_size=600, num_repeats=4, trials=3, workers=None, seed=0):
+    print(f"--- حمولة {payload_size} بايت، {num_repeats} دورات، {trials} محاولات لكل نقطة، "
+          f"{workers or os.cpu_count()} عملية ---")
+    # BER خام قبل FEC؛ PER وإنتاجية الدورة المنفردة (بت/ثانية)؛ زمن الاستماع حتى الفك والإنتاجية الفعلية مع الجمع المرن
+    header = (f"{'القناة':>14} | {'قنوات':>5} | {'إطار':>5} | {'BER':>8} | {'PER':>5} | {'بت/ث':>7} | "
+              f"{'زمن الفك':>6} | {'فعلية':>7} | فشل")
+
+    configs = [(count, duration) for count in channel_counts for duration in frame_durations]
+    points = [(count, duration, Channel(snr_db=snr).params(), payload_size, num_repeats, trials, seed)
+              for snr in snrs for count, duration in configs]
+    print("\n[AWGN فقط]")
+    print(header)
+    awgn_results = sweep(points, workers)
+    print_rows(awgn_results, lambda r: f"SNR {r['channel']['snr_db']}dB")
+
+    # كل عائق منفرداً (بدون ضجيج)، ثم القنوات النموذجية التي تجمعها
+    print("\n[عائق واحد]")
+    print(header)
+    impairment_results = sweep([(count, duration, channel.params(), payload_size, num_repeats, trials, seed)
+                                for channel in IMPAIRMENTS.values() for count, duration in configs], workers)
+    print_rows(impairment_results, label_of(IMPAIRMENTS))
+
+    print("\n[قنوات نموذجية]")
+    print(header)
+    preset_results = sweep([(count, duration, channel.params(), payload_size, num_repeats, trials, seed)
+                            for channel in PRESETS.values() for count, duration in configs], workers)
+    print_rows(preset_results, label_of(PRESETS))
+    return awgn_results, impairment_results, preset_results
+
+if __name__ == "__main__":
+    run_benchmark()
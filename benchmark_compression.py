@@ -0,0 +1,40 @@
+import time
+from compression import COMPRESSORS, load_corpus
+
+def measure(compressor, snippets, rounds=20):
+    """(نسبة الضغط الكلية، زمن الضغط والفك لكل مقطع بالميكروثانية)."""
+    compressed = [compressor.compress(snippet) for snippet in snippets]
+    for snippet, packed in zip(snippets, compressed):
+        assert compressor.decompress(packed) == snippet
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for snippet in snippets:
+            compressor.compress(snippet)
+    encode_us = (time.perf_counter() - start) / (rounds * len(snippets)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for packed in compressed:
+            compressor.decompress(packed)
+    decode_us = (time.perf_counter() - start) / (rounds * len(snippets)) * 1e6
+
+    ratio = sum(map(len, snippets)) / sum(map(len, compressed))
+    return ratio, sum(map(len, compressed)), encode_us, decode_us
+
+def run_benchmark(snippet_sizes=(1000, 2000)):
+    # صفحات الاختبار لم تُستخدم في تدريب القاموس، ومقصوصة كما تفعل المحركات (أول 1000 أو 2000 حرف)
+    pages = load_corpus("test")
+    print(f"--- مقارنة الضواغط على {len(pages)} صفحة اختبار (خارج بيانات التدريب) ---")
+    print(f"{'المقطع':>6} | {'الضاغط':>9} | {'النسبة':>6} | {'البايتات':>8} | {'ضغط µs':>8} | {'فك µs':>7}")
+    results = []
+    for size in snippet_sizes:
+        snippets = [page[:size] for page in pages]
+        for name, compressor in COMPRESSORS.items():
+            ratio, total, encode_us, decode_us = measure(compressor, snippets)
+            results.append((size, name, ratio, encode_us, decode_us))
+            print(f"{size:6d} | {name:>9} | {ratio:6.2f} | {total:8d} | {encode_us:8.1f} | {decode_us:7.1f}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
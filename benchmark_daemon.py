@@ -0,0 +1,85 @@
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from broadcast_daemon import BroadcastDaemon, Feed
+
+# ما كان continuous_streamer يفعله في كل دورة: عملية Python جديدة تستورد كل شيء وتبني جهاز الإرسال وتولد الملف
+SUBPROCESS_SCRIPT = """
+import sys
+from advanced_fft_transmitter import FFTTransmitter
+from render_cache import RenderCache
+from delta_codec import DeltaEncoder
+packet = DeltaEncoder("auto-broadcast", state_path=sys.argv[2] + "/state.json").encode(sys.argv[1])
+RenderCache(sys.argv[2]).render(FFTTransmitter(), packet, sys.argv[2] + "/live_broadcast.wav", num_repeats=5)
+"""
+
+def payload(i):
+    return f"[2026-10-17 12:{i:02d}] Cairo: +25C | News: New project for data over radio launched! | update {i}"
+
+def import_time(module):
+    """زمن بدء برنامج يستورد module فقط (أفضل 3 محاولات)."""
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run_subprocess(updates, directory):
+    times = []
+    for i in range(updates):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", SUBPROCESS_SCRIPT, payload(i), directory], check=True)
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+def run_daemon(updates, directory, interval=1.0, speedup=10):
+    """خدمة مقيمة: تحديث كل interval ثانية، والإذاعة أسرع من الزمن الحقيقي speedup مرة لاختصار التجربة."""
+    from render_cache import RenderCache
+    counter = itertools.count()
+    feed = Feed("auto-broadcast", lambda: payload(next(counter)), interval)
+    daemon = BroadcastDaemon([feed], output=os.path.join(directory, "live_broadcast.wav"),
+                             render_cache=RenderCache(directory))
+    played = []
+
+    def sink(cycle):
+        daemon.play_file(cycle._replace(duration=cycle.duration / speedup))
+        played.append(cycle.path)
+
+    daemon.sink = sink
+    started = time.perf_counter()
+    daemon.start()
+    startup = time.perf_counter() - started
+    while daemon.stats()["swaps"] < updates:
+        daemon.run(cycles=1)
+    daemon.stop()
+    stats = daemon.stats()
+    return startup, stats["render_seconds"] / stats["renders"], stats, len(played)
+
+def run_benchmark(updates=6):
+    print(f"--- {updates} تحديثات لبث auto-broadcast (5 دورات Carousel لكل ملف) ---")
+    for module in ("continuous_streamer", "cloud_radio_bot", "auto_broadcast_generator"):
+        print(f"بدء {module}: {import_time(module):.3f}s")
+
+    directory = tempfile.mkdtemp(prefix="daemon_bench_")
+    try:
+        per_update = run_subprocess(updates, directory)
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+        startup, render, stats, played = run_daemon(updates, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"عملية جديدة لكل تحديث: {per_update:.3f}s لكل تحديث (استيراد + بناء جهاز الإرسال + توليد)")
+    print(f"الخدمة المقيمة: بدء {startup:.3f}s مرة واحدة، ثم {render:.3f}s لكل تحديث ({per_update / render:.1f}x)")
+    # "متأخرة" = نهايات دورات كانت فيها الدورة التالية ما زالت تُولَّد (فأُعيدت الحالية)
+    print(f"دورات مذاعة: {played}، تبديلات: {stats['swaps']}، متأخرة: {stats['late']}، "
+          f"توليدات: {stats['renders']}")
+    return per_update, render, stats
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,82 @@
+import os
+import time
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver, iter_pcm_chunks
+from compression import load_corpus
+from delta_codec import DeltaEncoder, DeltaDecoder
+from packet_codec import decode_messages, encode_message
+
+def station_feed(num_updates):
+    """بث cloud_radio_bot: الوقت يتغير كل دورة، والطقس كل 6 دورات."""
+    start = time.mktime((2026, 10, 17, 12, 0, 0, 0, 0, -1))
+    for i in range(num_updates):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i * 600))
+        weather = f"Cairo: ☀️ +{25 + i // 6}°C"
+        yield f"STATION_ID: ALPHA | {timestamp} | {weather} | Global Update: System is running autonomously."
+
+def news_feed(num_updates):
+    """نشرة أطول (صفحة من corpus) يتغير فيها سطر واحد في كل تحديث."""
+    page = load_corpus("test")[0][:3000].decode('utf-8', errors='ignore')
+    lines = page.split("\n")
+    for i in range(num_updates):
+        lines[(7 * i) % len(lines)] = f"Update #{i}: headline changed at {12 + i // 6:02d}:{(i * 10) % 60:02d}"
+        yield "\n".join(lines)
+
+def airtime(transmitter, packet):
+    """(زمن دورة Carousel واحدة، زمن مقطع البيانات فقط بدون Preamble والترويسة والفجوة) بالثواني."""
+    segments = transmitter.cycle_segments(packet, 0.2)
+    return (transmitter.cycle_length(segments) / transmitter.sample_rate,
+            transmitter.segment_length(*segments[-1]) / transmitter.sample_rate)
+
+def run_feed(name, payloads, transmitter, keyframe_interval=10):
+    encoder = DeltaEncoder(name, keyframe_interval=keyframe_interval)
+    decoder = DeltaDecoder()
+    totals = {"full": [0, 0.0, 0.0], "delta": [0, 0.0, 0.0]}
+    delta_only = []
+    for payload in payloads:
+        full = encode_message("TXT", payload)
+        packet = encoder.encode(payload)
+        # المستقبل يعيد بناء الحمولة الكاملة من Keyframe + الفرق
+        update = decoder.feed(decode_messages(packet)[0])
+        assert update[2] == payload.encode('utf-8')
+        for kind, data in (("full", full), ("delta", packet)):
+            cycle, data_time = airtime(transmitter, data)
+            totals[kind][0] += len(data)
+            totals[kind][1] += cycle
+            totals[kind][2] += data_time
+        if decode_messages(packet)[0]["type"] == "DLT":
+            delta_only.append(len(packet))
+
+    full, delta = totals["full"], totals["delta"]
+    per_update = full[0] / len(payloads) / (sum(delta_only) / len(delta_only))
+    print(f"{name:>8} | {full[0]:7d} | {delta[0]:7d} | {full[0] / delta[0]:5.1f}x | {per_update:7.1f}x | "
+          f"{full[2] / delta[2]:8.1f}x | {full[1] / delta[1]:8.1f}x")
+    return full[0] / delta[0], per_update, full[2] / delta[2], full[1] / delta[1]
+
+def run_benchmark(num_updates=30):
+    transmitter = FFTTransmitter()
+    print(f"--- {num_updates} تحديث لكل بث، Keyframe كل 10 تحديثات ---")
+    # البايتات تشمل الـ Keyframes؛ "لكل فرق" = متوسط الحمولة الكاملة ÷ متوسط رسالة الفرق وحدها.
+    # زمن البيانات = مقطع البيانات فقط؛ زمن الدورة يشمل الكلفة الثابتة (Preamble + ترويسة + فجوة ≈ 0.85s)
+    print(f"{'البث':>8} | {'كامل B':>7} | {'فروق B':>7} | {'نسبة':>6} | {'لكل فرق':>8} | {'زمن البيانات':>9} | "
+          f"{'زمن الدورة':>9}")
+    results = {
+        "station": run_feed("station", list(station_feed(num_updates)), transmitter),
+        "news": run_feed("news", list(news_feed(num_updates)), transmitter),
+    }
+
+    # تجربة على الهواء: Keyframe ثم فرق في ملفين، والمستقبل يعيد بناء الحمولة الثانية
+    encoder = DeltaEncoder("station")
+    decoder = DeltaDecoder()
+    receiver = RadioReceiver()
+    payloads = list(station_feed(2))
+    for payload in payloads:
+        transmitter.generate_signal(encoder.encode(payload), "delta_test.wav", num_repeats=1)
+        updates = list(receiver.decode_updates(iter_pcm_chunks("delta_test.wav"), decoder))
+        assert updates and updates[-1][2] == payload.encode('utf-8')
+    os.remove("delta_test.wav")
+    print("فك التشفير الصوتي: Keyframe ثم فرق ✅")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
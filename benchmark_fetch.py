@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from compression import load_corpus
+from fetch_pool import FetchPool
+from radio_internet_gateway import RadioInternetGateway
+from upstream_cache import UpstreamCache
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """خادم بديل محلي لخدمة r.jina.ai: يعيد صفحة من corpus بعد تأخير يحاكي زمن الشبكة."""
+    protocol_version = "HTTP/1.1"  # Keep-Alive: لقياس إعادة استخدام الاتصالات
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.requests += 1
+            server.connections.add(self.client_address)
+        time.sleep(server.delay)
+        body = server.pages[server.requests % len(server.pages)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/markdown; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(delay=0.2):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.pages = load_corpus("train")
+    server.lock = threading.Lock()
+    server.active = server.max_active = server.requests = 0
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reset(server):
+    server.active = server.max_active = server.requests = 0
+    server.connections = set()
+
+def run_benchmark(num_queries=40, delay=0.2, per_host=8):
+    server = start_server(delay)
+    reader_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    queries = [f"https://en.wikipedia.org/wiki/Page_{i}" for i in range(num_queries)]
+    cache_dir = tempfile.mkdtemp()
+    print(f"--- جلب {num_queries} طلب من خادم محلي بتأخير {delay * 1000:.0f}ms لكل طلب ---")
+
+    # الطريقة القديمة: طلب واحد في كل مرة (مجمع بخيط واحد)
+    # تخزين مؤقت فارغ لكل طريقة: القياس هنا للجلب الفعلي من الشبكة
+    fetcher = FetchPool(max_workers=1, per_host=1)
+    gateway = RadioInternetGateway(fetch_pool=fetcher, reader_url=reader_url,
+                                   upstream_cache=UpstreamCache(os.path.join(cache_dir, "sequential"), fetcher=fetcher))
+    start = time.perf_counter()
+    for query in queries:
+        gateway.build_packet(query)
+    sequential = time.perf_counter() - start
+    print(f"تسلسلي: {sequential:.2f}s، اتصالات: {len(server.connections)}")
+
+    reset(server)
+    pool = FetchPool(max_workers=16, per_host=per_host)
+    gateway = RadioInternetGateway(fetch_pool=pool, reader_url=reader_url,
+                                   upstream_cache=UpstreamCache(os.path.join(cache_dir, "concurrent"), fetcher=pool))
+    start = time.perf_counter()
+    first = None
+    for query, packet, error in pool.iter_completed(gateway.build_packet, queries):
+        assert error is None
+        first = first or time.perf_counter() - start
+    concurrent = time.perf_counter() - start
+    print(f"متوازي: {concurrent:.2f}s (أول حزمة بعد {first:.2f}s)، تسريع {sequential / concurrent:.1f}x، "
+          f"أقصى تزامن على المضيف: {server.max_active} (الحد {per_host})، اتصالات: {len(server.connections)}")
+    pool.close()
+    server.shutdown()
+    shutil.rmtree(cache_dir)
+    return sequential, concurrent, server.max_active
+
+if __name__ == "__main__":
+    run_benchmark()
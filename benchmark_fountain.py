@@ -0,0 +1,111 @@
+import io
+import numpy as np
+from scipy.io import wavfile
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver
+from compression import load_corpus
+from packet_codec import encode_message, fountain_layout, PACKET_OVERHEAD, FOUNTAIN_HEADER_SIZE
+
+CHUNK = 4410  # 0.1 ثانية
+
+def render(transmitter, payload, num_repeats):
+    buffer = io.BytesIO()
+    transmitter.write_signal(payload, buffer, num_repeats=num_repeats)
+    return wavfile.read(io.BytesIO(buffer.getvalue()))[1]
+
+def time_to_decode(receiver, signal, sample_rate):
+    """ثواني الاستماع حتى تكتمل أول رسالة (أو None إذا لم تكتمل)."""
+    consumed = [0]
+
+    def chunks():
+        for start in range(0, len(signal), CHUNK):
+            consumed[0] = start + CHUNK
+            yield signal[start:start + CHUNK]
+
+    for message in receiver.decode_messages(chunks()):
+        return consumed[0] / sample_rate
+    return None
+
+def lossy_channel(signal, sample_rate, loss, rng, slot=0.25):
+    """قناة بخفوت متقطع: كل فترة slot ثانية تُمحى (صمت + ضوضاء) باحتمال loss."""
+    signal = signal.astype(np.float32) + rng.normal(0, 300, len(signal)).astype(np.float32)
+    slot_size = int(sample_rate * slot)
+    for start in range(0, len(signal), slot_size):
+        if rng.random() < loss:
+            signal[start:start + slot_size] = rng.normal(0, 300, len(signal[start:start + slot_size]))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def late_join(receiver, signal, sample_rate, cycle, loss, trials):
+    """(الوسيط، 90%، عدد من لم يفك) لـ trials مستمع ينضم كل منهم في لحظة عشوائية خلال أول cycle ثانية."""
+    rng = np.random.default_rng(1)
+    times = []
+    for trial in range(trials):
+        join = int(rng.uniform(0, cycle) * sample_rate)
+        heard = lossy_channel(signal[join:], sample_rate, loss, rng)
+        elapsed = time_to_decode(receiver, heard, sample_rate)
+        times.append(float("inf") if elapsed is None else elapsed)
+    median = float(np.median(times))
+    p90 = float(np.percentile(times, 90, method="nearest"))
+    failures = sum(1 for t in times if t == float("inf"))
+    return median, p90, failures
+
+def symbols(transmitter, payload):
+    """عدد رموز النافورة k لهذه الحمولة."""
+    fec = transmitter.fountain_fec
+    return fountain_layout(len(payload), fec.max_data - PACKET_OVERHEAD - FOUNTAIN_HEADER_SIZE)[0]
+
+def check_burst(receiver, size=20_000, num_repeats=4, trials=12, losses=(0.0, 0.1)):
+    """
+    طول الدفعة الافتراضي مقابل دفعة بطول k كاملة في حمولة كبيرة (دورة طويلة):
+    المنضم المتأخر يفقد بقية الدفعة التي انضم أثناءها، فالدفعات الأقصر يجب أن تقصر زمن الفك.
+    """
+    payload = encode_message("IMG", np.random.default_rng(0).bytes(size))
+    k = symbols(FFTTransmitter(carousel="fountain"), payload)
+    configs = {"repeat": FFTTransmitter(), f"burst={k}": FFTTransmitter(carousel="fountain", fountain_burst=k),
+               "default": FFTTransmitter(carousel="fountain")}
+    transmitter = configs["repeat"]
+    sample_rate = transmitter.sample_rate
+    cycle = transmitter.cycle_length(transmitter.cycle_segments(payload)) / sample_rate
+    print(f"--- الحمولة {len(payload)} بايت (k={k})، دورة التكرار {cycle:.1f}s، {num_repeats} دورات ---")
+    print(f"{'الفقد':>5} | {'Carousel':>9} | {'الوسيط':>7} | {'90%':>7} | {'لم يفك':>6}")
+    results = {}
+    for name, transmitter in configs.items():
+        signal = render(transmitter, payload, num_repeats)
+        for loss in losses:
+            results[(loss, name)] = late_join(receiver, signal, sample_rate, cycle, loss, trials)
+    for loss in losses:
+        for name in configs:
+            median, p90, failures = results[(loss, name)]
+            print(f"{loss:5.2f} | {name:>9} | {seconds(median)} | {seconds(p90)} | {failures:6d}")
+        assert results[(loss, "default")][0] < results[(loss, f"burst={k}")][0], \
+            f"الدفعة الافتراضية لم تقصر زمن فك المنضم المتأخر (الفقد {loss})"
+    return results
+
+def seconds(value):
+    return f"{value:6.1f}s" if value != float("inf") else f"{'∞':>7}"
+
+def run_benchmark(trials=24, num_repeats=16, losses=(0.0, 0.1, 0.2, 0.3)):
+    receiver = RadioReceiver()
+    page = load_corpus("test")[1][:3000]
+    payload = encode_message("WEB", page, meta="https://example.org/news")
+    signals = {}
+    for carousel in ("repeat", "fountain"):
+        transmitter = FFTTransmitter(carousel=carousel)
+        signals[carousel] = render(transmitter, payload, num_repeats)
+    sample_rate = transmitter.sample_rate
+    cycle = transmitter.cycle_length(transmitter.cycle_segments(payload)) / sample_rate
+    print(f"--- الحمولة {len(payload)} بايت، دورة التكرار {cycle:.1f}s، {num_repeats} دورة، {trials} مستمع لكل حالة ---")
+    # المستمع ينضم في لحظة عشوائية خلال أول دورة؛ "الوسيط" و"90%" يحسبان من لم يفك الرسالة حتى نهاية البث كـ ∞
+    print(f"{'الفقد':>5} | {'Carousel':>8} | {'الوسيط':>7} | {'90%':>7} | {'لم يفك':>6}")
+
+    results = {}
+    for loss in losses:
+        for carousel, signal in signals.items():
+            median, p90, failures = late_join(receiver, signal, sample_rate, cycle, loss, trials)
+            results[(loss, carousel)] = (median, p90, failures)
+            print(f"{loss:5.2f} | {carousel:>8} | {seconds(median)} | {seconds(p90)} | {failures:6d}")
+    results.update(check_burst(receiver))
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
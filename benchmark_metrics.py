@@ -0,0 +1,84 @@
+import io
+import os
+import tempfile
+import time
+import numpy as np
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver
+from metrics import METRICS
+
+# كلفة طبقة القياس (metrics.py): زمن المؤقت الواحد، وزمن التوليد وفك التشفير بدون قياس، مع القياس،
+# ومع المحلل (cProfile) مُشغّلاً، للتأكد من أن القياس الدائم في الإنتاج لا يبطئ المحطة.
+
+
+def set_mode(mode):
+    """off: بلا قياس، on: القياس الدائم، profile: القياس مع cProfile لكل مرحلة."""
+    METRICS.enabled = mode != "off"
+    if mode == "profile":
+        METRICS.start_profile()
+    elif METRICS.profiling:
+        METRICS.stop_profile()
+
+
+def best_of(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def timer_cost(calls=200_000):
+    """متوسط كلفة with METRICS.timer() + METRICS.count() بالميكروثانية."""
+    def run():
+        for _ in range(calls):
+            with METRICS.timer("benchmark"):
+                pass
+            METRICS.count("benchmark")
+    return best_of(run, 3) / calls * 1e6
+
+
+def run_benchmark(payload_size=20_000, num_repeats=3, repeats=7, seed=0):
+    payload = np.random.default_rng(seed).bytes(payload_size)
+    transmitter = FFTTransmitter()
+    receiver = RadioReceiver()
+    path = os.path.join(tempfile.mkdtemp(prefix="metrics_bench_"), "signal.wav")
+    transmitter.write_signal(payload, path, num_repeats=num_repeats)
+
+    def render():
+        transmitter.write_signal(payload, io.BytesIO(), num_repeats=num_repeats)
+
+    def decode():
+        assert receiver.decode_signal_bytes(path) == payload
+
+    print(f"--- حمولة {payload_size // 1000}KB × {num_repeats} دورات ---")
+    modes = ("off", "on", "profile")
+    results = {mode: {"render": [], "decode": []} for mode in modes}
+    enabled = METRICS.enabled
+    try:
+        # الأوضاع بالتناوب في كل جولة، فتغيّر حالة الجهاز أثناء القياس يصيبها كلها بالتساوي
+        for _ in range(repeats):
+            for mode in modes:
+                set_mode(mode)
+                results[mode]["render"].append(best_of(render, 1))
+                results[mode]["decode"].append(best_of(decode, 1))
+        print(f"{'الوضع':>10} | {'مؤقت µs':>8} | {'توليد':>7} | {'فك':>7}")
+        for mode in modes:
+            set_mode(mode)
+            results[mode] = {"timer_us": timer_cost(), "render": min(results[mode]["render"]),
+                             "decode": min(results[mode]["decode"])}
+            print(f"{mode:>10} | {results[mode]['timer_us']:8.2f} | {results[mode]['render']:6.3f}s | "
+                  f"{results[mode]['decode']:6.3f}s")
+    finally:
+        set_mode("off")
+        METRICS.enabled = enabled
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    for mode in ("on", "profile"):
+        print(f"الكلفة ({mode}): توليد {results[mode]['render'] / results['off']['render'] - 1:+.1%}، "
+              f"فك {results[mode]['decode'] / results['off']['decode'] - 1:+.1%}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
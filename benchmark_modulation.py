@@ -0,0 +1,33 @@
+import os
+import time
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver
+
+def measure(modulation, payload_size=6000, frame_duration=0.2):
+    """(مدة دورة البث بالثواني، البتات المفيدة في الثانية، هل نجح فك التشفير، زمن فك التشفير)."""
+    transmitter = FFTTransmitter(modulation=modulation)
+    receiver = RadioReceiver()
+    payload = os.urandom(payload_size)
+    cycle = transmitter.render_cycle(payload, frame_duration)
+    airtime = len(cycle) / transmitter.sample_rate
+
+    start = time.perf_counter()
+    packets = list(receiver.decode_stream([cycle]))
+    elapsed = time.perf_counter() - start
+    return airtime, payload_size * 8 / airtime, packets == [payload], elapsed
+
+def run_benchmark(payload_size=6000):
+    print(f"--- مقارنة أنواع التعديل: حمولة {payload_size} بايت بترميز rs، نفس النطاق 300Hz - 15kHz ---")
+    print(f"{'التعديل':>8} | {'مدة الدورة':>10} | {'بت/ثانية':>9} | {'النسبة':>6} | {'فك التشفير':>10}")
+    results = []
+    baseline = None
+    for modulation in ("ook", "qpsk", "qam16"):
+        airtime, bps, ok, elapsed = measure(modulation, payload_size)
+        baseline = baseline or bps
+        results.append((modulation, airtime, bps, ok))
+        status = f"{elapsed:.2f}s" if ok else "فشل"
+        print(f"{modulation:>8} | {airtime:9.2f}s | {bps:9.0f} | {bps / baseline:5.1f}x | {status:>10}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
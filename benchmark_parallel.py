@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver, iter_pcm_chunks
+from parallel_codec import ParallelCodec
+from render_cache import RenderCache
+
+# تسريع التوليد وفك التشفير وتوليد ردود البوابة حسب عدد العمليات (الأنوية)، مقارنة بالمسار المتتالي،
+# مع التحقق من أن النتيجة واحدة مهما كان عدد العمليات.
+
+
+def digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def best_of(func, repeats):
+    """أفضل زمن من repeats محاولة (ونتيجة آخرها)."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def render_many(codec, directory, transmitter, payloads, num_repeats):
+    """توليد كل الردود معاً (مخزن مؤقت جديد حتى لا تُعاد الملفات من محاولة سابقة)."""
+    shutil.rmtree(directory, ignore_errors=True)
+    cache = RenderCache(directory)
+    futures = [codec.submit_render(cache, transmitter, payload, num_repeats=num_repeats) for payload in payloads]
+    return [digest(future.result()) for future in futures]
+
+
+def render_sequential(directory, transmitter, payloads, num_repeats):
+    shutil.rmtree(directory, ignore_errors=True)
+    cache = RenderCache(directory)
+    return [digest(cache.render(transmitter, payload, num_repeats=num_repeats)) for payload in payloads]
+
+
+def run_benchmark(payload_size=100_000, num_repeats=10, responses=8, response_size=5_000, worker_counts=None,
+                  repeats=2, seed=0):
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+    rng = np.random.default_rng(seed)
+    payload = rng.bytes(payload_size)
+    response_payloads = [rng.bytes(response_size) for _ in range(responses)]
+    transmitter = FFTTransmitter()
+    receiver = RadioReceiver()
+    directory = tempfile.mkdtemp(prefix="parallel_bench_")
+    wav_path = os.path.join(directory, "signal.wav")
+    cache_dir = os.path.join(directory, "cache")
+
+    print(f"--- {cores} نواة متاحة؛ بث {payload_size // 1000}KB × {num_repeats} دورات، "
+          f"{responses} ردود للبوابة بحجم {response_size // 1000}KB × 3 دورات ---")
+    try:
+        render_seq, _ = best_of(lambda: transmitter.write_signal(payload, wav_path, num_repeats=num_repeats), repeats)
+        reference = digest(wav_path)
+        decode_seq, data = best_of(lambda: b"".join(receiver.decode_stream(iter_pcm_chunks(wav_path))), repeats)
+        assert data == payload * num_repeats
+        gateway_seq, gateway_reference = best_of(
+            lambda: render_sequential(cache_dir, transmitter, response_payloads, 3), repeats)
+        print(f"المتتالي: توليد {render_seq:.2f}s، فك {decode_seq:.2f}s، ردود البوابة {gateway_seq:.2f}s")
+
+        print(f"{'عمليات':>6} | {'توليد':>7} | {'تسريع':>5} | {'فك':>7} | {'تسريع':>5} | "
+              f"{'ردود':>7} | {'تسريع':>5} | مطابق")
+        results = []
+        decoded_reference = None
+        for workers in worker_counts:
+            with ParallelCodec(workers) as codec:
+                # تشغيل أولي: إنشاء العمليات واستيراد الوحدات فيها خارج القياس
+                transmitter.write_signal(payload[:1000], wav_path, num_repeats=1, parallel=codec)
+                render_time, _ = best_of(lambda: transmitter.write_signal(payload, wav_path, num_repeats=num_repeats,
+                                                                          parallel=codec), repeats)
+                same_render = digest(wav_path) == reference
+                decode_time, packets = best_of(lambda: list(codec.decode_packets(receiver, wav_path)), repeats)
+                decoded = [(packet, stats["failed"], stats["cycles"]) for packet, stats in packets]
+                decoded_reference = decoded_reference or decoded
+                same_decode = decoded == decoded_reference and b"".join(p for p, _, _ in decoded) == data
+                gateway_time, digests = best_of(
+                    lambda: render_many(codec, cache_dir, transmitter, response_payloads, 3), repeats)
+                same_gateway = digests == gateway_reference
+
+            identical = same_render and same_decode and same_gateway
+            results.append({"workers": workers, "render": render_time, "decode": decode_time,
+                            "gateway": gateway_time, "identical": identical})
+            print(f"{workers:6d} | {render_time:6.2f}s | {render_seq / render_time:4.2f}x | "
+                  f"{decode_time:6.2f}s | {decode_seq / decode_time:4.2f}x | "
+                  f"{gateway_time:6.2f}s | {gateway_seq / gateway_time:4.2f}x | {'نعم' if identical else 'لا'}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
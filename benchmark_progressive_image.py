@@ -0,0 +1,150 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+import time
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver, iter_pcm_chunks
+from packet_codec import Reassembler, encode_message
+from progressive_image import encode_layers, ProgressiveImageDecoder, LAYER_FORMAT, DEFAULT_IMAGE_BUDGET
+from radio_internet_gateway import RadioInternetGateway
+from broadcast_daemon import BroadcastDaemon, Feed
+from render_cache import RenderCache
+
+# صور الاستعلامات (img:): زمن ظهور أول معاينة، زمن اكتمال الصورة، والبايتات على الهواء،
+# مقارنة بـ JPEG الواحد الحالي (64×64 بجودة 20 لا يظهر منه شيء قبل آخر إطار).
+
+CHUNK = 4410
+
+
+def test_photo(width, height, seed=0, fmt="JPEG"):
+    """صورة اصطناعية تشبه الصور الفوتوغرافية (تدرجات، أشكال، ضجيج) بدلاً من الجلب من الإنترنت."""
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.linspace(0, 1, width), np.linspace(0, 1, height))
+    pixels = np.stack([128 + 100 * np.sin(6 * x + 3 * y), 128 + 90 * np.cos(20 * x * y), 100 + 80 * np.sin(9 * y)], -1)
+    pixels += rng.normal(0, 12, pixels.shape)
+    img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((width // 4, height // 4, width * 5 // 8, height * 3 // 4), fill=(220, 40, 40))
+    draw.rectangle((width * 11 // 16, height // 6, width * 15 // 16, height * 7 // 12), fill=(30, 60, 200))
+    output = io.BytesIO()
+    img.filter(ImageFilter.GaussianBlur(2)).save(output, format=fmt, quality=85)
+    return output.getvalue()
+
+
+def best_time(func, rounds=5):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def receive(transmitter, receiver, payload):
+    """
+    بث دورة واحدة من كل طبقة عبر المودم وفكها تدفقياً:
+    (ثواني الاستماع حتى أول صورة قابلة للعرض، حتى اكتمال الصورة، طول البث بالثواني).
+    """
+    signal = np.concatenate(list(transmitter.iter_signal_blocks(payload, num_repeats=1)))
+    reassembler = Reassembler()
+    images = ProgressiveImageDecoder()
+    first = last = None
+    consumed = [0]
+
+    def chunks():
+        for start in range(0, len(signal), CHUNK):
+            consumed[0] = min(start + CHUNK, len(signal))
+            yield signal[start:start + CHUNK]
+
+    for packet in receiver.decode_stream(chunks()):
+        for message in reassembler.feed(packet):
+            if message["type"] == "IMG":
+                first = last = consumed[0]
+                continue
+            update = images.feed(message)
+            if update is not None:
+                first = first or consumed[0]
+                if images.complete(update[0]):
+                    last = consumed[0]
+    sample_rate = transmitter.sample_rate
+    return first / sample_rate, last / sample_rate, len(signal) / sample_rate
+
+
+def image_size(payload):
+    """مقاس الصورة النهائية المبثوثة."""
+    messages = Reassembler().feed(payload if isinstance(payload, bytes) else b"".join(payload))
+    if messages[0]["type"] == "IMG":
+        return Image.open(io.BytesIO(messages[0]["data"])).size
+    return struct.unpack_from(LAYER_FORMAT, messages[0]["data"])[3:5]
+
+
+def check_layered_broadcast(content, budget=DEFAULT_IMAGE_BUDGET):
+    """
+    الطبقات (قائمة رسائل كما يعيدها build_packet للصور المتدرجة) تُبث عبر generate_signal وعبر BroadcastDaemon
+    مع بث نصي عادي، وكل الرسائل تُفك من الملف الناتج.
+    """
+    layers = encode_layers(content, budget)
+    directory = tempfile.mkdtemp(prefix="layers_check_")
+    try:
+        transmitter = FFTTransmitter()
+        receiver = RadioReceiver()
+        path = transmitter.generate_signal(layers, os.path.join(directory, "layers.wav"), num_repeats=1)
+        assert b"".join(receiver.decode_stream(iter_pcm_chunks(path))) == b"".join(layers)
+
+        news = Feed("news", lambda: encode_message("TXT", "weather: +25C"), 60, delta=False)
+        image = Feed("image", lambda: layers, 60, delta=False)
+        daemon = BroadcastDaemon([news, image], output=os.path.join(directory, "live.wav"), num_repeats=1,
+                                 transmitter=transmitter, render_cache=RenderCache(os.path.join(directory, "cache")))
+        cycles = []
+        daemon.sink = cycles.append
+        # البثان يُجلبان معاً في الخلفية: قد تُذاع دورة الخبر وحده قبل وصول الطبقات
+        deadline = time.monotonic() + 60
+        while not (cycles and isinstance(cycles[-1].program, list)) and time.monotonic() < deadline:
+            daemon.run(cycles=1)
+            time.sleep(0.01)
+        daemon.stop()
+        assert news.errors == image.errors == 0
+        decoded = list(receiver.decode_stream(iter_pcm_chunks(cycles[-1].path)))
+        # الرسائل العادية في الدورة الأولى، ثم كل طبقة في دورتها
+        assert decoded == [news.packet] + list(layers)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return len(layers)
+
+
+def run_benchmark(budgets=(600, 1024, 2048), bands=(1, 2),
+                  sources=((1600, 1200, "JPEG"), (4000, 3000, "JPEG"), (800, 600, "PNG"))):
+    transmitter = FFTTransmitter()
+    receiver = RadioReceiver()
+    gateway = RadioInternetGateway()
+    print("--- صور الاستعلامات: JPEG واحد (IMG) مقابل طبقات متدرجة (IML) بميزانيات مختلفة، دورة واحدة لكل طبقة ---")
+    # IML الميزانية/عدد الأشرطة
+    print(f"{'المصدر':>14} | {'الوضع':>11} | {'المقاس':>7} | {'بايتات':>6} | {'ترميز ms':>8} | {'أول معاينة':>10} | "
+          f"{'اكتمال':>7} | {'البث':>6}")
+    results = []
+    for width, height, fmt in sources:
+        content = test_photo(width, height, fmt=fmt)
+        label = f"{width}x{height} {fmt}"
+        modes = [("IMG 64 q20", lambda: encode_message("IMG", gateway._shrink_image(content, (64, 64))))]
+        modes += [(f"IML {budget}/{count}", lambda budget=budget, count=count: encode_layers(content, budget, count))
+                  for count in bands for budget in budgets]
+        for name, encode in modes:
+            payload = encode()
+            encode_ms = best_time(encode) * 1000
+            size = len(payload) if isinstance(payload, bytes) else sum(map(len, payload))
+            first, complete, on_air = receive(transmitter, receiver, payload)
+            width, height = image_size(payload)
+            results.append({"source": label, "mode": name, "size": (width, height), "bytes": size,
+                            "encode_ms": encode_ms, "first_preview": first, "complete": complete, "on_air": on_air})
+            print(f"{label:>14} | {name:>11} | {f'{width}x{height}':>7} | {size:6d} | {encode_ms:8.1f} | {first:9.2f}s | "
+                  f"{complete:6.2f}s | {on_air:5.2f}s")
+    count = check_layered_broadcast(test_photo(*sources[0][:2], fmt=sources[0][2]))
+    print(f"بث الطبقات عبر generate_signal و BroadcastDaemon: {count} طبقات فُكت كلها")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
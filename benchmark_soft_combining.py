@@ -0,0 +1,79 @@
+import io
+import numpy as np
+from scipy.io import wavfile
+from scipy.signal import lfilter
+from advanced_fft_transmitter import FFTTransmitter
+from advanced_radio_receiver import RadioReceiver
+from compression import load_corpus
+from packet_codec import encode_message
+
+CHUNK = 4410  # 0.1 ثانية
+
+def render(transmitter, payload, num_repeats):
+    buffer = io.BytesIO()
+    transmitter.write_signal(payload, buffer, num_repeats=num_repeats)
+    return wavfile.read(io.BytesIO(buffer.getvalue()))[1]
+
+def noisy_channel(signal, noise, rng, tilt=0.0):
+    """
+    قناة صوتية: استجابة ترددية مائلة (tilt: مرشح تمرير منخفض بسيط، الترددات العالية أضعف
+    كما في سماعة رخيصة أو ميكروفون بعيد) ثم ضجيج أبيض بانحراف معياري noise (بوحدات int16).
+    """
+    signal = signal.astype(np.float64)
+    if tilt:
+        signal = lfilter([1 - tilt], [1, -tilt], signal)
+    signal = signal + rng.normal(0, noise, len(signal))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def decode(receiver, signal, sample_rate):
+    """(ثواني الاستماع حتى تكتمل أول رسالة أو None، ثقة الحزمة الأخيرة، عدد الدورات المجمعة)."""
+    consumed = [0]
+
+    def chunks():
+        for start in range(0, len(signal), CHUNK):
+            consumed[0] = start + CHUNK
+            yield signal[start:start + CHUNK]
+
+    for message in receiver.decode_messages(chunks()):
+        stats = receiver.last_packet_stats
+        return consumed[0] / sample_rate, stats["confidence"], stats["cycles"]
+    return None, 0.0, 0
+
+def run_benchmark(trials=6, num_repeats=8, noises=(300, 600, 900, 1200), tilts=(0.0, 0.5)):
+    transmitter = FFTTransmitter()
+    page = load_corpus("test")[1][:1500]
+    payload = encode_message("WEB", page, meta="https://example.org/news")
+    signal = render(transmitter, payload, num_repeats)
+    sample_rate = transmitter.sample_rate
+    cycle = transmitter.cycle_length(transmitter.cycle_segments(payload)) / sample_rate
+    receivers = {"hard": RadioReceiver(soft_decisions=False), "soft": RadioReceiver()}
+    rms = np.sqrt(np.mean(signal.astype(np.float64) ** 2))
+    print(f"--- الحمولة {len(payload)} بايت، دورة {cycle:.1f}s، {num_repeats} دورات، {trials} مستمع لكل حالة، "
+          f"RMS الإشارة {rms:.0f} ---")
+    # "دورات" = متوسط عدد الدورات التي احتاجها المستمع الناجح (= أقل num_repeats يكفيه)؛
+    # "الثقة" و"مجمعة" للحزمة التي أكملت الرسالة
+    print(f"{'الميل':>5} | {'الضجيج':>6} | {'القرار':>5} | {'نجاح':>6} | {'دورات':>5} | {'الثقة':>5} | {'مجمعة':>5}")
+
+    results = {}
+    for tilt in tilts:
+        for noise in noises:
+            for name, receiver in receivers.items():
+                rng = np.random.default_rng(1)
+                times, confidences, combined = [], [], []
+                for _ in range(trials):
+                    heard = noisy_channel(signal, noise, rng, tilt)
+                    elapsed, conf, cycles = decode(receiver, heard, sample_rate)
+                    if elapsed is not None:
+                        times.append(elapsed)
+                        confidences.append(conf)
+                        combined.append(cycles)
+                success = len(times) / trials
+                mean_cycles = np.mean(times) / cycle if times else float("nan")
+                results[(tilt, noise, name)] = (success, mean_cycles)
+                print(f"{tilt:5.1f} | {noise:6d} | {name:>5} | {success:6.0%} | {mean_cycles:5.1f} | "
+                      f"{np.mean(confidences) if confidences else 0:5.2f} | "
+                      f"{np.mean(combined) if combined else 0:5.1f}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,277 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+
+# مجموعة قياس أداء المسارات الساخنة (الترميز، التوليد، التحليل، فك التشفير، الضغط) عبر أحجام الحمولة
+# وأعداد القنوات. كل حالة تعمل في عملية جديدة، فذروة الذاكرة (Peak RSS) تخصها وحدها،
+# والنتائج تُكتب JSON ويمكن مقارنتها بخط أساس محفوظ لكشف التراجع في الأداء.
+
+RESULTS_FILE = "benchmark_results.json"
+BASELINE_FILE = "benchmark_baseline.json"
+
+SIZES = (100, 1000, 10000, 100000, 1000000)
+CHANNELS = (64, 256, 1000, 4096)
+QUICK_SIZES = (100, 1000, 10000)
+QUICK_CHANNELS = (64, 256, 1000)
+DEFAULT_CHANNELS = 1000
+CHANNEL_SWEEP_SIZE = 10000
+
+FRAME_DURATION = 0.2
+# generate_frame و analyze_frame تعمل على إطار واحد: نقيس أول MAX_FRAMES إطار من الحمولة فقط
+MAX_FRAMES = 256
+
+# الحالات وما تعتمد عليه: "size" = تُقاس عبر أحجام الحمولة، "channels" = وعبر أعداد القنوات أيضاً
+CASES = {
+    "text_to_bits": ("size",),
+    "generate_frame": ("size", "channels"),
+    "generate_signal": ("size", "channels"),
+    "analyze_frame": ("size", "channels"),
+    "decode_signal": ("size", "channels"),
+    "compress_text": ("size",),
+    "compress_image": ("size",),
+    "build_packet": ("size",),
+}
+
+
+def peak_rss_mb():
+    """ذروة الذاكرة المقيمة لهذه العملية (ru_maxrss بالكيلوبايت في Linux وبالبايت في macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def sample_text(size):
+    """نص بطول size بايت من صفحات corpus (مكرر عند الحاجة)."""
+    from compression import load_corpus
+    page = b"\n".join(load_corpus("test"))
+    data = (page * (size // len(page) + 1))[:size]
+    return data.decode('utf-8', errors='ignore')
+
+
+def sample_image(size):
+    """صورة PNG مربعة بيانات RGB الخام فيها ≈ size بايت (تدرج + ضجيج، لتشبه صورة حقيقية)."""
+    from PIL import Image
+    side = max(8, int((size / 3) ** 0.5))
+    rng = np.random.default_rng(0)
+    ramp = np.linspace(0, 200, side, dtype=np.float32)
+    pixels = ramp[:, np.newaxis, np.newaxis] + ramp[np.newaxis, :, np.newaxis] / 2 + rng.normal(0, 20, (side, side, 3))
+    output = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def setup_case(case, size, channels, directory):
+    """تجهيز المدخلات (خارج التوقيت). تعيد (الدالة المقاسة، العينات الصوتية لكل استدعاء، البتات لكل استدعاء، التحقق)."""
+    from advanced_fft_transmitter import FFTTransmitter
+    transmitter = FFTTransmitter(num_channels=channels)
+    text = sample_text(size)
+    expected = " ".join(text.split())
+    frame_size = int(transmitter.sample_rate * FRAME_DURATION)
+
+    if case == "text_to_bits":
+        return lambda: transmitter.text_to_bits(text), None, size * 8, None
+
+    if case in ("generate_frame", "analyze_frame"):
+        rows = transmitter.bits_to_frames(transmitter.payload_to_bits(text, FRAME_DURATION))[:MAX_FRAMES]
+        if case == "generate_frame":
+            return (lambda: [transmitter.generate_frame(row, FRAME_DURATION) for row in rows],
+                    len(rows) * frame_size, rows.size, None)
+        from advanced_radio_receiver import RadioReceiver
+        receiver = RadioReceiver(num_channels=channels)
+        frames = transmitter.generate_frames(rows, FRAME_DURATION)
+        check = lambda: [receiver.analyze_frame(frame) for frame in frames] == \
+            ["".join(map(str, row)) for row in rows]
+        return (lambda: [receiver.analyze_frame(frame) for frame in frames],
+                len(rows) * frame_size, rows.size, check)
+
+    if case == "generate_signal":
+        filename = os.path.join(directory, "signal.wav")
+        samples = transmitter.signal_length(text, FRAME_DURATION, num_repeats=1)
+        return (lambda: transmitter.generate_signal(text, filename, FRAME_DURATION, num_repeats=1),
+                samples, size * 8, None)
+
+    if case == "decode_signal":
+        from advanced_radio_receiver import RadioReceiver
+        receiver = RadioReceiver(num_channels=channels)
+        filename = os.path.join(directory, "signal.wav")
+        transmitter.generate_signal(text, filename, FRAME_DURATION, num_repeats=1)
+        samples = transmitter.signal_length(text, FRAME_DURATION, num_repeats=1)
+        return (lambda: receiver.decode_signal(filename), samples, size * 8,
+                lambda: expected in (receiver.decode_signal(filename) or ""))
+
+    from radio_internet_gateway import RadioInternetGateway
+    gateway = RadioInternetGateway()
+    if case == "compress_text":
+        compressed = gateway.compress_text(text)
+        return (lambda: gateway.compress_text(text), None, size * 8,
+                lambda: gateway.compressor.decompress(compressed) == text.encode('utf-8'))
+    if case == "compress_image":
+        image = sample_image(size)
+        return lambda: gateway._shrink_image(image, (64, 64)), None, len(image) * 8, None
+    if case == "build_packet":
+        # المسار الكامل لصفحة جُلبت: ضغط النص ثم حزمة packet_codec (بدون شبكة)
+        return (lambda: gateway.prepare_broadcast_packet("WEB", gateway.compress_text(text), gateway.compressor.codec_id),
+                None, size * 8, None)
+    raise ValueError(f"unknown case: {case}")
+
+
+def run_case(case, size, channels, min_time=1.0, max_repeats=5, min_batch_time=0.05):
+    """
+    قياس حالة واحدة (تُستدعى في عملية جديدة): الاستدعاءات السريعة تُجمع في دفعات (مثل timeit) حتى تستغرق
+    الدفعة min_batch_time على الأقل، ثم أفضل زمن دفعة من عدة تكرارات حتى min_time ثانية، مقسوماً على حجمها.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as directory, \
+            contextlib.redirect_stdout(io.StringIO()):
+        function, samples, bits, check = setup_case(case, size, channels, directory)
+        rss_before = peak_rss_mb()
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_batch_time:
+                break
+            number *= 10 if elapsed < min_batch_time / 10 else 2
+        times = [elapsed]
+        while sum(times) < min_time and len(times) < max_repeats:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            times.append(time.perf_counter() - start)
+        peak = peak_rss_mb()
+        ok = check() if check is not None else None
+
+    seconds = min(times) / number
+    return {
+        "case": case,
+        "size": size,
+        "channels": channels,
+        "seconds": seconds,
+        "calls": number * len(times),
+        "samples_per_second": samples / seconds if samples else None,
+        "bits_per_second": bits / seconds,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - rss_before,
+        "ok": ok,
+    }
+
+
+def case_grid(cases, sizes, channels):
+    """(الحالة، الحجم، القنوات): كل الأحجام بالقنوات الافتراضية، ثم كل أعداد القنوات بحجم ثابت."""
+    grid = []
+    for case in cases:
+        grid += [(case, size, DEFAULT_CHANNELS) for size in sizes]
+        if "channels" in CASES[case]:
+            grid += [(case, CHANNEL_SWEEP_SIZE, count) for count in channels
+                     if (case, CHANNEL_SWEEP_SIZE, count) not in grid]
+    return grid
+
+
+def metadata():
+    commit = None
+    with contextlib.suppress(Exception):
+        import subprocess
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def result_key(result):
+    return result["case"], result["size"], result["channels"]
+
+
+def compare(results, baseline, tolerance=0.2, rss_tolerance=0.2):
+    """
+    مقارنة النتائج بخط الأساس: تراجع = زمن أبطأ من الأساس بأكثر من tolerance،
+    أو ذروة ذاكرة أعلى بأكثر من rss_tolerance، أو تحقق كان ينجح وأصبح يفشل.
+    """
+    base = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"--- مقارنة بخط الأساس ({baseline['meta'].get('commit')}، {baseline['meta'].get('timestamp')}) ---")
+    print(f"{'الحالة':>16} | {'الحجم':>8} | {'القنوات':>7} | {'الزمن':>7} | {'الذاكرة':>7} | الحكم")
+    for result in results:
+        old = base.get(result_key(result))
+        if old is None:
+            continue
+        speed = result["seconds"] / old["seconds"]
+        memory = result["peak_rss_mb"] / old["peak_rss_mb"]
+        problems = []
+        if speed > 1 + tolerance:
+            problems.append("أبطأ")
+        if memory > 1 + rss_tolerance:
+            problems.append("ذاكرة")
+        if old["ok"] and result["ok"] is False:
+            problems.append("فشل التحقق")
+        if problems:
+            regressions.append((result_key(result), problems))
+        verdict = "تراجع: " + "، ".join(problems) if problems else ("أسرع" if speed < 1 - tolerance else "ok")
+        print(f"{result['case']:>16} | {result['size']:8d} | {result['channels']:7d} | {speed:6.2f}x | "
+              f"{memory:6.2f}x | {verdict}")
+    return regressions
+
+
+def run_benchmark(cases=tuple(CASES), sizes=SIZES, channels=CHANNELS, output=RESULTS_FILE,
+                  baseline=None, save_baseline=False, tolerance=0.2, rss_tolerance=0.2):
+    grid = case_grid(cases, sizes, channels)
+    print(f"--- {len(grid)} حالة، كل حالة في عملية جديدة (spawn) ---")
+    print(f"{'الحالة':>16} | {'الحجم':>8} | {'القنوات':>7} | {'الزمن':>10} | {'عينة/ثانية':>11} | "
+          f"{'بت/ثانية':>11} | {'RSS':>7} | تحقق")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for case, size, count in grid:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case, size, count))
+        results.append(result)
+        samples = f"{result['samples_per_second']:11.3g}" if result["samples_per_second"] else f"{'-':>11}"
+        ok = {True: "✓", False: "✗", None: "-"}[result["ok"]]
+        print(f"{case:>16} | {size:8d} | {count:7d} | {result['seconds']:9.3g}s | {samples} | "
+              f"{result['bits_per_second']:11.3g} | {result['peak_rss_mb']:5.0f}MB | {ok}")
+
+    report = {"meta": metadata(), "results": results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"النتائج: {output}")
+
+    regressions = []
+    if baseline and os.path.exists(baseline) and not save_baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance, rss_tolerance)
+        print(f"تراجعات: {len(regressions)}")
+    if save_baseline:
+        with open(baseline or BASELINE_FILE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"خط الأساس: {baseline or BASELINE_FILE}")
+    return results, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and memory benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="small sizes/channel counts only")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.2, help="allowed peak RSS growth")
+    args = parser.parse_args()
+    _, found = run_benchmark(args.cases, QUICK_SIZES if args.quick else SIZES,
+                             QUICK_CHANNELS if args.quick else CHANNELS, args.output, args.baseline,
+                             args.save_baseline, args.tolerance, args.rss_tolerance)
+    sys.exit(1 if found else 0)
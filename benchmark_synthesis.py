@@ -0,0 +1,62 @@
+import time
+import numpy as np
+from advanced_fft_transmitter import FFTTransmitter, SYNTH_TOLERANCE
+
+def legacy_generate_frame(transmitter, bits, duration):
+    """الطريقة القديمة: حلقة np.sin لكل قناة نشطة (للمقارنة فقط)."""
+    t = np.linspace(0, duration, int(transmitter.sample_rate * duration), endpoint=False)
+    signal = np.zeros_like(t)
+    for i, bit in enumerate(bits[:transmitter.num_channels]):
+        if bit == '1':
+            signal += np.sin(2 * np.pi * transmitter.frequencies[i] * t)
+    if np.max(np.abs(signal)) > 0:
+        signal = signal / np.max(np.abs(signal))
+    return signal
+
+def random_frames(num_frames, num_channels, seed=0):
+    rng = np.random.default_rng(seed)
+    bits = rng.integers(0, 2, size=(num_frames, num_channels))
+    return ["".join("1" if b else "0" for b in row) for row in bits]
+
+def run_benchmark(num_frames=50, num_channels=1000, duration=0.2):
+    print(f"--- قياس سرعة توليد الإطارات: {num_frames} إطار × {num_channels} قناة × {duration} ثانية ---")
+    transmitter = FFTTransmitter(num_channels=num_channels)
+    frames = random_frames(num_frames, num_channels)
+
+    # 1. الطريقة القديمة
+    start = time.perf_counter()
+    legacy = [legacy_generate_frame(transmitter, bits, duration) for bits in frames]
+    legacy_time = time.perf_counter() - start
+
+    # 2. بنك النغمات (أول استدعاء يشمل بناء البنك)
+    start = time.perf_counter()
+    transmitter.tone_bank(duration)
+    bank_time = time.perf_counter() - start
+
+    # 3. إطار بإطار عبر generate_frame
+    start = time.perf_counter()
+    single = [transmitter.generate_frame(bits, duration=duration) for bits in frames]
+    single_time = time.perf_counter() - start
+
+    # 4. كل الإطارات دفعة واحدة (مصفوفة ثنائية الأبعاد)
+    start = time.perf_counter()
+    batch = transmitter.generate_frames(frames, duration=duration)
+    batch_time = time.perf_counter() - start
+
+    max_error = max(np.max(np.abs(batch - np.array(legacy))),
+                    np.max(np.abs(np.array(single) - np.array(legacy))))
+
+    print(f"الطريقة القديمة (حلقة):      {num_frames / legacy_time:10.1f} إطار/ثانية")
+    print(f"بناء بنك النغمات (مرة واحدة): {bank_time * 1000:10.1f} ms")
+    print(f"generate_frame (إطار بإطار): {num_frames / single_time:10.1f} إطار/ثانية")
+    print(f"generate_frames (دفعة):      {num_frames / batch_time:10.1f} إطار/ثانية")
+    print(f"أقصى فرق عن الطريقة القديمة: {max_error:.2e} (المسموح {SYNTH_TOLERANCE:.0e})")
+
+    if max_error <= SYNTH_TOLERANCE:
+        print("✅ الإشارة مطابقة للطريقة القديمة ضمن الحد المسموح.")
+    else:
+        print("⚠️ الفرق أكبر من الحد المسموح!")
+    return max_error <= SYNTH_TOLERANCE
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,101 @@
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from compression import load_corpus
+from fetch_pool import FetchPool
+from radio_internet_gateway import RadioInternetGateway
+from upstream_cache import UpstreamCache
+
+class RevalidatingHandler(BaseHTTPRequestHandler):
+    """خادم بديل لخدمة r.jina.ai يرسل ETag و Cache-Control، ويرد 304 إذا لم تتغير الصفحة (أو 503 عند التعطل)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.delay)
+        if server.down:
+            self._reply(503, b"")
+            return
+        body = server.pages[int(hashlib.md5(self.path.encode()).hexdigest(), 16) % len(server.pages)]
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", etag)
+        else:
+            self._reply(200, body, etag)
+
+    def _reply(self, status, body, etag=None):
+        server = self.server
+        with server.lock:
+            server.counts[status] = server.counts.get(status, 0) + 1
+            server.bytes_sent += len(body)
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={server.max_age}")
+        self.send_header("Content-Type", "text/markdown; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(delay, max_age):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RevalidatingHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.max_age = max_age
+    server.down = False
+    server.pages = load_corpus("train")
+    server.lock = threading.Lock()
+    server.counts = {}
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_cycle(gateway, server, queries, label):
+    server.counts = {}
+    server.bytes_sent = 0
+    start = time.perf_counter()
+    packets = [packet for _, packet, _ in gateway.fetcher.iter_completed(gateway.build_packet, queries)]
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10} | {elapsed:6.2f}s | {str(dict(sorted(server.counts.items()))):>16} | "
+          f"{server.bytes_sent:8d} | {gateway.upstream_cache.stats()}")
+    return elapsed, sorted(packets)
+
+def run_benchmark(num_queries=24, delay=0.2, max_age=1):
+    """
+    عدة دورات بث لنفس الطلبات (كما تفعل البوتات كل بضع دقائق):
+    بدون تخزين → مع تخزين صالح → بعد انتهاء الصلاحية (304) → المصدر معطل (نسخة قديمة).
+    """
+    server = start_server(delay, max_age)
+    reader_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    queries = [f"https://example.org/page_{i}" for i in range(num_queries)]
+    cache_dir = tempfile.mkdtemp()
+    pool = FetchPool(max_workers=8, per_host=8)
+    gateway = RadioInternetGateway(fetch_pool=pool, reader_url=reader_url,
+                                   upstream_cache=UpstreamCache(cache_dir, fetcher=pool, ttl_overrides={}))
+    print(f"--- {num_queries} طلب، تأخير {delay * 1000:.0f}ms، max-age={max_age}s ---")
+    print(f"{'الدورة':>10} | {'الزمن':>7} | {'ردود الخادم':>16} | {'البايتات':>8} | إحصائيات التخزين")
+
+    cold, reference = run_cycle(gateway, server, queries, "cold")
+    fresh, packets = run_cycle(gateway, server, queries, "fresh")
+    assert packets == reference
+    time.sleep(max_age + 0.1)
+    revalidated, packets = run_cycle(gateway, server, queries, "304")
+    assert packets == reference
+    time.sleep(max_age + 0.1)
+    server.down = True
+    stale, packets = run_cycle(gateway, server, queries, "stale")
+    assert packets == reference
+
+    pool.close()
+    server.shutdown()
+    shutil.rmtree(cache_dir)
+    return cold, fresh, revalidated, stale
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,249 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from delta_codec import DeltaEncoder
+from metrics import METRICS
+
+# خدمة بث مقيمة: عملية واحدة تبقى تعمل بدلاً من تشغيل auto_broadcast_generator كعملية جديدة في كل دورة.
+# جهاز الإرسال (وجداول النغمات المخزنة فيه) والتخزين المؤقت للصوت والمصادر تبقى جاهزة في الذاكرة،
+# وكل بث (Feed) يُجلب ويُرمّز على فترته الخاصة في الخلفية بينما تُذاع الدورة الحالية.
+# الاستيرادات الثقيلة (NumPy/SciPy عبر جهاز الإرسال) تتم عند start() فقط، فالبرامج تبدأ فوراً.
+
+# دورة جاهزة للإذاعة: الحمولة المجمعة لكل البثوث، مسار ملف WAV المولد، مدته بالثواني، ووقت توليدها
+Cycle = namedtuple("Cycle", "program path duration rendered_at")
+
+
+class Feed:
+    """
+    بث دوري: fetch دالة تعيد الحمولة (نص أو بايتات)، و interval فترة التحديث بالثواني.
+    delta=True: تُبث الحمولة كفروقات (DeltaEncoder، يمكن تمرير encoder جاهز)؛
+    delta=False: الحمولة رسالة packet_codec جاهزة (مثل build_packet في البوابة) تُبث كما هي،
+    أو قائمة رسائل (طبقات صورة متدرجة) تُبث كل منها في دورة مستقلة.
+    """
+    def __init__(self, name, fetch, interval, delta=True, encoder=None, state_path=None):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.encoder = encoder or (DeltaEncoder(name, state_path=state_path) if delta else None)
+        self.packet = None        # آخر رسالة جاهزة للبث (أو tuple رسائل الطبقات)
+        self.next_run = 0.0       # موعد الجلب التالي (ساعة monotonic)
+        self.running = False
+        self.runs = 0
+        self.errors = 0
+        self.last_error = None
+
+    def refresh(self):
+        """جلب الحمولة وترميزها. يعيد True إذا تغيرت الرسالة المبثوثة."""
+        payload = self.fetch()
+        if self.encoder is not None:
+            with METRICS.timer("compress"):
+                packet = self.encoder.encode(payload)
+            METRICS.compression("delta", len(payload.encode('utf-8') if isinstance(payload, str) else payload),
+                                len(packet))
+        elif isinstance(payload, (list, tuple)):
+            packet = tuple(bytes(layer) for layer in payload)
+        else:
+            packet = payload.encode('utf-8') if isinstance(payload, str) else bytes(payload)
+        self.runs += 1
+        changed = packet != self.packet
+        self.packet = packet
+        return changed
+
+
+class BroadcastDaemon:
+    """
+    مُجدول البث وحلقة الإذاعة:
+    - خيط الجدولة يشغّل refresh لكل بث حان موعده على مجمع خيوط (بث بطيء لا يؤخر البقية).
+    - أي تغيير في رسالة بث يُطلق توليد دورة جديدة (كل الرسائل متتالية في Carousel واحد) في الخلفية.
+    - تخزين مزدوج (Double Buffering): الدورة الحالية (front) تُذاع بينما تُولَّد التالية (back)؛
+      عند نهاية الدورة الحالية تُبدَّل إذا كانت التالية جاهزة، وإلا تُعاد الحالية (Carousel لا يتوقف).
+    sink: دالة تذيع الدورة وتعود عند انتهائها؛ الافتراضية play_file تنشر الملف باسم output
+    (نشر ذري، فقارئ مثل ffmpeg يكمل النسخة القديمة) ثم تنتظر مدة الدورة.
+    """
+    def __init__(self, feeds, output="live_broadcast.wav", num_repeats=5, frame_duration=0.2,
+                 transmitter=None, render_cache=None, sink=None, workers=4, clock=time.monotonic):
+        self.feeds = list(feeds)
+        self.output = output
+        self.num_repeats = num_repeats
+        self.frame_duration = frame_duration
+        self.transmitter = transmitter
+        self.render_cache = render_cache
+        self.sink = sink or self.play_file
+        self.workers = workers
+        self.clock = clock
+
+        self.front = None
+        self.back = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._rendering = False
+        self._dirty = False
+        self._published = None
+        self._executor = None
+        self._scheduler = None
+        self.counters = {"renders": 0, "render_seconds": 0.0, "cycles": 0, "swaps": 0, "late": 0}
+
+    def start(self):
+        """تحميل جهاز الإرسال والتخزين المؤقت (الاستيرادات الثقيلة هنا) وبدء خيط الجدولة."""
+        if self.transmitter is None:
+            from advanced_fft_transmitter import FFTTransmitter
+            self.transmitter = FFTTransmitter()
+        if self.render_cache is None:
+            from render_cache import RenderCache
+            self.render_cache = RenderCache()
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._scheduler = threading.Thread(target=self._schedule_loop, name="broadcast-scheduler", daemon=True)
+        self._scheduler.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        self._ready.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def run(self, cycles=None):
+        """إذاعة الدورات بلا توقف (أو cycles دورة). تُستدعى من الخيط الرئيسي."""
+        if self._scheduler is None:
+            self.start()
+        played = 0
+        while not self._stopped.is_set() and (cycles is None or played < cycles):
+            cycle = self.next_cycle()
+            if cycle is None:
+                break
+            self.sink(cycle)
+            played += 1
+
+    def next_cycle(self):
+        """الدورة التالية للإذاعة: التالية إذا كانت جاهزة، وإلا إعادة الحالية. تنتظر أول دورة عند البداية."""
+        while not self._stopped.is_set():
+            with self._lock:
+                if self.back is not None:
+                    if self.front is None or self.back.program != self.front.program:
+                        self.counters["swaps"] += 1
+                    if self.front is not None:
+                        self.render_cache.unpin(self.front.path)
+                    self.front, self.back = self.back, None
+                elif self._rendering and self.front is not None:
+                    # الدورة التالية لم تكتمل قبل نهاية الحالية: تُعاد الحالية
+                    self.counters["late"] += 1
+                if self.front is not None:
+                    self.counters["cycles"] += 1
+                    return self.front
+                self._ready.clear()
+            self._ready.wait()
+        return None
+
+    def play_file(self, cycle):
+        """الإذاعة الافتراضية: نشر الدورة باسم output (إذا تغيرت) ثم الانتظار حتى نهايتها."""
+        if self._published != cycle.path:
+            self.render_cache.materialize(cycle.path, self.output)
+            self._published = cycle.path
+            print(f"[{time.ctime()}] On air: {self.output} ({cycle.duration:.1f}s)")
+        self._stopped.wait(cycle.duration)
+
+    def stats(self):
+        """عدادات التوليد والإذاعة، وحالة كل بث."""
+        with self._lock:
+            stats = dict(self.counters)
+        stats["feeds"] = {feed.name: {"runs": feed.runs, "errors": feed.errors, "last_error": feed.last_error}
+                          for feed in self.feeds}
+        return stats
+
+    def _schedule_loop(self):
+        while not self._stopped.is_set():
+            now = self.clock()
+            for feed in self.feeds:
+                if not feed.running and feed.next_run <= now:
+                    feed.running = True
+                    self._executor.submit(self._refresh, feed)
+            waiting = [feed.next_run for feed in self.feeds if not feed.running]
+            timeout = max(0.0, min(waiting) - self.clock()) if waiting else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _refresh(self, feed):
+        try:
+            changed = feed.refresh()
+        except Exception as e:
+            # خطأ في مصدر واحد: تبقى آخر رسالة ناجحة على الهواء
+            feed.errors += 1
+            feed.last_error = str(e)
+            print(f"[{time.ctime()}] Feed {feed.name} failed: {e}")
+            changed = False
+        finally:
+            feed.next_run = self.clock() + feed.interval
+            feed.running = False
+            self._wake.set()
+        if changed:
+            self._render_pending()
+
+    def _render_pending(self):
+        """توليد الدورة التالية. التحديثات التي تصل أثناء التوليد تُجمع في توليد واحد بعده."""
+        with self._lock:
+            self._dirty = True
+            if self._rendering:
+                return
+            self._rendering = True
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._rendering = False
+                    return
+                self._dirty = False
+            try:
+                cycle = self._render()
+            except Exception as e:
+                # تبقى الدورة الحالية على الهواء حتى ينجح التوليد مع التحديث التالي
+                print(f"[{time.ctime()}] Render failed: {e}")
+                with self._lock:
+                    self._rendering = False
+                return
+            with self._lock:
+                if self.back is not None:
+                    # دورة لم تُذع قط حلت محلها أحدث منها
+                    self.render_cache.unpin(self.back.path)
+                self.back = cycle
+            self._ready.set()
+
+    def program(self):
+        """
+        حمولة الدورة: رسائل كل البثوث متتالية في دورة واحدة. إذا كان لبث طبقات (tuple)
+        تصبح الحمولة قائمة دورات: الرسائل العادية أولاً ثم كل طبقة في دورة مستقلة.
+        """
+        packets = [feed.packet for feed in self.feeds if feed.packet is not None]
+        program = b"".join(packet for packet in packets if isinstance(packet, bytes))
+        layers = [layer for packet in packets if isinstance(packet, tuple) for layer in packet]
+        if not layers:
+            return program
+        return ([program] if program else []) + layers
+
+    def _render(self):
+        """
+        توليد دورة من آخر رسائل البثوث. ملفها يبقى مثبتاً في التخزين المؤقت ما دامت الدورة front أو back،
+        فلا تحذفه توليدات أخرى في نفس التخزين (البوابة، بث آخر) أثناء إذاعته. التثبيت قبل التوليد
+        حتى لا يُحذف بين التوليد والتثبيت.
+        """
+        program = self.program()
+        started = time.perf_counter()
+        path = self.render_cache.path_for(self.render_cache.key(self.transmitter, program, self.frame_duration,
+                                                                self.num_repeats))
+        self.render_cache.pin(path)
+        try:
+            path = self.render_cache.render(self.transmitter, program, frame_duration=self.frame_duration,
+                                            num_repeats=self.num_repeats)
+        except Exception:
+            self.render_cache.unpin(path)
+            raise
+        samples = self.transmitter.signal_length(program, self.frame_duration, self.num_repeats)
+        with self._lock:
+            self.counters["renders"] += 1
+            self.counters["render_seconds"] += time.perf_counter() - started
+        return Cycle(program, path, samples / self.transmitter.sample_rate, time.time())
@@ -0,0 +1,158 @@
+import numpy as np
+from scipy.signal import butter, lfilter, sosfilt, stft, istft
+
+# محاكي قناة صوتية (بدون أجهزة): يطبق على إشارة PCM ما يحدث لها فعلياً في الطريق إلى المستقبل،
+# لقياس أداء المودم على رابط حقيقي (راديو FM، MP3 عبر Icecast، سماعة هاتف إلى ميكروفون)
+# بدلاً من حلقة رقمية مثالية. كل العمليات متجهة (NumPy/SciPy) على الإشارة كاملة.
+
+
+def awgn(signal, snr_db, rng):
+    """ضجيج أبيض Gauss بنسبة إشارة إلى ضجيج snr_db (قدرة الإشارة = متوسطها على كامل البث، شاملاً الفجوات)."""
+    power = float(np.mean(signal ** 2))
+    return signal + rng.normal(0, np.sqrt(power / 10 ** (snr_db / 10)), len(signal))
+
+
+def band_limit(signal, sample_rate, low=None, high=None, order=6):
+    """مرشح Butterworth: تمرير نطاق (low..high)، أو تمرير منخفض (high فقط) أو مرتفع (low فقط)."""
+    nyquist = sample_rate / 2
+    if low and high:
+        sos = butter(order, [low / nyquist, min(high / nyquist, 0.999)], btype="bandpass", output="sos")
+    elif high:
+        sos = butter(order, min(high / nyquist, 0.999), btype="lowpass", output="sos")
+    elif low:
+        sos = butter(order, low / nyquist, btype="highpass", output="sos")
+    else:
+        return signal
+    return sosfilt(sos, signal)
+
+
+def tilt(signal, amount):
+    """ميل الاستجابة الترددية (مرشح تمرير منخفض من الدرجة الأولى): الترددات العالية أضعف، كسماعة رخيصة."""
+    if not amount:
+        return signal
+    return lfilter([1 - amount], [1, -amount], signal)
+
+
+def spectral_holes(signal, rng, hole_fraction=0.05, hole_width=8, mask_db=None, window=1152):
+    """
+    أثر ترميز صوتي مضغوط (MP3/AAC): في كل نافذة STFT تُحذف نطاقات عشوائية (hole_fraction من الخانات
+    على شكل ثقوب عرضها hole_width خانة، كما يحذف المرمز نطاقات معاملات المقياس التي لا تتسع لها البتات)،
+    و mask_db: حذف كل خانة أضعف من قمة النافذة بأكثر من mask_db (تقريب للإخفاء السمعي).
+    """
+    _, _, spectrum = stft(signal, nperseg=window, noverlap=window // 2)
+    bins, frames = spectrum.shape
+    keep = np.ones(spectrum.shape, dtype=bool)
+    if hole_fraction:
+        holes = rng.random((-(-bins // hole_width), frames)) < hole_fraction
+        keep &= ~np.repeat(holes, hole_width, axis=0)[:bins]
+    if mask_db is not None:
+        magnitude = np.abs(spectrum)
+        keep &= magnitude >= magnitude.max(axis=0, keepdims=True) * 10 ** (-mask_db / 20)
+    _, restored = istft(spectrum * keep, nperseg=window, noverlap=window // 2)
+    return restored[:len(signal)]
+
+
+def multipath(signal, sample_rate, echoes):
+    """صدى متعدد المسارات: echoes قائمة (التأخير بالثواني، الكسب)، مجمعة مع المسار المباشر."""
+    output = signal.copy()
+    for delay, gain in echoes:
+        shift = int(round(delay * sample_rate))
+        if 0 < shift < len(signal):
+            output[shift:] += gain * signal[:-shift]
+    return output
+
+
+def warp_positions(num_samples, sample_rate, ppm=0.0, drift_ppm_per_s=0.0):
+    """
+    موقع كل عينة مستقبلة على محور زمن المرسل: فرق ساعتي العينات ppm (ثابت)
+    مع انحراف يتغير خطياً drift_ppm_per_s (ساعة تسخن أثناء البث).
+    """
+    n = np.arange(num_samples, dtype=np.float64)
+    seconds = n / sample_rate
+    return n * (1 + ppm * 1e-6) + 0.5 * drift_ppm_per_s * 1e-6 * seconds * n
+
+
+def clock_offset(signal, sample_rate, ppm=0.0, drift_ppm_per_s=0.0):
+    """إعادة أخذ العينات بساعة المستقبل (استيفاء خطي)."""
+    if not ppm and not drift_ppm_per_s:
+        return signal
+    positions = warp_positions(len(signal), sample_rate, ppm, drift_ppm_per_s)
+    positions = positions[positions <= len(signal) - 1]
+    return np.interp(positions, np.arange(len(signal)), signal)
+
+
+def dropouts(signal, sample_rate, rate, duration, rng):
+    """انقطاعات عشوائية: rate انقطاع في الثانية (عملية Poisson)، مدة كل منها أُسية بمتوسط duration ثانية."""
+    if not rate:
+        return signal
+    output = signal.copy()
+    count = rng.poisson(rate * len(signal) / sample_rate)
+    starts = rng.integers(0, len(signal), count)
+    lengths = (rng.exponential(duration, count) * sample_rate).astype(np.intp)
+    for start, length in zip(starts, lengths):
+        output[start:start + length] = 0.0
+    return output
+
+
+class Channel:
+    """
+    قناة صوتية كاملة بترتيب ما يحدث فعلياً: صدى الغرفة/المسارات → تحديد النطاق والميل (السماعة، المرسل)
+    → ترميز مضغوط → ساعة المستقبل → انقطاعات → ضجيج (بعد الانقطاع: الصمت يبقى ضجيجاً) → قص int16.
+    أي معامل None أو 0 يعطل مرحلته.
+    """
+    def __init__(self, snr_db=None, low=None, high=None, tilt=0.0, hole_fraction=0.0, hole_width=8, mask_db=None,
+                 echoes=(), ppm=0.0, drift_ppm_per_s=0.0, dropout_rate=0.0, dropout_duration=0.1):
+        self.snr_db = snr_db
+        self.low = low
+        self.high = high
+        self.tilt = tilt
+        self.hole_fraction = hole_fraction
+        self.hole_width = hole_width
+        self.mask_db = mask_db
+        self.echoes = tuple(echoes)
+        self.ppm = ppm
+        self.drift_ppm_per_s = drift_ppm_per_s
+        self.dropout_rate = dropout_rate
+        self.dropout_duration = dropout_duration
+
+    def params(self):
+        return dict(vars(self))
+
+    def replace(self, **changes):
+        """نسخة من القناة مع تغيير بعض المعاملات (لمسح معامل واحد حول إعداد مسبق)."""
+        return Channel(**dict(self.params(), **changes))
+
+    def apply(self, signal, sample_rate, rng):
+        """إشارة PCM (int16 أو float) → الإشارة المستقبلة int16."""
+        signal = np.asarray(signal, dtype=np.float64)
+        if self.echoes:
+            signal = multipath(signal, sample_rate, self.echoes)
+        signal = band_limit(signal, sample_rate, self.low, self.high)
+        signal = tilt(signal, self.tilt)
+        if self.hole_fraction or self.mask_db is not None:
+            signal = spectral_holes(signal, rng, self.hole_fraction, self.hole_width, self.mask_db)
+        signal = clock_offset(signal, sample_rate, self.ppm, self.drift_ppm_per_s)
+        signal = dropouts(signal, sample_rate, self.dropout_rate, self.dropout_duration, rng)
+        if self.snr_db is not None:
+            signal = awgn(signal, self.snr_db, rng)
+        return np.clip(signal, -32768, 32767).astype(np.int16)
+
+    def time_map(self, positions, sample_rate, num_samples):
+        """مواقع عينات المرسل → مواقعها في الإشارة المستقبلة (بعد فرق الساعة)."""
+        if not self.ppm and not self.drift_ppm_per_s:
+            return np.asarray(positions, dtype=np.float64)
+        warped = warp_positions(num_samples, sample_rate, self.ppm, self.drift_ppm_per_s)
+        return np.interp(positions, warped, np.arange(num_samples))
+
+
+# قنوات نموذجية (تقديرات تقريبية لروابط حقيقية)
+PRESETS = {
+    "loopback": Channel(),
+    # راديو FM: نطاق 30Hz-15kHz، ضجيج خفيف، صدى قصير من الانعكاسات، ساعة بطاقة صوت عادية
+    "fm": Channel(snr_db=30, low=30, high=15000, echoes=((0.0005, 0.2),), ppm=20),
+    # MP3 بمعدل 128kbps عبر Icecast: قطع فوق 16kHz، ثقوب طيفية من المرمز، ساعتا جهازين مختلفين
+    "mp3_128k": Channel(snr_db=45, high=16000, hole_fraction=0.03, mask_db=60, ppm=50),
+    # سماعة هاتف إلى ميكروفون: نطاق ضيق وميل، صدى الغرفة، ضجيج المكان، انحراف ساعة وانقطاعات
+    "speaker_mic": Channel(snr_db=20, low=300, high=10000, tilt=0.3, echoes=((0.003, 0.4), (0.011, 0.2)),
+                           ppm=80, drift_ppm_per_s=0.5, dropout_rate=0.05, dropout_duration=0.15),
+}
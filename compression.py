@@ -0,0 +1,180 @@
+import os
+import zlib
+from functools import lru_cache
+import numpy as np
+
+# ضواغط اختيارية: تُستخدم فقط إذا كانت المكتبة مثبتة
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DICTIONARY_DIR = os.path.join(BASE_DIR, "dictionaries")
+CORPUS_DIR = os.path.join(BASE_DIR, "corpus", "web")
+
+# القاموس المدرب على صفحات Markdown كما تعيدها خدمة Jina (r.jina.ai)
+WEB_DICTIONARY = "web_markdown_v1"
+WEB_DICTIONARY_SIZE = 16384
+
+
+def load_corpus(split="train"):
+    """صفحات العينة (بايتات) من corpus/web/<split>، مرتبة بالاسم."""
+    directory = os.path.join(CORPUS_DIR, split)
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'rb') as f:
+            samples.append(f.read())
+    return samples
+
+
+def train_dictionary(samples, size=WEB_DICTIONARY_SIZE, segment_size=128, dgram_size=6):
+    """
+    تدريب قاموس ضغط مسبق (Raw Content Dictionary) من عينات نموذجية بطريقة COVER المبسطة:
+    كل مقطع بطول segment_size يُقيَّم بمجموع تكرار مقاطعه الصغيرة (d-grams) في العينات المختلفة،
+    ويُختار الأفضل ثم تُصفَّر مقاطعه الصغيرة حتى لا تُحسب مرتين، حتى يمتلئ القاموس.
+    المقاطع الأهم توضع في نهاية القاموس لأن zlib يرمز المسافات القريبة بعدد بتات أقل.
+    """
+    data = b"\x00".join(samples)
+    ids = {}
+    gram_ids = np.array([ids.setdefault(data[i:i + dgram_size], len(ids))
+                         for i in range(len(data) - dgram_size + 1)], dtype=np.intp)
+
+    # عدد العينات المختلفة التي يظهر فيها كل مقطع صغير (ما يظهر في عينة واحدة فقط لا يفيد)
+    sample_index = np.cumsum(np.frombuffer(data, dtype=np.uint8)[:len(gram_ids)] == 0)
+    pairs = np.unique(np.stack((gram_ids, sample_index)), axis=1)
+    scores = np.bincount(pairs[0], minlength=len(ids)).astype(np.float64) - 1
+    scores[[gram_id for gram, gram_id in ids.items() if b"\x00" in gram]] = 0
+
+    window = segment_size - dgram_size + 1
+    pieces = []
+    total = 0
+    while total < size:
+        position_scores = scores[gram_ids]
+        sums = np.concatenate(([0.0], np.cumsum(position_scores)))
+        segment_scores = sums[window:] - sums[:-window]
+        best = int(np.argmax(segment_scores))
+        if segment_scores[best] <= 0:
+            break
+        pieces.append(data[best:best + segment_size])
+        total += segment_size
+        scores[gram_ids[best:best + window]] = 0
+    return b"".join(reversed(pieces))[-size:]
+
+
+@lru_cache(maxsize=8)
+def load_dictionary(name):
+    """قراءة قاموس من مجلد dictionaries (مرة واحدة)."""
+    with open(os.path.join(DICTIONARY_DIR, f"{name}.dict"), 'rb') as f:
+        return f.read()
+
+
+class NoCompression:
+    codec_id = 0
+    name = "none"
+
+    def compress(self, data):
+        return bytes(data)
+
+    def decompress(self, data):
+        return bytes(data)
+
+
+class ZlibCompressor:
+    """
+    zlib بدون قاموس (الصيغة الأصلية، متوافقة مع zlib.decompress)، أو مع قاموس مسبق:
+    عندها يُستخدم Deflate الخام بدون ترويسة zlib و adler32 (6 بايت أقل)، فالحزمة محمية بـ CRC32 أصلاً.
+    """
+    def __init__(self, codec_id, name, dictionary=None, level=9):
+        self.codec_id = codec_id
+        self.name = name
+        self.dictionary_name = dictionary
+        self.level = level
+
+    def compress(self, data):
+        if self.dictionary_name is None:
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, 9, zdict=load_dictionary(self.dictionary_name))
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data):
+        if self.dictionary_name is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(-15, zdict=load_dictionary(self.dictionary_name))
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+class ZstdCompressor:
+    """zstd (إذا كانت مكتبة zstandard مثبتة)، مع نفس القاموس المدرب كقاموس محتوى خام."""
+    def __init__(self, codec_id, name, dictionary=None, level=19):
+        self.codec_id = codec_id
+        self.name = name
+        self.dictionary_name = dictionary
+        self.level = level
+
+    def _dictionary(self):
+        if self.dictionary_name is None:
+            return None
+        return zstandard.ZstdCompressionDict(load_dictionary(self.dictionary_name),
+                                             dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+
+    def compress(self, data):
+        compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._dictionary(),
+                                              write_checksum=False, write_dict_id=False)
+        return compressor.compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor(dict_data=self._dictionary()).decompress(data)
+
+
+class BrotliCompressor:
+    """brotli (إذا كانت المكتبة مثبتة): قاموسه الثابت المدمج مُعد أصلاً لنصوص الويب."""
+    def __init__(self, codec_id, name, quality=11):
+        self.codec_id = codec_id
+        self.name = name
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=self.quality)
+
+    def decompress(self, data):
+        return brotli.decompress(data)
+
+
+# أرقام الضواغط ثابتة (تُرسل في الحزمة)، لكن السجل يحتوي فقط على المتاح في هذه البيئة.
+# قاموس جديد = رقم جديد، حتى لا تفك المستقبلات القديمة البيانات بقاموس خاطئ.
+_ALL_COMPRESSORS = [NoCompression(), ZlibCompressor(1, "zlib"), ZlibCompressor(2, "zlib-web", WEB_DICTIONARY)]
+if zstandard is not None:
+    _ALL_COMPRESSORS += [ZstdCompressor(3, "zstd"), ZstdCompressor(4, "zstd-web", WEB_DICTIONARY)]
+if brotli is not None:
+    _ALL_COMPRESSORS += [BrotliCompressor(5, "brotli")]
+
+COMPRESSORS = {compressor.name: compressor for compressor in _ALL_COMPRESSORS}
+COMPRESSORS_BY_ID = {compressor.codec_id: compressor for compressor in _ALL_COMPRESSORS}
+DEFAULT_COMPRESSOR = "zlib-web"
+
+def get_compressor(compressor):
+    """إرجاع كائن الضاغط من اسمه ("zlib-web"، "zstd"، ...) أو رقمه أو الكائن نفسه."""
+    if isinstance(compressor, str):
+        return COMPRESSORS[compressor]
+    if isinstance(compressor, int):
+        return COMPRESSORS_BY_ID[compressor]
+    return compressor
+
+def decompress(codec_id, data):
+    """فك ضغط بيانات رسالة حسب رقم الضاغط المرسل في الحزمة."""
+    return get_compressor(codec_id).decompress(data)
+
+
+if __name__ == "__main__":
+    # إعادة تدريب قاموس الويب من corpus/web/train (يجب نشر الملف الناتج مع المرسل والمستقبل معاً)
+    dictionary = train_dictionary(load_corpus("train"))
+    os.makedirs(DICTIONARY_DIR, exist_ok=True)
+    path = os.path.join(DICTIONARY_DIR, f"{WEB_DICTIONARY}.dict")
+    with open(path, 'wb') as f:
+        f.write(dictionary)
+    print(f"تم حفظ القاموس: {path} ({len(dictionary)} بايت)")
@@ -0,0 +1,216 @@
+import json
+import os
+import struct
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from packet_codec import encode_message
+from render_cache import temp_name
+
+# بث الفروقات (Delta) بين نسخ متتالية من نفس البث (الطقس، الأخبار، ...):
+# KEY: الحمولة كاملة (Keyframe) = version (2) + payload
+# DLT: الفرق عن نسخة سابقة = version (2) + base (2) + عمليات النسخ/الإدراج
+# اسم البث يُرسل كبيانات وصفية (meta) في الحزمة.
+# كل عملية تبدأ برقم متغير الطول (varint) = (الطول << 1) | نسخ:
+#   نسخ:   يتبعه varint موقع البداية في النسخة الأساس
+#   إدراج: يتبعه الطول من البايتات الجديدة
+MIN_COPY = 4  # النسخ الأقصر من هذا يكلف أكثر من إدراج البايتات نفسها
+VERSION_MODULO = 1 << 16
+DELTA_HEADER = ">HH"
+
+
+def _varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def _trim(versions, history, keep):
+    """حذف أقدم النسخ حتى يبقى history نسخة، دون حذف النسخ في keep (آخر Keyframe وآخر نسخة)."""
+    for version in list(versions):
+        if len(versions) <= history:
+            break
+        if version not in keep:
+            del versions[version]
+
+
+def make_delta(base, target):
+    """عمليات الفرق الثنائي لتحويل base إلى target (بايتات)."""
+    matcher = SequenceMatcher(None, base, target, autojunk=False)
+    out = bytearray()
+    position = 0
+    for base_start, target_start, length in matcher.get_matching_blocks():
+        if length < MIN_COPY and target_start + length < len(target):
+            continue
+        # البايتات الجديدة بين آخر نسخ وهذا النسخ تُدرج كما هي
+        if target_start > position:
+            out += _varint((target_start - position) << 1) + target[position:target_start]
+        if length:
+            out += _varint(length << 1 | 1) + _varint(base_start)
+        position = target_start + length
+    return bytes(out)
+
+
+def apply_delta(base, delta):
+    """إعادة بناء النسخة الجديدة من base وعمليات الفرق."""
+    out = bytearray()
+    offset = 0
+    while offset < len(delta):
+        op, offset = _read_varint(delta, offset)
+        length = op >> 1
+        if op & 1:
+            start, offset = _read_varint(delta, offset)
+            if start + length > len(base):
+                raise ValueError("عملية نسخ خارج النسخة الأساس")
+            out += base[start:start + length]
+        else:
+            if offset + length > len(delta):
+                raise ValueError("عملية إدراج مقطوعة")
+            out += delta[offset:offset + length]
+            offset += length
+    return bytes(out)
+
+
+class DeltaEncoder:
+    """
+    المرسل: يحتفظ بآخر history نسخة من البث، ويبث كل تحديث كفرق عن نسخة يملكها المستقبل المتزامن:
+    - chain=True: أصغر فرق عن أي نسخة بُثت منذ آخر Keyframe (عادة السابقة مباشرة). كل نسخة تُبث
+      بعدة دورات Carousel، ومن فاتته نسخة يتزامن من جديد عند الـ Keyframe التالي.
+    - chain=False: الفرق دائماً عن آخر Keyframe (أكبر قليلاً، لكن ضياع فرق لا يؤثر على الفروق التالية).
+    كل keyframe_interval تحديث (أو إذا لم يكن الفرق أصغر) تُبث الحمولة كاملة لمن انضم متأخراً.
+    state_path: ملف JSON لحفظ النسخ بين تشغيلات البرنامج (مثل auto_broadcast_generator الذي يعمل دورياً).
+    """
+    def __init__(self, stream, history=8, keyframe_interval=10, chain=True, state_path=None):
+        self.stream = stream
+        self.history = history
+        self.chain = chain
+        self.keyframe_interval = keyframe_interval
+        self.state_path = state_path
+        self.versions = OrderedDict()  # version → payload
+        self.version = None
+        self.keyframe = None
+        self.since_keyframe = 0
+        self._last_message = None
+        if state_path is not None and os.path.exists(state_path):
+            self._load()
+
+    def encode(self, payload):
+        """الحمولة الجديدة (نص أو بايتات) → رسالة KEY أو DLT جاهزة للبث."""
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        payload = bytes(payload)
+        if self.version is not None and payload == self.versions[self.version]:
+            # لا تغيير: نعيد بث نفس الرسالة (ونفس البايتات تستفيد من RenderCache)
+            return self._last_message
+
+        version = 0 if self.version is None else (self.version + 1) % VERSION_MODULO
+        delta = base = None
+        if self.keyframe is not None and self.since_keyframe + 1 < self.keyframe_interval:
+            candidates = [self.keyframe]
+            if self.chain:
+                candidates = [v for v in self.versions if (v - self.keyframe) % VERSION_MODULO <= self.since_keyframe]
+            delta, base = min(((make_delta(self.versions[v], payload), v) for v in candidates),
+                              key=lambda item: len(item[0]))
+            if len(delta) + 2 >= len(payload):
+                delta = None
+
+        if delta is None:
+            message = encode_message("KEY", struct.pack(">H", version) + payload, meta=self.stream)
+            self.keyframe = version
+            self.since_keyframe = 0
+        else:
+            message = encode_message("DLT", struct.pack(DELTA_HEADER, version, base) + delta,
+                                     meta=self.stream)
+            self.since_keyframe += 1
+
+        self.version = version
+        self.versions[version] = payload
+        _trim(self.versions, self.history, (self.keyframe, version))
+        self._last_message = message
+        if self.state_path is not None:
+            self._save()
+        return message
+
+    def _save(self):
+        state = {
+            "stream": self.stream,
+            "version": self.version,
+            "keyframe": self.keyframe,
+            "since_keyframe": self.since_keyframe,
+            "versions": [[version, payload.hex()] for version, payload in self.versions.items()],
+            "last_message": self._last_message.hex(),
+        }
+        tmp_path = temp_name(self.state_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _load(self):
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state["stream"] != self.stream:
+            return
+        self.version = state["version"]
+        self.keyframe = state["keyframe"]
+        self.since_keyframe = state["since_keyframe"]
+        self.versions = OrderedDict((version, bytes.fromhex(payload)) for version, payload in state["versions"])
+        self._last_message = bytes.fromhex(state["last_message"])
+
+
+class DeltaDecoder:
+    """
+    المستقبل: يعيد بناء الحمولات من رسائل KEY و DLT (كما يعيدها Reassembler) لكل بث على حدة،
+    ويحتفظ بآخر history نسخة. الفرق الذي لا يملك المستقبل نسخته الأساس يُتجاهل حتى أول Keyframe.
+    """
+    def __init__(self, history=8):
+        self.history = history
+        self.streams = {}  # stream → OrderedDict(version → payload)
+        self.keyframes = {}  # stream → رقم آخر Keyframe (لا يُحذف من النسخ المحفوظة)
+
+    def feed(self, message):
+        """رسالة مكتملة → (اسم البث، رقم النسخة، الحمولة) لكل نسخة جديدة، أو None."""
+        if message["type"] not in ("KEY", "DLT"):
+            return None
+        stream = (message["meta"] or b"").decode('utf-8', errors='replace')
+        versions = self.streams.setdefault(stream, OrderedDict())
+        data = message["data"]
+        try:
+            if message["type"] == "KEY":
+                version = struct.unpack_from(">H", data)[0]
+                payload = data[2:]
+            else:
+                version, base = struct.unpack_from(DELTA_HEADER, data)
+                if base not in versions:
+                    return None
+                payload = apply_delta(versions[base], data[struct.calcsize(DELTA_HEADER):])
+        except (struct.error, IndexError, ValueError):
+            return None
+        if versions.get(version) == payload:
+            return None
+
+        versions.pop(version, None)
+        versions[version] = payload
+        if message["type"] == "KEY":
+            self.keyframes[stream] = version
+        _trim(versions, self.history, (self.keyframes.get(stream), version))
+        return stream, version, payload
+
+    def latest(self, stream):
+        """آخر حمولة مستقبلة لبث معين (أو None)."""
+        versions = self.streams.get(stream)
+        if not versions:
+            return None
+        return next(reversed(versions.values()))
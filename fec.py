@@ -0,0 +1,301 @@
+import numpy as np
+
+# ===== حساب حقل جالوا GF(2^8) بكثير الحدود البدائي x^8 + x^4 + x^3 + x^2 + 1 (0x11d) =====
+
+def _build_gf_tables():
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int32)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= 0x11d
+    exp[255:510] = exp[:255]
+    # جدول الضرب الكامل (256 × 256) لضرب متجهي بالفهرسة المباشرة
+    mul = exp[(log[:, np.newaxis] + log[np.newaxis, :]) % 255]
+    mul[0, :] = 0
+    mul[:, 0] = 0
+    return exp, log, mul
+
+GF_EXP, GF_LOG, GF_MUL = _build_gf_tables()
+
+def gf_mul(a, b):
+    return int(GF_MUL[a, b])
+
+def gf_div(a, b):
+    if a == 0:
+        return 0
+    return int(GF_EXP[(GF_LOG[a] - GF_LOG[b]) % 255])
+
+def gf_inv(a):
+    return int(GF_EXP[255 - GF_LOG[a]])
+
+
+class RepetitionCode:
+    """
+    الترميز القديم: تكرار كل بت مرتين، ويُعتبر البت 1 إذا كانت إحدى النسختين 1.
+    يُبث بدون ترويسة للتوافق مع المستقبلات القديمة.
+    """
+    code_id = 0
+    name = "repeat"
+
+    def coded_bits(self, length):
+        """عدد البتات على الهواء لحمولة بطول length بايت."""
+        return length * 16
+
+    def encode(self, data):
+        """بايتات → مصفوفة بتات مرمزة."""
+        return np.repeat(np.unpackbits(np.frombuffer(data, dtype=np.uint8)), 2)
+
+    def decode(self, bits, length=None):
+        """مصفوفة بتات → (بايتات، إحصائيات التصحيح)."""
+        # نأخذ كل بتين متتاليين، إذا كان أحدهما 1 نعتبره 1 (تصحيح بسيط)
+        pairs = bits[:len(bits) // 2 * 2].reshape(-1, 2)
+        cleaned_bits = pairs.max(axis=1)
+        cleaned_bits = cleaned_bits[:len(cleaned_bits) // 8 * 8]
+        data = np.packbits(cleaned_bits).tobytes()
+        if length is not None:
+            data = data[:length]
+        return data, {"corrected": 0, "failed": 0}
+
+    def decode_soft(self, llr, length=None):
+        """قيم LLR (موجب = 1) → (بايتات، إحصائيات التصحيح). التكرار لا يستفيد من الثقة: قرار صلب."""
+        return self.decode((np.asarray(llr) > 0).astype(np.uint8), length)
+
+
+class ReedSolomonCode:
+    """
+    ترميز Reed-Solomon على البايتات (GF(2^8)) بـ nsym بايت تصحيح لكل كلمة: يصحح حتى nsym/2 بايت خاطئ.
+    الحمولة تُقسم إلى كلمات متساوية الطول (RS مختصر للحمولات القصيرة)، ثم تُخلط الكلمات
+    بمُبدِّل كتلي (Block Interleaver): البايتات المتجاورة على الهواء (نفس الإطار، قنوات متجاورة)
+    تنتمي إلى كلمات مختلفة، فلا يتركز خطأ ثقب طيفي أو إطار تالف في كلمة واحدة.
+    interleave=False: الكلمات متتالية على الهواء كما هي، فالإطار التالف يُفسد كلمة أو اثنتين فقط
+    وتبقى بقية الكلمات سليمة (مناسب لرموز النافورة حيث كل كلمة = رمز مستقل).
+    """
+    def __init__(self, nsym=32, code_id=1, name="rs", interleave=True):
+        self.nsym = nsym
+        self.code_id = code_id
+        self.name = name
+        self.interleave = interleave
+        self.max_data = 255 - nsym
+
+        # كثير الحدود المولد g(x) = (x - α^0)(x - α^1)...(x - α^(nsym-1)) بترتيب الأس الأعلى أولاً
+        generator = [1]
+        for j in range(nsym):
+            root = int(GF_EXP[j])
+            generator = [a ^ gf_mul(b, root) for a, b in zip(generator + [0], [0] + generator)]
+        self.generator = np.array(generator, dtype=np.uint8)
+        self.syndrome_powers = GF_EXP[np.arange(nsym)]
+
+    def layout(self, length):
+        """(عدد الكلمات، بايتات البيانات لكل كلمة، طول الكلمة) لحمولة بطول length."""
+        num_words = max(1, -(-length // self.max_data))
+        k = max(1, -(-length // num_words))
+        return num_words, k, k + self.nsym
+
+    def coded_length(self, length):
+        num_words, _, n = self.layout(length)
+        return num_words * n
+
+    def coded_bits(self, length):
+        """عدد البتات على الهواء لحمولة بطول length بايت."""
+        return self.coded_length(length) * 8
+
+    def encode(self, data):
+        """بايتات → مصفوفة بتات مرمزة ومخلوطة."""
+        data = np.frombuffer(data, dtype=np.uint8)
+        num_words, k, n = self.layout(len(data))
+        message = np.zeros(num_words * k, dtype=np.uint8)
+        message[:len(data)] = data
+        message = message.reshape(num_words, k)
+
+        # قسمة m(x)·x^nsym على g(x) بسجل إزاحة (LFSR)، متجهياً عبر كل الكلمات معاً
+        remainder = np.zeros((num_words, self.nsym), dtype=np.uint8)
+        for i in range(k):
+            feedback = message[:, i] ^ remainder[:, 0]
+            remainder[:, :-1] = remainder[:, 1:]
+            remainder[:, -1] = 0
+            remainder ^= GF_MUL[feedback[:, np.newaxis], self.generator[np.newaxis, 1:]]
+
+        codewords = np.hstack((message, remainder))
+        if not self.interleave:
+            return np.unpackbits(codewords.reshape(-1))
+        # الخلط: قراءة الكلمات عموداً بعمود
+        return np.unpackbits(codewords.T.reshape(-1))
+
+    def decode(self, bits, length):
+        """مصفوفة بتات → (بايتات بطول length، إحصائيات التصحيح)."""
+        num_words, k, n = self.layout(length)
+        needed = num_words * n * 8
+        bits = np.asarray(bits, dtype=np.uint8)[:needed]
+        if len(bits) < needed:
+            bits = np.concatenate((bits, np.zeros(needed - len(bits), dtype=np.uint8)))
+
+        codewords = self._deinterleave(np.packbits(bits), num_words, n)
+        syndromes = self.syndromes(codewords)
+
+        corrected = 0
+        failed = 0
+        for row in np.flatnonzero(syndromes.any(axis=1)):
+            fixed = self._correct(codewords[row], syndromes[row])
+            if fixed is None:
+                failed += 1
+            else:
+                codewords[row] = fixed
+                corrected += 1
+
+        data = codewords[:, :k].reshape(-1)[:length].tobytes()
+        return data, {"corrected": corrected, "failed": failed}
+
+    def decode_soft(self, llr, length):
+        """
+        قيم LLR (موجب = 1) → (بايتات، إحصائيات التصحيح).
+        الكلمة التي يفشل تصحيحها بالقرار الصلب تُعاد محاولتها بمحو (Erasure) أضعف بايتاتها ثقةً
+        (أدنى |LLR| بين بتات البايت): موقع المحو معروف فيكلف بايت تصحيح واحداً بدلاً من اثنين،
+        فتُصحح كلمات بأخطاء أكثر من nsym/2 إذا تركزت الأخطاء في البايتات الضعيفة.
+        """
+        num_words, k, n = self.layout(length)
+        needed = num_words * n * 8
+        llr = np.asarray(llr, dtype=np.float32)[:needed]
+        if len(llr) < needed:
+            llr = np.concatenate((llr, np.zeros(needed - len(llr), dtype=np.float32)))
+        codewords = self._deinterleave(np.packbits(llr > 0), num_words, n)
+        reliability = self._deinterleave(np.abs(llr).reshape(-1, 8).min(axis=1), num_words, n)
+        syndromes = self.syndromes(codewords)
+        corrected = failed = 0
+        for row in np.flatnonzero(syndromes.any(axis=1)):
+            fixed = self._correct(codewords[row], syndromes[row])
+            order = np.argsort(reliability[row], kind='stable')
+            # محاولات بعدد متزايد من المحو، مع ترك 12 بايت تحقق على الأقل: كل محو يقلل هامش
+            # التحقق، فتزيد فرصة "تصحيح" كلمة تالفة إلى كلمة صحيحة خاطئة (يكشفها CRC الحزمة لاحقاً)
+            for num_erasures in range(self.nsym // 4, self.nsym - 11, self.nsym // 4):
+                if fixed is not None:
+                    break
+                fixed = self._correct(codewords[row], syndromes[row], order[:num_erasures])
+            if fixed is None:
+                failed += 1
+            else:
+                codewords[row] = fixed
+                corrected += 1
+
+        data = codewords[:, :k].reshape(-1)[:length].tobytes()
+        return data, {"corrected": corrected, "failed": failed}
+
+    def _deinterleave(self, values, num_words, n):
+        """قيم بترتيب الهواء (بايت لكل قيمة) → مصفوفة (الكلمات × n)."""
+        if self.interleave:
+            return values.reshape(n, num_words).T.copy()
+        return values.reshape(num_words, n).copy()
+
+    def syndromes(self, codewords):
+        """S_j = c(α^j) لكل كلمة (طريقة Horner متجهياً عبر الكلمات)."""
+        codewords = np.atleast_2d(codewords)
+        acc = np.zeros((codewords.shape[0], self.nsym), dtype=np.uint8)
+        for i in range(codewords.shape[1]):
+            acc = GF_MUL[acc, self.syndrome_powers[np.newaxis, :]] ^ codewords[:, i:i + 1]
+        return acc
+
+    def _correct(self, codeword, syndromes, erasures=()):
+        """
+        تصحيح كلمة واحدة: Berlekamp-Massey ثم بحث Chien ثم حل نظام خطي لقيم الأخطاء.
+        erasures: مواقع (فهارس في الكلمة) بايتات مشكوك فيها تُصحح كأخطاء معروفة الموقع.
+        """
+        n = len(codeword)
+        erased = n - 1 - np.asarray(erasures, dtype=np.intp)
+        # متلازمات Forney: S'_j = S_(j+1) + X·S_j لكل محو X = α^p تلغي حدوده من المتلازمات،
+        # فيبحث BM عن الأخطاء المجهولة فقط في nsym - عدد المحو متلازمة
+        reduced = [int(s) for s in syndromes]
+        for degree in erased:
+            locator_value = int(GF_EXP[degree % 255])
+            reduced = [reduced[j + 1] ^ gf_mul(locator_value, reduced[j]) for j in range(len(reduced) - 1)]
+        locator, num_errors = self._berlekamp_massey(reduced)
+        if (num_errors == 0 and len(erased) == 0) or 2 * num_errors + len(erased) > self.nsym:
+            return None
+
+        # بحث Chien: الدرجة p خاطئة إذا كان Λ(α^-p) = 0
+        degrees = np.arange(n)
+        powers = GF_EXP[(-np.outer(degrees, np.arange(num_errors + 1))) % 255]
+        values = np.bitwise_xor.reduce(GF_MUL[np.array(locator, dtype=np.uint8)[np.newaxis, :], powers], axis=1)
+        error_degrees = degrees[values == 0]
+        if len(error_degrees) != num_errors:
+            return None
+        error_degrees = np.union1d(error_degrees, erased)
+
+        # قيم الأخطاء: S_j = Σ e_k · X_k^j حيث X_k = α^p_k
+        num_errors = len(error_degrees)
+        matrix = GF_EXP[(np.outer(np.arange(num_errors), error_degrees)) % 255]
+        magnitudes = self._solve(matrix, syndromes[:num_errors])
+        if magnitudes is None:
+            return None
+
+        fixed = codeword.copy()
+        fixed[n - 1 - error_degrees] ^= magnitudes
+        if self.syndromes(fixed).any():
+            return None
+        return fixed
+
+    def _berlekamp_massey(self, syndromes):
+        size = len(syndromes)
+        locator = [1] + [0] * size
+        previous = [1] + [0] * size
+        length, shift, last_discrepancy = 0, 1, 1
+        for step in range(size):
+            discrepancy = syndromes[step]
+            for i in range(1, length + 1):
+                discrepancy ^= gf_mul(locator[i], syndromes[step - i])
+            if discrepancy == 0:
+                shift += 1
+                continue
+            coef = gf_div(discrepancy, last_discrepancy)
+            saved = locator[:]
+            for i in range(size + 1 - shift):
+                locator[i + shift] ^= gf_mul(coef, previous[i])
+            if 2 * length <= step:
+                length = step + 1 - length
+                previous = saved
+                last_discrepancy = discrepancy
+                shift = 1
+            else:
+                shift += 1
+        return locator[:length + 1], length
+
+    def _solve(self, matrix, rhs):
+        """حل نظام خطي صغير في GF(2^8) بحذف Gauss."""
+        size = len(rhs)
+        augmented = np.hstack((matrix.astype(np.uint8), np.asarray(rhs, dtype=np.uint8)[:, np.newaxis]))
+        for col in range(size):
+            pivots = np.flatnonzero(augmented[col:, col])
+            if len(pivots) == 0:
+                return None
+            pivot = col + pivots[0]
+            augmented[[col, pivot]] = augmented[[pivot, col]]
+            augmented[col] = GF_MUL[gf_inv(int(augmented[col, col])), augmented[col]]
+            for row in range(size):
+                factor = int(augmented[row, col])
+                if row != col and factor:
+                    augmented[row] ^= GF_MUL[factor, augmented[col]]
+        return augmented[:, size]
+
+
+# كل الترميزات المتاحة، بالاسم وبالرقم المرسل في الترويسة
+CODES = {code.name: code for code in (RepetitionCode(), ReedSolomonCode(32, 1, "rs"),
+                                      ReedSolomonCode(16, 2, "rs16"), ReedSolomonCode(64, 3, "rs64"),
+                                      ReedSolomonCode(32, 4, "rs-block", interleave=False),
+                                      ReedSolomonCode(16, 5, "rs16-block", interleave=False),
+                                      ReedSolomonCode(64, 6, "rs64-block", interleave=False))}
+CODES_BY_ID = {code.code_id: code for code in CODES.values()}
+
+def get_code(code):
+    """إرجاع كائن الترميز من اسمه ("repeat"، "rs"، "rs16"، "rs64") أو رقمه أو الكائن نفسه."""
+    if isinstance(code, str):
+        return CODES[code]
+    if isinstance(code, int):
+        return CODES_BY_ID[code]
+    return code
+
+def block_code(code):
+    """نفس ترميز Reed-Solomon (نفس عدد بايتات التصحيح) بدون خلط بين الكلمات."""
+    code = get_code(code)
+    return CODES[f"{code.name}-block"] if getattr(code, "interleave", False) else code
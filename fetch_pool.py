@@ -0,0 +1,73 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# مهلة الاتصال ومهلة القراءة بالثواني (لا يوجد طلب بدون مهلة)
+DEFAULT_TIMEOUT = (5, 15)
+# خدمة تحويل المواقع إلى نصوص Markdown (يمكن توجيهها لخادم محلي للتجربة)
+READER_URL = os.getenv("READER_URL", "https://r.jina.ai/")
+
+
+class FetchPool:
+    """
+    طبقة جلب متزامنة للبوابة والمحركات:
+    - جلسة requests واحدة بمجمع اتصالات (Keep-Alive) تُعاد لكل الطلبات.
+    - حد أقصى للطلبات المتزامنة لكل مضيف (per_host) حتى لا يُغرق خادم واحد (مثل r.jina.ai).
+    - مجمع خيوط (Threads) لمعالجة طابور من الطلبات، والنتائج تُعاد فور اكتمالها بأي ترتيب.
+    """
+    def __init__(self, max_workers=16, per_host=4, timeout=DEFAULT_TIMEOUT):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _host_limit(self, url):
+        with self._lock:
+            return self._host_limits[urlsplit(url).netloc]
+
+    def get(self, url, **kwargs):
+        """طلب GET متزامن عبر الجلسة المشتركة، مع حد المضيف والمهلة الافتراضية."""
+        kwargs.setdefault("timeout", self.timeout)
+        with self._host_limit(url):
+            return self.session.get(url, **kwargs)
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+            return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        return self.executor.submit(func, *args, **kwargs)
+
+    def iter_completed(self, func, items):
+        """
+        تنفيذ func(item) لكل عنصر بالتوازي، وإرجاع (item، النتيجة، الخطأ) فور اكتمال كل عنصر.
+        func يمكنها استدعاء get() بحرية: حدود المضيف تُطبق داخلها وليس على مستوى المهمة.
+        """
+        futures = {self.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
@@ -1,39 +1,58 @@
-import zlib
-import base64
-import requests
 import time
 import io
 from PIL import Image
 from advanced_fft_transmitter import FFTTransmitter
+from packet_codec import encode_message
+from compression import get_compressor, DEFAULT_COMPRESSOR
+from fetch_pool import FetchPool, READER_URL
+from upstream_cache import UpstreamCache
+from metrics import METRICS
 
 class FinalRadioEngine:
-    def __init__(self):
+    def __init__(self, compressor=DEFAULT_COMPRESSOR, fetch_pool=None, upstream_cache=None):
         self.transmitter = FFTTransmitter(num_channels=1024) # سرعة أعلى
+        self.compressor = get_compressor(compressor)
+        self.fetcher = fetch_pool or FetchPool()
+        # الصفحات لا يُعاد جلبها ولا ضغطها ما دامت صالحة (Cache-Control/ETag)، وعند انقطاع المصدر تُبث آخر نسخة
+        self.upstream_cache = upstream_cache or UpstreamCache(fetcher=self.fetcher)
+        # زمن كل مرحلة وبايتاتها ونسبة إصابة التخزين المؤقت (metrics.py)
+        METRICS.add_source("upstream_cache", self.upstream_cache.stats)
         
     def fetch_and_compress(self, url):
         """جلب محتوى المواقع، ضغطه، وتحويله لنغمات"""
         print(f"[*] Processing: {url}")
         try:
             # استخدام خدمة Jina لجلب نصوص المواقع بشكل نظيف
-            res = requests.get(f"https://r.jina.ai/{url}", timeout=10)
-            text = res.text[:2000] # نصوص كافية للقراءة
+            res = self.upstream_cache.get(f"{READER_URL}{url}", timeout=10)
             
-            # ضغط البيانات لتقليل زمن البث
-            compressed = zlib.compress(text.encode())
-            encoded = base64.b64encode(compressed).decode()
+            # ضغط البيانات لتقليل زمن البث (قاموس مدرب على صفحات Jina، والبايتات تُبث بدون Base64)
+            # نصوص كافية للقراءة (2000 حرف)، والشكل المضغوط يُعاد من التخزين إذا لم تتغير الصفحة
+            compressed = self.upstream_cache.derive(res, f"text2000.{self.compressor.name}",
+                                                    lambda r: self.compress(r.text[:2000].encode()))
             
-            # بناء الحزمة النهائية
-            packet = f"TYPE:WEB|URL:{url}|DATA:{encoded}|END"
+            # بناء الحزمة النهائية (ترويسة ثنائية + CRC32، والرابط كبيانات وصفية)
+            packet = encode_message("WEB", compressed, meta=url, codec=self.compressor.codec_id)
             return packet
         except Exception as e:
-            return f"TYPE:ERR|MSG:{str(e)}|END"
+            return encode_message("ERR", str(e))
+
+    def compress(self, data):
+        with METRICS.timer("compress"):
+            compressed = self.compressor.compress(data)
+        METRICS.compression("text", len(data), len(compressed))
+        return compressed
+
+    def fetch_many(self, urls):
+        """جلب وضغط عدة مواقع بالتوازي، وإرجاع (الرابط، الحزمة) فور اكتمال كل منها"""
+        for url, packet, error in self.fetcher.iter_completed(self.fetch_and_compress, urls):
+            yield url, packet
 
     def fetch_youtube_summary(self, video_url):
         """تحويل فيديو يوتيوب إلى نصوص وصور (شرائح)"""
         print(f"[*] YouTube Summary for: {video_url}")
         # في النسخة الحقيقية، نستخدم YouTube Transcript API
         summary = "Summary: This video explains the future of AI and Radio technology."
-        packet = f"TYPE:YT|URL:{video_url}|TEXT:{summary}|END"
+        packet = encode_message("YT", summary, meta=video_url)
         return packet
 
     def generate_broadcast_file(self, packet, filename="broadcast_live.wav"):
@@ -43,8 +62,11 @@ class FinalRadioEngine:
         return filename
 
 if __name__ == "__main__":
+    METRICS.start()
     engine = FinalRadioEngine()
     # تجربة تلقائية بالكامل
     packet = engine.fetch_and_compress("https://google.com")
     engine.generate_broadcast_file(packet)
     print("[+] System Ready for Cloud Broadcast!")
+    print(f"Metrics: {METRICS.snapshot()['stages']}")
+    METRICS.stop()
@@ -1,20 +1,21 @@
-import zlib
-import base64
 import requests
 import time
 import io
 import os
 from PIL import Image
 from advanced_fft_transmitter import FFTTransmitter
+from packet_codec import encode_message, FLAG_XOR
+from compression import get_compressor, DEFAULT_COMPRESSOR
 
 # هذا المحرك محمي (Protected Version)
 # جميع البيانات الحساسة تُقرأ من البيئة السحابية (Environment Variables) لضمان الخصوصية
 RADIO_SECRET = os.getenv("RADIO_SECRET", "default_secret")
 
 class ProtectedRadioEngine:
-    def __init__(self):
+    def __init__(self, compressor=DEFAULT_COMPRESSOR):
         # استخدام إعدادات تشفير متغيرة لضمان عدم سرقة الترددات
         self.transmitter = FFTTransmitter(num_channels=1024)
+        self.compressor = get_compressor(compressor)
         
     def _secure_process(self, data):
         """عملية تشفير إضافية قبل البث لضمان عدم فك التشفير إلا من تطبيقك"""
@@ -27,12 +28,11 @@ class ProtectedRadioEngine:
             res = requests.get(f"https://r.jina.ai/{url}", timeout=10)
             text = res.text[:2000]
             
-            # ضغط + تشفير (XOR) + Base64
-            compressed = zlib.compress(text.encode())
+            # ضغط + تشفير (XOR)، والبايتات تُبث كما هي بدون Base64
+            compressed = self.compressor.compress(text.encode())
             secured = self._secure_process(compressed)
-            encoded = base64.b64encode(secured).decode()
             
-            packet = f"TYPE:WEB|URL:{url}|DATA:{encoded}|END"
+            packet = encode_message("WEB", secured, flags=FLAG_XOR, meta=url, codec=self.compressor.codec_id)
             self.transmitter.generate_signal(packet, "broadcast_live.wav", num_repeats=5)
             return True
         except Exception as e:
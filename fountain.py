@@ -0,0 +1,132 @@
+from functools import lru_cache
+import math
+
+# ترميز نافورة (Fountain / LT) منهجي (Systematic) لبث Carousel:
+# الرموز 0..k-1 هي كتل البيانات نفسها، وكل رمز بعدها هو XOR لمجموعة كتل عشوائية
+# (عددها من توزيع Robust Soliton). المستقبل يفك البيانات بعد جمع أي k رمز تقريباً (مع هامش صغير)،
+# أياً كانت الرموز التي وصلته، بدلاً من انتظار الإطار المفقود نفسه في الدورة التالية.
+# المولد العشوائي مكتوب هنا (لا يعتمد على NumPy) حتى يعطي المرسل والمستقبل نفس المجموعات دائماً.
+
+
+def _xorshift(state):
+    state ^= (state << 13) & 0xffffffff
+    state ^= state >> 17
+    state ^= (state << 5) & 0xffffffff
+    return state
+
+
+@lru_cache(maxsize=64)
+def robust_soliton_cdf(k, c=0.1, delta=0.5):
+    """التوزيع التراكمي لعدد الكتل في كل رمز (Robust Soliton) لـ k كتلة."""
+    if k == 1:
+        return (1.0,)
+    ideal = [0.0, 1.0 / k] + [1.0 / (d * (d - 1)) for d in range(2, k + 1)]
+    r = c * math.log(k / delta) * math.sqrt(k)
+    spike = max(1, min(k, int(round(k / r))))
+    robust = [0.0] * (k + 1)
+    for d in range(1, spike):
+        robust[d] = r / (d * k)
+    robust[spike] += r * math.log(r / delta) / k if r > delta else 0.0
+    weights = [ideal[d] + robust[d] for d in range(k + 1)]
+    total = sum(weights)
+    cdf = []
+    acc = 0.0
+    for weight in weights[1:]:
+        acc += weight / total
+        cdf.append(acc)
+    return tuple(cdf)
+
+
+def symbol_blocks(seed, esi, k):
+    """
+    أرقام الكتل التي يجمعها الرمز esi (بـ XOR): ثابتة لنفس (seed، esi، k) في المرسل والمستقبل.
+    رموز الإصلاح = كتل LT (عددها من Robust Soliton) مع log2(k) + 2 كتل عشوائية إضافية (مثل Raptor)،
+    فالمعادلات تبقى مستقلة مع k صغيرة ويكفي المستقبل هامش رمز أو رمزين فوق k في المتوسط.
+    """
+    if esi < k:
+        return [esi]
+    state = ((seed * 0x9E3779B1) ^ (esi * 0x85EBCA77) ^ 0x27D4EB2F) & 0xffffffff or 1
+    state = _xorshift(_xorshift(state))
+    cdf = robust_soliton_cdf(k)
+    draw = state / 2.0 ** 32
+    degree = next((d for d, p in enumerate(cdf, 1) if draw < p), k)
+    blocks = set()
+    while len(blocks) < degree:
+        state = _xorshift(state)
+        blocks.add(state % k)
+    for _ in range(k.bit_length() + 1):
+        state = _xorshift(state)
+        blocks ^= {state % k}
+    return sorted(blocks) or [state % k]
+
+
+class FountainEncoder:
+    """تقسيم البيانات إلى k كتلة بطول symbol_size، وتوليد أي رمز esi منها."""
+    def __init__(self, data, symbol_size, seed=0):
+        self.length = len(data)
+        self.symbol_size = symbol_size
+        self.seed = seed
+        self.k = max(1, -(-len(data) // symbol_size))
+        padded = bytes(data) + bytes(self.k * symbol_size - len(data))
+        self.blocks = [int.from_bytes(padded[i * symbol_size:(i + 1) * symbol_size], 'big') for i in range(self.k)]
+
+    def symbol(self, esi):
+        value = 0
+        for block in symbol_blocks(self.seed, esi, self.k):
+            value ^= self.blocks[block]
+        return value.to_bytes(self.symbol_size, 'big')
+
+
+class FountainDecoder:
+    """
+    فك الترميز بحذف Gauss تدريجي على GF(2): كل رمز يُختزل بالمعادلات السابقة عند وصوله،
+    فالرموز المكررة أو الزائدة لا تكلف شيئاً، وتُحل الكتل عندما تصبح الرتبة k.
+    الكتل ومعاملاتها أعداد صحيحة (int) لأن XOR عليها سريع في Python.
+    """
+    def __init__(self, k, length, symbol_size, seed=0):
+        self.k = k
+        self.length = length
+        self.symbol_size = symbol_size
+        self.seed = seed
+        self.rows = {}  # أدنى بت في المعاملات → (المعاملات، القيمة)
+        self.received = 0
+        self.data = None
+
+    @property
+    def complete(self):
+        return self.data is not None
+
+    def add(self, esi, symbol):
+        """إضافة رمز. يعيد البيانات الكاملة عند اكتمال الفك، وإلا None."""
+        if self.data is not None:
+            return self.data
+        self.received += 1
+        mask = 0
+        for block in symbol_blocks(self.seed, esi, self.k):
+            mask ^= 1 << block
+        value = int.from_bytes(symbol, 'big')
+        while mask:
+            pivot = (mask & -mask).bit_length() - 1
+            row = self.rows.get(pivot)
+            if row is None:
+                self.rows[pivot] = (mask, value)
+                break
+            mask ^= row[0]
+            value ^= row[1]
+        if len(self.rows) == self.k:
+            self.data = self._solve()
+        return self.data
+
+    def _solve(self):
+        # التعويض العكسي: من أعلى كتلة إلى أدناها، كل معادلة تحتوي كتلتها وكتلاً أعلى فقط
+        blocks = [0] * self.k
+        for pivot in range(self.k - 1, -1, -1):
+            mask, value = self.rows[pivot]
+            mask ^= 1 << pivot
+            while mask:
+                low = mask & -mask
+                value ^= blocks[low.bit_length() - 1]
+                mask ^= low
+            blocks[pivot] = value
+        data = b"".join(block.to_bytes(self.symbol_size, 'big') for block in blocks)
+        return data[:self.length]
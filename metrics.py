@@ -0,0 +1,378 @@
+import io
+import json
+import os
+import signal
+import threading
+import time
+import tracemalloc
+import cProfile
+import pstats
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# طبقة قياس خفيفة لمراحل المحطة: مؤقتات وعدادات في الذاكرة (قفل واحد، بلا مكتبات خارجية)،
+# تُقرأ بصيغة Prometheus أو JSON عبر HTTP، أو تُكتب كسطر JSON دوري في ملف (JSON Lines).
+# المراحل: fetch (جلب من الشبكة)، compress (ضغط/فروقات)، pack (FEC وتوزيع البتات على الإطارات)،
+# render (توليد الإطارات، شاملة pack)، wav_write (كتابة الملف)، stream (الإرسال إلى Icecast)، decode.
+# المحلل cProfile وتتبع الذاكرة tracemalloc يُشغلان ويُوقفان أثناء العمل (HTTP أو إشارة) دون إعادة نشر.
+# العدادات لكل عملية: ما يجري داخل عمليات parallel_codec يظهر كزمن المرحلة الكلي في العملية الرئيسية.
+
+# الإعدادات من البيئة السحابية: المنفذ (0 = بلا خادم HTTP)، ملف JSON Lines وفترته، وإيقاف القياس كلياً
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LOG = os.getenv("METRICS_LOG", "")
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "60"))
+METRICS_PROFILE_PATH = os.getenv("METRICS_PROFILE_PATH", "metrics_profile.txt")
+PREFIX = "radio"
+# عدد الدوال (أو أسطر التخصيص) في تقارير المحلل و tracemalloc
+REPORT_LINES = 30
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """مؤقت مرحلة واحدة (with). عند تشغيل المحلل تُحلل المرحلة الخارجية في كل خيط."""
+    __slots__ = ("metrics", "name", "started", "profile")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        if self.metrics.profiling and not getattr(self.metrics._local, "profiling", False):
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+                self.metrics._local.profiling = True
+            except ValueError:
+                # محلل آخر يعمل في هذه العملية: تُقاس المرحلة بدون تحليل
+                self.profile = None
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if self.profile is not None:
+            self.profile.disable()
+            self.metrics._local.profiling = False
+            self.metrics._merge_profile(self.profile)
+        self.metrics.observe(self.name, elapsed)
+        return False
+
+
+class Metrics:
+    """
+    سجل المؤقتات والعدادات:
+    - timer(stage): زمن كل مرحلة (العدد، المجموع، الأقصى). المراحل المتداخلة تُحسب كلٌّ بزمنها الكامل.
+    - count(name, value): عدادات تراكمية (بايتات الدخول والخروج، الحزم...).
+    - add_source(name, stats): دالة stats() لمكوّن (التخزين المؤقت، الخدمة، Icecast) تُقرأ عند كل لقطة،
+      ومنها نسب الإصابة.
+    - snapshot() / prometheus(): لقطة كاملة مع القيم المشتقة (نسبة الضغط، البتات الفعلية على الهواء في الثانية).
+    """
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self.counters = {}
+        self.stages = {}       # المرحلة → [العدد، مجموع الثواني، أقصى زمن]
+        self.sources = {}
+        self.profiling = False
+        self._profile_stats = None
+        self._tracemalloc_start = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._server = None
+        self._logger = None
+        self._stopped = threading.Event()
+
+    def timer(self, stage):
+        return _Stage(self, stage) if self.enabled else _NULL_STAGE
+
+    def timed(self, stage):
+        """مزخرف (decorator): قياس كل استدعاء للدالة كمرحلة stage."""
+        def decorate(func):
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            return wrapper
+        return decorate
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def compression(self, kind, original, compressed):
+        """بايتات الدخول والخروج لعملية ضغط من نوع kind (text / image / delta)، لنسبة الضغط لكل نوع."""
+        self.count(f"compress_{kind}_bytes_in", original)
+        self.count(f"compress_{kind}_bytes_out", compressed)
+
+    def add_source(self, name, stats):
+        """تسجيل دالة stats() لمكوّن باسم name (تسجيل الاسم نفسه مرة أخرى يستبدل الدالة)."""
+        with self._lock:
+            self.sources[name] = stats
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.stages.clear()
+        self.started_at = time.time()
+
+    def snapshot(self):
+        """كل القيم الحالية كقاموس قابل للتحويل إلى JSON."""
+        with self._lock:
+            counters = dict(self.counters)
+            stages = {name: {"count": count, "seconds": total, "max_seconds": longest}
+                      for name, (count, total, longest) in self.stages.items()}
+            sources = dict(self.sources)
+        snapshot = {
+            "time": time.time(),
+            "uptime_seconds": time.time() - self.started_at,
+            "counters": counters,
+            "stages": stages,
+            "derived": self._derived(counters),
+            "sources": {},
+            "profiling": self.profiling,
+            "tracemalloc": tracemalloc.is_tracing(),
+        }
+        for name, stats in sources.items():
+            try:
+                snapshot["sources"][name] = _numeric(stats())
+            except Exception as e:
+                snapshot["sources"][name] = {"error": str(e)}
+        return snapshot
+
+    @staticmethod
+    def _derived(counters):
+        derived = {}
+        for name, value in counters.items():
+            if name.startswith("compress_") and name.endswith("_bytes_in"):
+                kind = name[len("compress_"):-len("_bytes_in")]
+                compressed = counters.get(f"compress_{kind}_bytes_out")
+                if compressed:
+                    derived[f"compression_ratio_{kind}"] = value / compressed
+        if counters.get("on_air_seconds"):
+            # بتات الحمولة (قبل FEC) لكل ثانية بث، شاملة كلفة Preamble والترويسة والفجوات
+            derived["on_air_bits_per_second"] = counters.get("payload_bytes", 0) * 8 / counters["on_air_seconds"]
+        if counters.get("decode_packets"):
+            derived["decode_failure_rate"] = counters.get("decode_failed", 0) / counters["decode_packets"]
+        return derived
+
+    def prometheus(self):
+        """اللقطة بصيغة Prometheus النصية (text exposition 0.0.4)."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {_number(value)}"]
+        if snapshot["stages"]:
+            lines.append(f"# TYPE {PREFIX}_stage_seconds summary")
+            for name, stage in sorted(snapshot["stages"].items()):
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {_number(stage["seconds"])}')
+            lines.append(f"# TYPE {PREFIX}_stage_seconds_max gauge")
+            for name, stage in sorted(snapshot["stages"].items()):
+                lines.append(f'{PREFIX}_stage_seconds_max{{stage="{name}"}} {_number(stage["max_seconds"])}')
+        gauges = dict(snapshot["derived"], uptime_seconds=snapshot["uptime_seconds"],
+                      profiling=snapshot["profiling"], tracemalloc=snapshot["tracemalloc"])
+        for source, stats in sorted(snapshot["sources"].items()):
+            gauges.update({f"{source}_{key}": value for key, value in stats.items() if key != "error"})
+        for name, value in sorted(gauges.items()):
+            metric = f"{PREFIX}_{name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+    # --- المحلل وتتبع الذاكرة أثناء العمل ---
+
+    def start_profile(self):
+        with self._lock:
+            self._profile_stats = None
+        self.profiling = True
+
+    def stop_profile(self):
+        """إيقاف المحلل وإرجاع تقرير نصي بأثقل الدوال (زمن تراكمي) داخل المراحل المقاسة."""
+        self.profiling = False
+        with self._lock:
+            stats, self._profile_stats = self._profile_stats, None
+        if stats is None:
+            return "No profiled stages.\n"
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats("cumulative").print_stats(REPORT_LINES)
+        return output.getvalue()
+
+    def _merge_profile(self, profile):
+        with self._lock:
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profile)
+            else:
+                self._profile_stats.add(profile)
+
+    def start_tracemalloc(self, frames=10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._tracemalloc_start = tracemalloc.take_snapshot()
+
+    def stop_tracemalloc(self):
+        """إيقاف التتبع وإرجاع أكبر الزيادات في الذاكرة منذ التشغيل (حسب السطر)."""
+        if not tracemalloc.is_tracing():
+            return "tracemalloc is not running.\n"
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        start, self._tracemalloc_start = self._tracemalloc_start, None
+        stats = snapshot.compare_to(start, "lineno") if start is not None else snapshot.statistics("lineno")
+        lines = [f"traced: {current / 1e6:.1f} MB, peak: {peak / 1e6:.1f} MB"]
+        lines += [str(stat) for stat in stats[:REPORT_LINES]]
+        return "\n".join(lines) + "\n"
+
+    def toggle_profile(self, path=METRICS_PROFILE_PATH):
+        """تبديل المحلل (لإشارة SIGUSR1): عند الإيقاف يُكتب التقرير إلى path."""
+        if not self.profiling:
+            self.start_profile()
+            print(f"[{time.ctime()}] Profiling started")
+            return
+        self._write_report(path, self.stop_profile())
+
+    def toggle_tracemalloc(self, path=METRICS_PROFILE_PATH):
+        """تبديل tracemalloc (لإشارة SIGUSR2): عند الإيقاف يُكتب التقرير إلى path."""
+        if not tracemalloc.is_tracing():
+            self.start_tracemalloc()
+            print(f"[{time.ctime()}] tracemalloc started")
+            return
+        self._write_report(path, self.stop_tracemalloc())
+
+    @staticmethod
+    def _write_report(path, report):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"[{time.ctime()}] Profile report written to {path}")
+
+    # --- التصدير ---
+
+    def start(self, port=METRICS_PORT, host=METRICS_HOST, log_path=METRICS_LOG, interval=METRICS_LOG_INTERVAL,
+              signals=True):
+        """
+        تشغيل التصدير حسب الإعدادات: خادم HTTP على port (إذا لم يكن صفراً)، سطر JSON كل interval ثانية
+        في log_path (إذا حُدد)، وإشارتا SIGUSR1 (المحلل) و SIGUSR2 (tracemalloc) عند الاستدعاء من الخيط الرئيسي.
+        """
+        self._stopped.clear()
+        if port and self._server is None:
+            self._server = ThreadingHTTPServer((host, port), _handler(self))
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"[{time.ctime()}] Metrics on http://{host}:{self._server.server_port}/metrics")
+        if log_path and self._logger is None:
+            self._logger = threading.Thread(target=self._log_loop, args=(log_path, interval),
+                                            name="metrics-log", daemon=True)
+            self._logger.start()
+        if signals and hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle_profile())
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.toggle_tracemalloc())
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._logger is not None:
+            self._logger.join()
+            self._logger = None
+
+    def log_line(self, path):
+        """إضافة لقطة واحدة كسطر JSON إلى path."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False) + "\n")
+
+    def _log_loop(self, path, interval):
+        while not self._stopped.wait(interval):
+            self.log_line(path)
+        # لقطة أخيرة عند الإيقاف
+        self.log_line(path)
+
+
+def _numeric(stats, prefix=""):
+    """القيم الرقمية من قاموس stats() (القواميس المتداخلة بأسماء مركبة، والنصوص و None تُهمل)."""
+    values = {}
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(_numeric(value, f"{name}_"))
+        elif isinstance(value, (bool, int, float)):
+            values[name] = value
+    return values
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def _started(start, name):
+    start()
+    return f"{name} started.\n"
+
+
+def _handler(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """
+        GET /metrics (Prometheus)، /metrics.json، و /profile/start|stop و /tracemalloc/start|stop
+        (الإيقاف يعيد التقرير النصي).
+        """
+        routes = {
+            "/metrics": lambda: ("text/plain; version=0.0.4", metrics.prometheus()),
+            "/metrics.json": lambda: ("application/json", json.dumps(metrics.snapshot(), ensure_ascii=False)),
+            "/profile/start": lambda: ("text/plain", _started(metrics.start_profile, "Profiling")),
+            "/profile/stop": lambda: ("text/plain", metrics.stop_profile()),
+            "/tracemalloc/start": lambda: ("text/plain", _started(metrics.start_tracemalloc, "tracemalloc")),
+            "/tracemalloc/stop": lambda: ("text/plain", metrics.stop_tracemalloc()),
+        }
+
+        def do_GET(self):
+            route = self.routes.get(self.path.split("?", 1)[0])
+            if route is None:
+                self.send_error(404)
+                return
+            content_type, body = route()
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+# السجل المشترك لكل وحدات العملية
+METRICS = Metrics()
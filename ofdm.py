@@ -0,0 +1,145 @@
+import numpy as np
+from functools import lru_cache
+from scipy.fft import rfft, irfft
+
+# عدد البتات لكل حامل فرعي في كل نوع تعديل
+BITS_PER_CARRIER = {"qpsk": 2, "qam16": 4}
+
+# مستويات 16-QAM على كل محور بترميز Gray: (b0, b1) = 00 → -3، 01 → -1، 10 → +3، 11 → +1
+_QAM16_LEVELS = np.array([-3.0, -1.0, 3.0, 1.0])
+
+# أقصى مقدار لنسبة الاحتمال اللوغاريتمية (LLR) للبت الواحد في القرارات المرنة:
+# بت واحد "واثق جداً" لا يجب أن يطغى على عدة دورات متفقة عند الجمع
+LLR_LIMIT = 16.0
+
+
+class OFDMModem:
+    """
+    تعديل OFDM: كل حامل فرعي يقع على خانة FFT دقيقة (k × sample_rate / n) فتبقى الحوامل متعامدة،
+    وكل رمز مسبوق ببادئة دورية (Cyclic Prefix) بدلاً من الفجوة الصامتة، فلا تتداخل الرموز
+    مع الصدى ولا يضيع وقت البث في الصمت.
+    كل pilot_spacing حامل يوجد حامل دليلي (Pilot) بقيمة معروفة لتقدير القناة (الكسب والطور)
+    وانحراف التوقيت في كل رمز، ثم تُعدّل البيانات بـ QPSK أو 16-QAM.
+    """
+    def __init__(self, sample_rate, freq_min, freq_max, symbol_duration, modulation="qpsk",
+                 cp_ratio=0.25, pilot_spacing=8):
+        self.modulation = modulation
+        self.bits_per_carrier = BITS_PER_CARRIER[modulation]
+        self.n = int(sample_rate * symbol_duration)
+        self.cp = int(self.n * cp_ratio)
+        # نافذة FFT تبدأ قبل نهاية البادئة بربعها: هامش أمان لأخطاء التوقيت المبكرة
+        self.early = self.cp // 4
+        self.window_offset = self.cp - self.early
+        self.symbol_size = self.cp + self.n
+
+        # الحوامل: كل خانات FFT داخل نطاق الترددات
+        carriers = np.arange(int(np.ceil(freq_min * self.n / sample_rate)),
+                             int(np.floor(freq_max * self.n / sample_rate)) + 1)
+        is_pilot = np.zeros(len(carriers), dtype=bool)
+        is_pilot[::pilot_spacing] = True
+        is_pilot[-1] = True
+        self.pilot_spacing = pilot_spacing
+        self.pilots = carriers[is_pilot]
+        self.data_carriers = carriers[~is_pilot]
+        # قيم الحوامل الدليلية: سعة ثابتة وطور متغير (تسلسل Chu) لتقليل ذروة الإشارة
+        index = np.arange(len(self.pilots))
+        self.pilot_values = np.exp(1j * np.pi * index * index / len(self.pilots))
+        self.bits_per_symbol = len(self.data_carriers) * self.bits_per_carrier
+
+        # أوزان الاستيفاء الخطي لتقدير القناة عند حوامل البيانات من الحوامل الدليلية المجاورة
+        left = np.searchsorted(self.pilots, self.data_carriers) - 1
+        self._left = left
+        self._weight = (self.data_carriers - self.pilots[left]) / (self.pilots[left + 1] - self.pilots[left])
+        self._early_phase = np.exp(2j * np.pi * np.arange(self.n // 2 + 1) * self.early / self.n)
+
+    def num_symbols(self, num_bits):
+        return -(-num_bits // self.bits_per_symbol)
+
+    def bits_to_symbols(self, bits):
+        """تقسيم البتات إلى مصفوفة (الرموز × بتات الرمز) مع حشو آخر رمز بالأصفار."""
+        num_symbols = self.num_symbols(len(bits))
+        padded = np.zeros(num_symbols * self.bits_per_symbol, dtype=np.uint8)
+        padded[:len(bits)] = bits
+        return padded.reshape(num_symbols, self.bits_per_symbol)
+
+    def map_bits(self, bits):
+        """بتات (الرموز × بتات الرمز) → نقاط الكوكبة (الرموز × حوامل البيانات)، بمتوسط قدرة 1."""
+        bits = bits.reshape(len(bits), -1, self.bits_per_carrier).astype(np.intp)
+        if self.modulation == "qpsk":
+            return ((1 - 2 * bits[..., 0]) + 1j * (1 - 2 * bits[..., 1])) / np.sqrt(2)
+        in_phase = _QAM16_LEVELS[bits[..., 0] * 2 + bits[..., 1]]
+        quadrature = _QAM16_LEVELS[bits[..., 2] * 2 + bits[..., 3]]
+        return (in_phase + 1j * quadrature) / np.sqrt(10)
+
+    def demap(self, points):
+        """قرار صلب: نقاط الكوكبة → بتات (الرموز × بتات الرمز)."""
+        if self.modulation == "qpsk":
+            bits = np.stack((points.real < 0, points.imag < 0), axis=-1)
+        else:
+            in_phase = points.real * np.sqrt(10)
+            quadrature = points.imag * np.sqrt(10)
+            bits = np.stack((in_phase > 0, np.abs(in_phase) < 2, quadrature > 0, np.abs(quadrature) < 2), axis=-1)
+        return bits.reshape(len(points), -1).astype(np.uint8)
+
+    def demap_soft(self, points, weights):
+        """
+        قرار مرن: نقاط الكوكبة → LLR تقريبي (الرموز × بتات الرمز)، موجب = 1.
+        تباين الضجيج يُقدَّر من انحراف النقاط عن أقرب نقطة كوكبة (EVM)، و weights موثوقية كل حامل
+        (|H|² نسبةً للمتوسط): الحامل الضعيف يضخم التسوية ضجيجه فيقل وزنه.
+        """
+        scale = np.sqrt(2) if self.modulation == "qpsk" else np.sqrt(10)
+        error = (points - self.map_bits(self.demap(points))) * scale
+        noise = max(float(np.mean(error.real ** 2 + error.imag ** 2)) / 2, 1e-6)
+        in_phase = points.real * scale
+        quadrature = points.imag * scale
+        if self.modulation == "qpsk":
+            soft = np.stack((-in_phase, -quadrature), axis=-1)
+        else:
+            soft = np.stack((in_phase, 2 - np.abs(in_phase), quadrature, 2 - np.abs(quadrature)), axis=-1)
+        llr = soft * (2 / noise) * weights[..., np.newaxis]
+        return np.clip(llr.reshape(len(points), -1), -LLR_LIMIT, LLR_LIMIT).astype(np.float32)
+
+    def modulate(self, bits):
+        """بتات (الرموز × بتات الرمز) → إشارة زمنية (الرموز × (البادئة + n)) مطبّعة لكل رمز."""
+        spectrum = np.zeros((len(bits), self.n // 2 + 1), dtype=np.complex128)
+        spectrum[:, self.pilots] = self.pilot_values
+        spectrum[:, self.data_carriers] = self.map_bits(bits)
+        symbols = irfft(spectrum, self.n, axis=1)
+        symbols = np.concatenate((symbols[:, -self.cp:], symbols), axis=1)
+        peaks = np.max(np.abs(symbols), axis=1, keepdims=True)
+        peaks[peaks == 0] = 1.0
+        return (symbols / peaks).astype(np.float32)
+
+    def demodulate(self, windows, soft=False):
+        """
+        نوافذ FFT (الرموز × n)، كل نافذة تبدأ عند بداية الرمز + window_offset →
+        (بتات (الرموز × بتات الرمز)، انحراف التوقيت المقدر لكل رمز بالعينات: موجب = الرمز متأخر).
+        soft=True: قيم مرنة (demap_soft) بدلاً من البتات.
+        """
+        spectrum = rfft(windows, axis=1) * self._early_phase
+        channel = spectrum[:, self.pilots] / self.pilot_values
+
+        # تأخر النافذة عن موقعها الصحيح يظهر كميل خطي في طور القناة عبر الحوامل
+        steps = channel[:, 1:-1] * np.conj(channel[:, :-2])
+        slope = np.angle(np.sum(steps, axis=1))
+        lateness = slope * self.n / (2 * np.pi * self.pilot_spacing)
+
+        # إزالة الميل قبل الاستيفاء ثم إعادته عند حوامل البيانات
+        unrotate = np.exp(-2j * np.pi * np.outer(lateness, self.pilots) / self.n)
+        flat = channel * unrotate
+        estimate = (1 - self._weight) * flat[:, self._left] + self._weight * flat[:, self._left + 1]
+        estimate *= np.exp(2j * np.pi * np.outer(lateness, self.data_carriers) / self.n)
+        estimate[estimate == 0] = 1e-12
+
+        points = spectrum[:, self.data_carriers] / estimate
+        # النافذة المتأخرة تعني أن الرمز وصل مبكراً
+        if soft:
+            power = np.abs(estimate) ** 2
+            return self.demap_soft(points, power / max(float(np.mean(power)), 1e-12)), -lateness
+        return self.demap(points), -lateness
+
+
+@lru_cache(maxsize=16)
+def get_modem(sample_rate, freq_min, freq_max, symbol_duration, modulation):
+    """مودم OFDM مخزن مؤقتاً لكل تركيبة إعدادات."""
+    return OFDMModem(sample_rate, freq_min, freq_max, symbol_duration, modulation)
@@ -0,0 +1,210 @@
+import struct
+import zlib
+from collections import OrderedDict
+from fountain import FountainEncoder, FountainDecoder
+
+# حزمة البث الثنائية (بدلاً من النص "TYPE:...|DATA:...|END"):
+# magic (1) | type (1) | flags (1) | codec (1) | message_id (2) | segment (1) | total (1) | length (2) | body | crc32 (4)
+# codec: رقم الضاغط (وقاموسه) من compression.py، ليعرف المستقبل كيف يفك الضغط
+# الرسائل الكبيرة تُقسم إلى أجزاء (Segments) متتالية في نفس البث، وكل جزء يُتحقق منه بـ CRC32 على حدة
+PACKET_MAGIC = 0xA7
+PACKET_FORMAT = ">BBBBHBBH"
+PACKET_HEADER_SIZE = struct.calcsize(PACKET_FORMAT)
+PACKET_OVERHEAD = PACKET_HEADER_SIZE + 4
+SEGMENT_SIZE = 2048
+MAX_SEGMENTS = 255
+
+# أنواع الحزم
+# IML: طبقة من صورة متدرجة (progressive_image.py)، كل طبقة رسالة مستقلة
+PACKET_TYPES = {"TXT": 1, "WEB": 2, "IMG": 3, "YT": 4, "ERR": 5, "KEY": 6, "DLT": 7, "FTN": 8, "IML": 9}
+PACKET_TYPE_NAMES = {value: name for name, value in PACKET_TYPES.items()}
+
+# الأعلام (Flags)
+FLAG_XOR = 0x01   # البيانات مشفرة بالمفتاح السري (النسخة المحمية)
+FLAG_META = 0x02  # البيانات مسبوقة ببيانات وصفية (مثل الرابط): طول (2) + meta
+
+# رموز النافورة (FTN): كل رمز حزمة مستقلة بـ CRC32، وجسمها = length (4) + k (2) + esi (2) + الرمز.
+# البيانات المرمزة هي بايتات البث كاملة (حزم الرسالة العادية)، وmessage_id هو بذرة اختيار الكتل.
+FOUNTAIN_FORMAT = ">IHH"
+FOUNTAIN_HEADER_SIZE = struct.calcsize(FOUNTAIN_FORMAT)
+FOUNTAIN_SYMBOL_SIZE = 192
+MAX_FOUNTAIN_BLOCKS = 256  # الفك بحذف Gauss يكلف O(k²): البيانات الكبيرة تُقسم إلى رموز أكبر بدلاً من رموز أكثر
+
+
+def encode_packet(packet_type, body, message_id=0, segment=0, total=1, flags=0, codec=0):
+    """بناء جزء واحد: ترويسة + body + CRC32."""
+    if isinstance(packet_type, str):
+        packet_type = PACKET_TYPES[packet_type]
+    header = struct.pack(PACKET_FORMAT, PACKET_MAGIC, packet_type, flags, codec, message_id, segment, total,
+                         len(body))
+    packet = header + bytes(body)
+    return packet + struct.pack(">I", zlib.crc32(packet))
+
+
+def decode_packet(data, offset=0):
+    """
+    قراءة جزء يبدأ عند offset. يعيد (قاموس الحقول، موقع الجزء التالي)،
+    أو (None، offset) إذا لم يكن هناك جزء صالح عند هذا الموقع (ترويسة تالفة أو CRC خاطئ).
+    """
+    end = offset + PACKET_HEADER_SIZE
+    if end > len(data) or data[offset] != PACKET_MAGIC:
+        return None, offset
+    _, packet_type, flags, codec, message_id, segment, total, length = struct.unpack_from(PACKET_FORMAT, data, offset)
+    if end + length + 4 > len(data) or segment >= total:
+        return None, offset
+    crc = struct.unpack_from(">I", data, end + length)[0]
+    if zlib.crc32(data[offset:end + length]) != crc:
+        return None, offset
+    packet = {
+        "type": PACKET_TYPE_NAMES.get(packet_type, packet_type),
+        "flags": flags,
+        "codec": codec,
+        "message_id": message_id,
+        "segment": segment,
+        "total": total,
+        "body": bytes(data[end:end + length]),
+    }
+    return packet, end + length + 4
+
+
+def iter_packets(data):
+    """
+    استخراج كل الأجزاء الصالحة من بايتات مستقبلة. عند جزء تالف يتم البحث عن magic التالي،
+    فتلف جزء واحد لا يُفقد بقية الأجزاء.
+    """
+    data = memoryview(bytes(data))
+    offset = 0
+    while offset + PACKET_OVERHEAD <= len(data):
+        packet, next_offset = decode_packet(data, offset)
+        if packet is None:
+            offset += 1
+            continue
+        yield packet
+        offset = next_offset
+
+
+def message_id_for(packet_type, data, meta=b""):
+    """رقم الرسالة الافتراضي: مشتق من المحتوى، فنفس المحتوى يعطي نفس البايتات (ويستفيد من RenderCache)."""
+    return zlib.crc32(bytes([PACKET_TYPES.get(packet_type, 0)]) + meta + data) & 0xffff
+
+
+def encode_message(packet_type, data, flags=0, meta=None, message_id=None, segment_size=SEGMENT_SIZE, codec=0):
+    """
+    بناء رسالة كاملة للبث (نوع الحزمة "WEB" / "IMG" / "TXT" / "YT" / "ERR").
+    meta (مثل الرابط) تُحفظ قبل البيانات، والرسالة تُقسم إلى أجزاء بحجم segment_size على الأكثر.
+    codec: رقم الضاغط الذي ضُغطت به data (0 = بدون ضغط).
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if isinstance(meta, str):
+        meta = meta.encode('utf-8')
+    data = bytes(data)
+    if meta is not None:
+        flags |= FLAG_META
+        data = struct.pack(">H", len(meta)) + meta + data
+    if message_id is None:
+        message_id = message_id_for(packet_type, bytes([codec]) + data)
+
+    total = max(1, -(-len(data) // segment_size))
+    if total > MAX_SEGMENTS:
+        raise ValueError(f"الرسالة كبيرة جداً: {len(data)} بايت تحتاج {total} جزء (الحد {MAX_SEGMENTS})")
+    return b"".join(encode_packet(packet_type, data[i * segment_size:(i + 1) * segment_size],
+                                  message_id, i, total, flags, codec)
+                    for i in range(total))
+
+
+def fountain_layout(length, symbol_size=FOUNTAIN_SYMBOL_SIZE):
+    """(عدد الكتل k، طول الرمز) لبيانات بطول length."""
+    symbol_size = max(symbol_size, -(-length // MAX_FOUNTAIN_BLOCKS))
+    return max(1, -(-length // symbol_size)), symbol_size
+
+
+def encode_fountain(data, esis, symbol_size=FOUNTAIN_SYMBOL_SIZE):
+    """
+    رموز النافورة esis (مثل range(0, 2 * k)) للبيانات data كحزم FTN متتالية.
+    الرموز 0..k-1 هي البيانات نفسها مقسمة، وما بعدها رموز إصلاح جديدة لا تتكرر.
+    """
+    data = bytes(data)
+    k, symbol_size = fountain_layout(len(data), symbol_size)
+    message_id = message_id_for("FTN", data)
+    encoder = FountainEncoder(data, symbol_size, seed=message_id)
+    return b"".join(encode_packet("FTN", struct.pack(FOUNTAIN_FORMAT, len(data), k, esi) + encoder.symbol(esi),
+                                  message_id)
+                    for esi in esis)
+
+
+class Reassembler:
+    """
+    تجميع الرسائل من أجزائها. يمكن تغذيته بعدة دورات Carousel متتالية:
+    كل جزء صالح يُحفظ، فتكتمل الرسالة حتى لو تلف جزء مختلف في كل دورة.
+    رموز النافورة (FTN) تُجمع لكل بث حتى يُفك، ثم تُعامل البايتات المفكوكة كأنها استُقبلت مباشرة.
+    """
+    def __init__(self, max_messages=64):
+        self.max_messages = max_messages
+        self.partial = OrderedDict()   # message_id → {segment: packet}
+        self.completed = OrderedDict()  # الرسائل المكتملة مؤخراً (لتجاهل التكرار في الدورات التالية)
+        self.fountains = OrderedDict()  # message_id → FountainDecoder
+        self.fountains_completed = OrderedDict()
+
+    def feed(self, data):
+        """إضافة بايتات مستقبلة، وإرجاع قائمة بالرسائل التي اكتملت."""
+        messages = []
+        for packet in iter_packets(data):
+            key = packet["message_id"]
+            if packet["type"] == "FTN":
+                messages += self._feed_fountain(packet)
+                continue
+            if key in self.completed:
+                continue
+            segments = self.partial.setdefault(key, {})
+            self.partial.move_to_end(key)
+            segments[packet["segment"]] = packet
+            if len(segments) == packet["total"]:
+                del self.partial[key]
+                self._remember(key)
+                messages.append(self._join(segments))
+            elif len(self.partial) > self.max_messages:
+                self.partial.popitem(last=False)
+        return messages
+
+    def _feed_fountain(self, packet):
+        key = packet["message_id"]
+        body = packet["body"]
+        if key in self.fountains_completed or len(body) <= FOUNTAIN_HEADER_SIZE:
+            return []
+        length, k, esi = struct.unpack_from(FOUNTAIN_FORMAT, body)
+        symbol = body[FOUNTAIN_HEADER_SIZE:]
+        decoder = self.fountains.get(key)
+        if decoder is None or (decoder.k, decoder.length, decoder.symbol_size) != (k, length, len(symbol)):
+            decoder = self.fountains[key] = FountainDecoder(k, length, len(symbol), seed=key)
+            if len(self.fountains) > self.max_messages:
+                self.fountains.popitem(last=False)
+        self.fountains.move_to_end(key)
+        data = decoder.add(esi, symbol)
+        if data is None:
+            return []
+        del self.fountains[key]
+        self.fountains_completed[key] = True
+        if len(self.fountains_completed) > self.max_messages:
+            self.fountains_completed.popitem(last=False)
+        return self.feed(data)
+
+    def _remember(self, key):
+        self.completed[key] = True
+        if len(self.completed) > self.max_messages:
+            self.completed.popitem(last=False)
+
+    def _join(self, segments):
+        first = segments[0]
+        data = b"".join(segments[i]["body"] for i in range(first["total"]))
+        meta = None
+        if first["flags"] & FLAG_META:
+            meta_length = struct.unpack(">H", data[:2])[0]
+            meta, data = data[2:2 + meta_length], data[2 + meta_length:]
+        return {"type": first["type"], "flags": first["flags"], "codec": first["codec"],
+                "message_id": first["message_id"], "meta": meta, "data": data}
+
+
+def decode_messages(data):
+    """كل الرسائل المكتملة في بايتات مستقبلة (دورة واحدة أو أكثر)."""
+    return Reassembler().feed(data)
@@ -0,0 +1,271 @@
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+from scipy.io import wavfile
+from advanced_fft_transmitter import wav_header, to_pcm
+from advanced_radio_receiver import StreamDecoder, first_decoded, pcm_to_float
+
+# الوضع المتوازي (اختياري) للتوليد وفك التشفير على عدة أنوية:
+# - التوليد: دفعات الإطارات (نفس دفعات iter_cycle_blocks) تتوزع على العمليات، وكل عملية تكتب كتلتها
+#   مباشرة في ملف WAV الناتج عبر mmap مشترك (لا تمر العينات عبر pickle)، فالملف مطابق بايتاً ببايت للتوليد المتتالي.
+# - الفك: كل دورة Carousel تُفك في عملية من ملف WAV مفتوح بـ mmap، والجمع المرن بين الدورات
+#   يتم في العملية الرئيسية بترتيب الدورات، فالنتيجة لا تتغير مع عدد العمليات.
+# - البوابة: عدة ردود مستقلة تُولَّد معاً، كل منها في عملية (submit_render).
+
+# ذاكرة مشتركة (tmpfs) للمخازن المؤقتة عندما لا يكون الناتج ملفاً على القرص
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+WAV_HEADER_SIZE = 44
+# البحث عن إشارات البداية على نوافذ ثابتة الطول (لا تعتمد على عدد العمليات)
+SCAN_SECONDS = 30
+CHUNK = 4410
+
+
+def render_plan(transmitter, payload, frame_duration=0.2, num_repeats=3, batch_frames=64):
+    """
+    تخطيط البث الكامل من carousel_layout: (عدد العينات، مواقع إشارات البداية، المهام).
+    كل مهمة (التعديل، الصفوف، مدة الإطار، مواقع الكتلة): دفعة واحدة من iter_cycle_blocks،
+    تُكتب في كل المواقع (مرة لكل تكرار للدورة). الفجوات صمت: الملف يُنشأ بالأصفار.
+    """
+    layout, num_samples = transmitter.carousel_layout(payload, frame_duration, num_repeats)
+    preamble_size = int(transmitter.sample_rate * transmitter.preamble_duration)
+    preambles = []
+    tasks = []
+    for item, fec, starts in layout:
+        preambles.extend(starts.tolist())
+        offset = preamble_size
+        for kind, rows, duration in transmitter.cycle_segments(item, frame_duration, fec):
+            block_size = transmitter.segment_length(kind, rows[:batch_frames], duration)
+            for start in range(0, len(rows), batch_frames):
+                tasks.append((kind, rows[start:start + batch_frames], duration, starts + offset))
+                offset += block_size
+    return num_samples, sorted(preambles), tasks
+
+
+def _render_block(task):
+    """(في عملية عاملة) توليد دفعة واحدة وكتابتها في مواقعها داخل ملف الناتج."""
+    transmitter, path, dtype, kind, rows, duration, positions = task
+    block = transmitter.segment_block(kind, rows, duration, dtype)
+    signal = np.memmap(path, dtype=dtype, mode='r+', offset=WAV_HEADER_SIZE)
+    for position in positions:
+        signal[position:position + len(block)] = block
+    signal.flush()
+    del signal
+
+
+def quiet_ends(signal, sample_rate, min_quiet=0.25, block=0.01):
+    """
+    مواقع نهايات المقاطع الهادئة الطويلة (≥ min_quiet ثانية): كل دورة تبدأ بعد فجوة الدورات (0.5 ثانية)،
+    بينما الفجوات بين الإطارات أقصر بكثير. الهادئ = طاقة الكتلة أقل من الوسط الهندسي لطاقة الفجوات والإطارات
+    (المئين 5 و 95)، فيبقى المعيار صالحاً مع الضجيج.
+    """
+    size = int(sample_rate * block)
+    blocks = len(signal) // size
+    if blocks == 0:
+        return np.zeros(0, dtype=np.intp)
+    energy = np.mean(np.square(signal[:blocks * size].reshape(blocks, size), dtype=np.float64), axis=1)
+    low, high = np.percentile(energy, [5, 95])
+    quiet = np.concatenate(([0], (energy <= np.sqrt(low * high)).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(quiet))
+    starts, ends = edges[::2], edges[1::2]
+    return ends[ends - starts >= int(min_quiet / block)] * size
+
+
+def _scan_preambles(task):
+    """
+    (في عملية عاملة) مواقع إشارات البداية التي تقع قممها في [start, stop) من ملف WAV.
+    الترابط يُحسب فقط حول بداية الملف ونهايات المقاطع الهادئة الطويلة (quiet_ends) بدلاً من كامل الإشارة.
+    """
+    receiver, filename, start, stop = task
+    _, data = wavfile.read(filename, mmap=True)
+    sample_rate = receiver.sample_rate
+    n = len(receiver.preamble_template())
+    # المقطع الهادئ الذي ينتهي عند start قد يبدأ قبله: تُقاس الطاقة من ثانية قبل النافذة
+    begin = max(start - sample_rate, 0)
+    window = pcm_to_float(data[begin:stop])
+    candidates = begin + quiet_ends(window, sample_rate)
+    if start == 0:
+        candidates = np.concatenate(([0], candidates))
+    pad = int(sample_rate * 0.05)
+    positions = []
+    for candidate in candidates[(candidates >= start - pad) & (candidates < stop + pad)]:
+        offset = max(int(candidate) - pad, 0)
+        segment = pcm_to_float(data[offset:int(candidate) + pad + n])
+        if len(segment) < n:
+            continue
+        positions.extend(int(offset + peak) for peak in receiver.find_preambles(segment)
+                         if start <= offset + peak < stop and offset + peak not in positions)
+    return positions
+
+
+class _CycleDecoder(StreamDecoder):
+    """يفك كل دورة منفردة دون جمع: الجمع يتم في العملية الرئيسية بترتيب الدورات."""
+    def _decode_packet(self, soft):
+        return self._decode_cycle(soft)
+
+
+def _decode_cycle_at(task):
+    """
+    (في عملية عاملة) فك الدورة التي تبدأ إشارتها عند position:
+    (position، آخر عينة قُرئت، نتيجة _decode_cycle) أو None إذا انتهى الملف قبل اكتمالها.
+    """
+    receiver, filename, position = task
+    _, data = wavfile.read(filename, mmap=True)
+    decoder = _CycleDecoder(receiver)
+    for start in range(position, len(data), CHUNK):
+        end = min(start + CHUNK, len(data))
+        packets = decoder.feed_packets(data[start:end])
+        if packets:
+            return position, end, packets[0]
+    packets = decoder.flush_packets()
+    return (position, len(data), packets[0]) if packets else None
+
+
+def _write_signal_file(transmitter, payload, path, frame_duration, num_repeats):
+    """(في عملية عاملة) توليد بث كامل إلى ملف، لتوليد عدة ردود معاً."""
+    transmitter.write_signal(payload, path, frame_duration=frame_duration, num_repeats=num_repeats)
+    return path
+
+
+class ParallelCodec:
+    """
+    مجمع عمليات للتوليد وفك التشفير المتوازيين (يُمرَّر كمعامل parallel إلى write_signal / generate_signal /
+    decode_signal، وتستخدمه البوابة في submit_render). workers=1 ينفذ نفس المسار في العملية نفسها.
+    العمليات تُنشأ بـ spawn (آمن مع الخيوط في البوابة والبث المقيم) عند أول استخدام وتبقى للمهام التالية.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        # نشر الملفات المولدة في التخزين المؤقت (من خيوط الإكمال) واحداً تلو الآخر
+        self._publish_lock = threading.Lock()
+        self._counter = itertools.count()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    def map(self, func, tasks):
+        """تنفيذ func على كل مهمة، والنتائج بترتيب المهام (مهما كان عدد العمليات)."""
+        if self.workers == 1:
+            return map(func, tasks)
+        return self.executor.map(func, tasks)
+
+    def submit(self, func, *args):
+        if self.workers == 1:
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.executor.submit(func, *args)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_signal(self, transmitter, payload, sink, frame_duration=0.2, num_repeats=3, dtype=np.int16,
+                     batch_frames=64):
+        """
+        مثل FFTTransmitter.write_signal: ملف WAV مطابق بايتاً ببايت، والدفعات تُولَّد على كل العمليات.
+        مسار: الكتابة مباشرة في الملف؛ كائن ملف: عبر ملف مؤقت في الذاكرة المشتركة ثم النسخ.
+        """
+        dtype = np.dtype(dtype)
+        if not isinstance(sink, (str, os.PathLike)):
+            with tempfile.NamedTemporaryFile(dir=SHARED_DIR, suffix=".wav") as tmp:
+                num_samples = self.write_signal(transmitter, payload, tmp.name, frame_duration, num_repeats,
+                                                dtype, batch_frames)
+                with open(tmp.name, 'rb') as f:
+                    shutil.copyfileobj(f, sink)
+            return num_samples
+
+        num_samples, preambles, tasks = render_plan(transmitter, payload, frame_duration, num_repeats, batch_frames)
+        with open(sink, 'wb') as f:
+            f.write(wav_header(num_samples, transmitter.sample_rate, dtype))
+            f.truncate(WAV_HEADER_SIZE + num_samples * dtype.itemsize)
+
+        path = os.fspath(sink)
+        for _ in self.map(_render_block, [(transmitter, path, dtype, *task) for task in tasks]):
+            pass
+        preamble = to_pcm(transmitter.preamble_signal(), dtype)
+        signal = np.memmap(path, dtype=dtype, mode='r+', offset=WAV_HEADER_SIZE)
+        for position in preambles:
+            signal[position:position + len(preamble)] = preamble
+        signal.flush()
+        del signal
+        return num_samples
+
+    def find_preambles(self, receiver, filename):
+        """مواقع كل إشارات البداية في ملف WAV (البحث موزع على نوافذ بطول SCAN_SECONDS)."""
+        _, data = wavfile.read(filename, mmap=True)
+        step = SCAN_SECONDS * receiver.sample_rate
+        tasks = [(receiver, filename, start, start + step) for start in range(0, len(data), step)]
+        return [position for positions in self.map(_scan_preambles, tasks) for position in positions]
+
+    def decode_packets(self, receiver, filename):
+        """
+        مثل RadioReceiver.decode_packets لملف WAV: كل دورة تُفك في عملية، والجمع المرن بترتيب الدورات.
+        الاختلاف عن الفك المتتالي: كل دورة تبدأ بتقدير جديد لمستويات القنوات والانحراف (لا تعتمد على الدورة
+        السابقة)، وهذا ما يجعل النتيجة واحدة مهما كان عدد العمليات.
+        """
+        combiner = StreamDecoder(receiver)
+        covered = 0
+        tasks = [(receiver, filename, position) for position in self.find_preambles(receiver, filename)]
+        for result in self.map(_decode_cycle_at, tasks):
+            if result is None:
+                continue
+            position, end, cycle = result
+            # ذروة ترابط داخل بيانات دورة سابقة ليست إشارة بداية (الفك المتتالي لا يبحث داخل الدورة)
+            if position < covered:
+                continue
+            covered = end
+            packet, stats = combiner.combine(*cycle)
+            receiver.last_packet_stats = stats
+            yield packet, stats
+
+    def decode_signal_bytes(self, receiver, filename):
+        if not os.path.exists(filename):
+            return None
+        return first_decoded(self.decode_packets(receiver, filename))
+
+    def submit_render(self, render_cache, transmitter, payload, frame_duration=0.2, num_repeats=3):
+        """
+        توليد رد كامل في عملية مستقلة (عدة ردود للبوابة تُولَّد معاً): Future بمسار الملف في التخزين المؤقت.
+        الملف المخزن مسبقاً يُعاد مباشرة دون توليد.
+        """
+        key = render_cache.key(transmitter, payload, frame_duration, num_repeats)
+        path = render_cache.lookup(key)
+        if path is not None:
+            future = Future()
+            future.set_result(path)
+            return future
+
+        path = render_cache.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{next(self._counter)}.tmp"
+        result = Future()
+
+        def publish(done):
+            try:
+                with self._publish_lock:
+                    os.replace(done.result(), path)
+                    render_cache.evict(keep=path)
+                result.set_result(path)
+            except Exception as e:
+                result.set_exception(e)
+
+        self.submit(_write_signal_file, transmitter, payload, tmp_path, frame_duration, num_repeats) \
+            .add_done_callback(publish)
+        return result
@@ -0,0 +1,181 @@
+import io
+import struct
+import zlib
+import numpy as np
+from PIL import Image
+from packet_codec import encode_message
+
+# صور متدرجة للبث: بدلاً من JPEG واحد لا يظهر منه شيء حتى آخر إطار، تُرسل الصورة كطبقات،
+# كل طبقة رسالة مستقلة (نوع IML) تُبث في دورة Carousel خاصة بها:
+# - الطبقة 0: معاينة رمادية صغيرة (16×16، 4 بت لكل بكسل، مضغوطة بـ zlib) بحوالي 100 بايت، تظهر بعد أول دورة قصيرة.
+# - الطبقات 1..n: أشرطة أفقية متتالية من JPEG واحد بعلامات إعادة التزامن (Restart Markers) عند كل صف MCU،
+#   فكل شريط يُكمل صفوفاً كاملة من الصورة النهائية دون تكرار أي بايت (بلا كلفة إضافية تقريباً على JPEG العادي).
+# مقاس الصورة وجودتها يُختاران لتتسع كل الطبقات (شاملة ترويسات الحزم) في ميزانية البايتات لكل طلب.
+
+# ترويسة الطبقة: رقم الصورة (2)، رقم الطبقة (1)، عدد الطبقات (1)، عرض وارتفاع الصورة النهائية (2+2)،
+# عدد الصفوف المكتملة بعد هذه الطبقة (2، صفر للمعاينة)
+LAYER_FORMAT = ">HBBHHH"
+LAYER_HEADER_SIZE = struct.calcsize(LAYER_FORMAT)
+PREVIEW_SIZE = (16, 16)
+DEFAULT_IMAGE_BUDGET = 1024
+# المقاسات والجودات المرشحة بترتيب التفضيل (الأكبر أولاً، ثم الجودة الأعلى)
+IMAGE_SIZES = (128, 96, 64, 48, 32)
+IMAGE_QUALITIES = (40, 30, 20)
+# كل طبقة دورة Carousel إضافية (~0.85 ثانية من Preamble والترويسة والفجوة)، فالافتراضي شريط واحد بعد المعاينة
+DEFAULT_BANDS = 1
+JPEG_EOI = b"\xff\xd9"
+
+
+def open_scaled(content, size, mode="RGB"):
+    """
+    فتح صورة مصغرة إلى size على الأكثر. لـ JPEG يُستخدم draft(): فك الترميز بمقياس 1/2..1/8 مباشرة من معاملات DCT
+    بدلاً من فك الصورة كاملة ثم تصغيرها.
+    """
+    img = Image.open(io.BytesIO(content))
+    img.draft(mode, size)
+    img = img.convert(mode)
+    img.thumbnail(size)
+    return img
+
+
+def preview_bytes(img, size=PREVIEW_SIZE):
+    """معاينة رمادية لصورة PIL: عرض (1)، ارتفاع (1)، ثم البكسلات بـ 4 بت (بكسلان في كل بايت) مضغوطة."""
+    preview = img.convert("L")
+    preview.thumbnail(size)
+    pixels = np.asarray(preview, dtype=np.uint8) >> 4
+    height, width = pixels.shape
+    flat = pixels.reshape(-1)
+    if len(flat) % 2:
+        flat = np.append(flat, 0)
+    packed = (flat[0::2] << 4 | flat[1::2]).astype(np.uint8)
+    return bytes([width, height]) + zlib.compress(packed.tobytes(), 9)
+
+
+def decode_preview(data):
+    width, height = data[0], data[1]
+    packed = np.frombuffer(zlib.decompress(data[2:]), dtype=np.uint8)
+    flat = np.stack((packed >> 4, packed & 0x0f), axis=1).reshape(-1)[:width * height]
+    # منتصف كل مستوى من المستويات الـ 16
+    return Image.fromarray((flat.reshape(height, width) * 17).astype(np.uint8), "L")
+
+
+def banded_jpeg(img, quality):
+    """
+    JPEG بعلامة إعادة تزامن بعد كل صف MCU: (البايتات، مواقع نهاية كل صف MCU، ارتفاع صف MCU بالبكسل).
+    القص بعد أي علامة ثم إضافة EOI يعطي صورة صالحة صفوفها الأولى مكتملة.
+    """
+    output = io.BytesIO()
+    # 4:2:0 للألوان: صف MCU = 16 بكسل (8 للرمادي)
+    img.save(output, format="JPEG", quality=quality, optimize=True, subsampling=2, restart_marker_rows=1)
+    data = output.getvalue()
+    scan = data.index(b"\xff\xda")
+    ends = [i + 2 for i in range(scan, len(data) - 1) if data[i] == 0xff and 0xd0 <= data[i + 1] <= 0xd7]
+    return data, ends + [len(data)], 8 if img.mode == "L" else 16
+
+
+def encode_layers(content, budget=DEFAULT_IMAGE_BUDGET, bands=DEFAULT_BANDS, sizes=IMAGE_SIZES,
+                  qualities=IMAGE_QUALITIES, image_id=None):
+    """
+    صورة (بايتات أي صيغة يفتحها Pillow) → قائمة رسائل IML (معاينة ثم bands شريط) مجموع أطوالها ≤ budget.
+    يُختار أكبر مقاس (ثم أعلى جودة) يتسع في الميزانية؛ إذا لم يتسع أي مقاس تُرسل المعاينة وحدها.
+    """
+    image_id = zlib.crc32(content) & 0xffff if image_id is None else image_id
+    # فك ترميز واحد للمصدر بأكبر مقاس مرشح، والمعاينة وكل المقاسات تُصغَّر منه
+    base = open_scaled(content, (max(sizes), max(sizes)))
+    preview = preview_bytes(base)
+    for size in sizes:
+        img = base.copy()
+        img.thumbnail((size, size))
+        for quality in qualities:
+            layers = _layer_messages(image_id, preview, img, quality, bands)
+            if sum(len(layer) for layer in layers) <= budget:
+                return layers
+    return [encode_message("IML", struct.pack(LAYER_FORMAT, image_id, 0, 1, 0, 0, 0) + preview)]
+
+
+def _layer_messages(image_id, preview, img, quality, bands):
+    data, row_ends, mcu_height = banded_jpeg(img, quality)
+    width, height = img.size
+    rows = len(row_ends)
+    bands = max(1, min(bands, rows))
+    # حدود الأشرطة عند صفوف MCU موزعة بالتساوي
+    cuts = [row_ends[round((band + 1) * rows / bands) - 1] for band in range(bands)]
+    layers = [struct.pack(LAYER_FORMAT, image_id, 0, bands + 1, width, height, 0) + preview]
+    start = 0
+    for band, cut in enumerate(cuts):
+        complete = min(round((band + 1) * rows / bands) * mcu_height, height)
+        layers.append(struct.pack(LAYER_FORMAT, image_id, band + 1, bands + 1, width, height, complete) +
+                      data[start:cut])
+        start = cut
+    return [encode_message("IML", layer) for layer in layers]
+
+
+def pack_layers(layers):
+    """قائمة رسائل الطبقات → بايتات واحدة (طول كل طبقة 4 بايت قبلها)، لتخزينها كشكل مشتق واحد."""
+    return b"".join(struct.pack(">I", len(layer)) + layer for layer in layers)
+
+
+def unpack_layers(data):
+    layers = []
+    offset = 0
+    while offset < len(data):
+        length = struct.unpack_from(">I", data, offset)[0]
+        layers.append(data[offset + 4:offset + 4 + length])
+        offset += 4 + length
+    return layers
+
+
+class ProgressiveImageDecoder:
+    """
+    تجميع طبقات الصور من رسائل IML (Reassembler) بأي ترتيب، وإرجاع أفضل صورة متاحة بعد كل طبقة:
+    المعاينة مكبرة، ثم صفوف JPEG المكتملة (الأشرطة المتصلة من الأول) فوقها.
+    """
+    def __init__(self):
+        self.images = {}   # رقم الصورة → {رقم الطبقة: (الترويسة، البيانات)}
+
+    def feed(self, message):
+        """رسالة مكتملة → (رقم الصورة، صورة PIL) إذا أضافت طبقة جديدة، وإلا None."""
+        if message["type"] != "IML" or len(message["data"]) < LAYER_HEADER_SIZE:
+            return None
+        header = struct.unpack_from(LAYER_FORMAT, message["data"])
+        image_id, index = header[0], header[1]
+        layers = self.images.setdefault(image_id, {})
+        if index in layers:
+            return None
+        layers[index] = (header, message["data"][LAYER_HEADER_SIZE:])
+        return image_id, self.image(image_id)
+
+    def complete(self, image_id):
+        layers = self.images.get(image_id, {})
+        return bool(layers) and len(layers) == next(iter(layers.values()))[0][2]
+
+    def image(self, image_id):
+        """أفضل صورة متاحة حالياً (أو None إذا لم تصل المعاينة ولا الشريط الأول)."""
+        layers = self.images.get(image_id, {})
+        if not layers:
+            return None
+        _, _, count, width, height, _ = next(iter(layers.values()))[0]
+        preview = decode_preview(layers[0][1]) if 0 in layers else None
+        if not width:
+            return preview
+
+        # الأشرطة المتصلة من الأول فقط (JPEG يُفك بالتتابع)
+        data = b""
+        complete = 0
+        for index in range(1, count):
+            if index not in layers:
+                break
+            data += layers[index][1]
+            complete = layers[index][0][5]
+        if complete == 0:
+            return preview and preview.convert("RGB").resize((width, height), Image.BILINEAR)
+        if complete < height and not data.endswith(JPEG_EOI):
+            data += JPEG_EOI
+        decoded = Image.open(io.BytesIO(data))
+        decoded.load()
+        decoded = decoded.convert("RGB")
+        if complete >= height or preview is None:
+            return decoded
+        result = preview.convert("RGB").resize((width, height), Image.BILINEAR)
+        result.paste(decoded.crop((0, 0, width, complete)), (0, 0))
+        return result
@@ -1,74 +1,168 @@
-import base64
-import zlib
-import requests
 from PIL import Image
 import io
+from concurrent.futures import as_completed
 from advanced_fft_transmitter import FFTTransmitter
+from render_cache import RenderCache
+from packet_codec import encode_message
+from compression import get_compressor, DEFAULT_COMPRESSOR
+from fetch_pool import FetchPool, READER_URL
+from upstream_cache import UpstreamCache
+from metrics import METRICS
+from progressive_image import encode_layers, pack_layers, unpack_layers, DEFAULT_IMAGE_BUDGET
 
 class RadioInternetGateway:
-    def __init__(self):
+    def __init__(self, compressor=DEFAULT_COMPRESSOR, fetch_pool=None, reader_url=READER_URL, upstream_cache=None,
+                 progressive_images=False, image_budget=DEFAULT_IMAGE_BUDGET):
         self.transmitter = FFTTransmitter()
+        # جلسة اتصالات مشتركة مع حد لكل مضيف ومهلة لكل طلب، تسمح بمعالجة عدة طلبات بالتوازي
+        self.fetcher = fetch_pool or FetchPool()
+        # الصفحات والصور المجلوبة تُخزن حسب Cache-Control/ETag، مع شكلها المضغوط الجاهز للبث
+        self.upstream_cache = upstream_cache or UpstreamCache(fetcher=self.fetcher)
+        self.reader_url = reader_url
+        # ضاغط النصوص (zlib بقاموس مدرب على صفحات الويب افتراضياً)، ورقمه يُرسل في الحزمة
+        self.compressor = get_compressor(compressor)
+        # الطلبات المتكررة (نفس الرابط ونفس المحتوى) تُخدم من التخزين المؤقت بدون إعادة توليد الصوت
+        self.render_cache = RenderCache()
+        # الصور المتدرجة: معاينة صغيرة في أول دورة ثم أشرطة JPEG في دورات تالية، ضمن image_budget بايت لكل طلب
+        # (False = JPEG واحد بنوع IMG كما تتوقعه المستقبلات القديمة)
+        self.progressive_images = progressive_images
+        self.image_budget = image_budget
         
     def compress_text(self, text):
-        """ضغط النص باستخدام zlib لتقليل حجم البيانات المنقولة صوتياً"""
-        compressed = zlib.compress(text.encode('utf-8'))
-        return base64.b64encode(compressed).decode('utf-8')
+        """ضغط النص بالضاغط المحدد لتقليل حجم البيانات المنقولة صوتياً (بايتات خام بدون Base64)"""
+        data = text.encode('utf-8')
+        with METRICS.timer("compress"):
+            compressed = self.compressor.compress(data)
+        METRICS.compression("text", len(data), len(compressed))
+        return compressed
 
     def compress_image(self, image_url, target_size=(64, 64)):
         """جلب صورة، تصغير حجمها بشدة، وضغطها للبث الصوتي"""
         try:
-            response = requests.get(image_url)
-            img = Image.open(io.BytesIO(response.content))
+            response = self.upstream_cache.get(image_url)
+            name = f"jpeg{target_size[0]}x{target_size[1]}q20"
+            return self.upstream_cache.derive(response, name, lambda r: self._shrink_image(r.content, target_size))
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def compress_image_layers(self, image_url, budget=None):
+        """جلب صورة وتحويلها إلى طبقات متدرجة (رسائل IML) مجموعها ≤ budget بايت؛ نص الخطأ عند الفشل."""
+        budget = budget or self.image_budget
+        try:
+            response = self.upstream_cache.get(image_url)
+            packed = self.upstream_cache.derive(response, f"layers{budget}",
+                                                lambda r: pack_layers(self._encode_layers(r.content, budget)))
+            return unpack_layers(packed)
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def _encode_layers(self, content, budget):
+        with METRICS.timer("compress"):
+            layers = encode_layers(content, budget)
+        METRICS.compression("image", len(content), sum(len(layer) for layer in layers))
+        return layers
+
+    def _shrink_image(self, content, target_size):
+        with METRICS.timer("compress"):
+            img = Image.open(io.BytesIO(content))
             # تصغير الصورة جداً لتناسب سرعة الراديو
             img.thumbnail(target_size)
-            
+
             output = io.BytesIO()
             img.save(output, format="JPEG", quality=20) # جودة منخفضة جداً للتوفير
-            img_data = output.getvalue()
-            
-            return base64.b64encode(img_data).decode('utf-8')
-        except Exception as e:
-            return f"Error: {str(e)}"
+        METRICS.compression("image", len(content), output.tell())
+        return output.getvalue()
 
     def fetch_website_content(self, url):
         """جلب محتوى نصي من موقع ويب (مثل ويكيبيديا)"""
         try:
             # استخدام خدمة جلب نصوص بسيطة أو API
-            response = requests.get(f"https://r.jina.ai/{url}") # خدمة تحويل المواقع لنصوص
+            response = self.upstream_cache.get(f"{self.reader_url}{url}") # خدمة تحويل المواقع لنصوص
             if response.status_code == 200:
                 return response.text[:1000] # أول 1000 حرف فقط للتوفير
         except:
-            return "Failed to fetch content."
+            pass
+        return "Failed to fetch content."
 
-    def prepare_broadcast_packet(self, data_type, content):
-        """تجهيز حزمة بيانات (Packet) للبث"""
-        # إضافة ترويسة (Header) ليعرف التطبيق نوع البيانات
-        packet = f"TYPE:{data_type}|DATA:{content}|END"
-        return packet
+    def fetch_compressed_website(self, url):
+        """جلب الصفحة مضغوطة: إذا لم يتغير محتواها منذ آخر مرة يُعاد الشكل المضغوط المخزن بدون إعادة الضغط"""
+        try:
+            response = self.upstream_cache.get(f"{self.reader_url}{url}")
+            if response.status_code == 200:
+                return self.upstream_cache.derive(response, f"text1000.{self.compressor.name}",
+                                                  lambda r: self.compress_text(r.text[:1000]))
+        except:
+            pass
+        return self.compress_text("Failed to fetch content.")
 
-    def generate_radio_response(self, query):
-        """المحرك الرئيسي: استلام الطلب -> جلب البيانات -> توليد الصوت"""
-        print(f"Processing query: {query}")
-        
-        if "http" in query:
-            content = self.fetch_website_content(query)
-            compressed = self.compress_text(content)
-            packet = self.prepare_broadcast_packet("WEB", compressed)
+    def prepare_broadcast_packet(self, data_type, content, codec=0):
+        """تجهيز حزمة بيانات (Packet) ثنائية للبث: ترويسة (النوع، الضاغط، الطول، رقم الجزء، الأعلام) + CRC32"""
+        return encode_message(data_type, content, codec=codec)
+
+    def build_packet(self, query):
+        """
+        جلب البيانات للطلب وضغطها وتجهيز حزمة البث (آمنة للاستدعاء من عدة خيوط معاً).
+        للصور المتدرجة تُعاد قائمة حزم (طبقات) تُبث كل منها في دورة مستقلة.
+        """
+        # روابط الصور تحتوي "http" أيضاً، فتُفحص قبل صفحات الويب
+        if "img:" in query and self.progressive_images:
+            layers = self.compress_image_layers(query.replace("img:", ""))
+            # كل طبقة رسالة مستقلة تُبث في دورة خاصة بها (قائمة حمولات للمرسل)
+            packet = self.prepare_broadcast_packet("ERR", layers) if isinstance(layers, str) else layers
         elif "img:" in query:
             img_url = query.replace("img:", "")
             compressed_img = self.compress_image(img_url)
-            packet = self.prepare_broadcast_packet("IMG", compressed_img)
+            # compress_image تعيد نص الخطأ عند الفشل
+            data_type = "ERR" if isinstance(compressed_img, str) else "IMG"
+            packet = self.prepare_broadcast_packet(data_type, compressed_img)
+        elif "http" in query:
+            compressed = self.fetch_compressed_website(query)
+            packet = self.prepare_broadcast_packet("WEB", compressed, self.compressor.codec_id)
         else:
             # بحث عام (Search)
             content = f"Search results for: {query} - Found 10 results. Summary: ..."
             compressed = self.compress_text(content)
-            packet = self.prepare_broadcast_packet("TXT", compressed)
+            packet = self.prepare_broadcast_packet("TXT", compressed, self.compressor.codec_id)
+        return packet
+
+    def generate_radio_response(self, query):
+        """المحرك الرئيسي: استلام الطلب -> جلب البيانات -> توليد الصوت"""
+        print(f"Processing query: {query}")
+        packet = self.build_packet(query)
 
         # توليد الملف الصوتي النهائي
         filename = "internet_response.wav"
-        self.transmitter.generate_signal(packet, filename, num_repeats=3)
+        self.render_cache.render(self.transmitter, packet, filename, num_repeats=3)
         return filename
 
+    def process_queries(self, queries, num_repeats=3, parallel=None):
+        """
+        معالجة طابور من الطلبات: الجلب والضغط بالتوازي، وكل حزمة تُرسل لتوليد الصوت فور اكتمالها.
+        parallel: مجمع عمليات (parallel_codec.ParallelCodec) لتوليد عدة ردود معاً، كل رد في عملية.
+        يعيد (الطلب، مسار الملف الصوتي في التخزين المؤقت) بترتيب الاكتمال.
+        """
+        if parallel is None:
+            for query, packet in self._iter_packets(queries):
+                yield query, self.render_cache.render(self.transmitter, packet, num_repeats=num_repeats)
+            return
+
+        pending = {}
+        for query, packet in self._iter_packets(queries):
+            pending[parallel.submit_render(self.render_cache, self.transmitter, packet,
+                                           num_repeats=num_repeats)] = query
+            # الردود التي اكتمل توليدها أثناء انتظار بقية الجلب تُعاد فوراً
+            for future in [future for future in pending if future.done()]:
+                yield pending.pop(future), future.result()
+        for future in as_completed(pending):
+            yield pending[future], future.result()
+
+    def _iter_packets(self, queries):
+        for query, packet, error in self.fetcher.iter_completed(self.build_packet, queries):
+            if error is not None:
+                packet = self.prepare_broadcast_packet("ERR", str(error))
+            print(f"Ready: {query}")
+            yield query, packet
+
 if __name__ == "__main__":
     gateway = RadioInternetGateway()
     # تجربة جلب موقع وتحويله لصوت
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# مجلد التخزين المؤقت والحجم الأقصى يمكن تغييرهما من البيئة السحابية
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "render_cache")
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+def temp_name(path):
+    """
+    اسم ملف مؤقت بجانب path خاص بالكاتب (العملية والخيط)، ثم os.replace ذرياً:
+    عدة خيوط (FetchPool، process_queries، الخدمة) قد تكتب نفس المفتاح أو نفس output معاً.
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class RenderCache:
+    """
+    تخزين مؤقت للملفات الصوتية المولدة، مفهرس ببصمة (hash) الحمولة وإعدادات جهاز الإرسال.
+    إذا لم تتغير الحمولة (نفس الطقس، نفس الرابط) يُعاد الملف الموجود بدلاً من إعادة التوليد.
+    الحجم الكلي محدود، ويتم حذف الملفات الأقدم استخداماً أولاً (LRU)، عدا الملفات المثبتة (pin) التي تُذاع حالياً.
+    """
+    def __init__(self, directory=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pinned = {}    # المسار → عدد مرات التثبيت
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, transmitter, payload, frame_duration=0.2, num_repeats=3):
+        """بصمة SHA-256 للبايتات المبثوثة مع كل الإعدادات التي تؤثر على الصوت."""
+        params = dict(transmitter.config(), frame_duration=frame_duration, num_repeats=num_repeats)
+        layers = [transmitter.payload_to_bytes(layer) for layer in payload] \
+            if isinstance(payload, (list, tuple)) else None
+        if layers is not None:
+            # حمولة من عدة دورات (طبقات): حدود الطبقات جزء من البث
+            params["layers"] = [len(layer) for layer in layers]
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8'))
+        digest.update(b"".join(layers) if layers is not None else transmitter.payload_to_bytes(payload))
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, key):
+        """إرجاع مسار الملف المخزن أو None، مع تحديث وقت آخر استخدام."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def lookup(self, key):
+        """مثل get، مع عدّ الإصابة أو الإخفاق (لكل طلب توليد: render و ParallelCodec.submit_render)."""
+        path = self.get(key)
+        with self._lock:
+            if path is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path
+
+    def render(self, transmitter, payload, output=None, frame_duration=0.2, num_repeats=3):
+        """
+        إرجاع ملف البث للحمولة: من التخزين المؤقت إن وجد، وإلا يتم توليده وحفظه.
+        إذا تم تحديد output تُنشر نسخة من الملف المخزن بهذا الاسم ويُعاد output.
+        """
+        key = self.key(transmitter, payload, frame_duration, num_repeats)
+        path = self.lookup(key)
+        if path is None:
+            path = self.path_for(key)
+            tmp_path = temp_name(path)
+            transmitter.write_signal(payload, tmp_path, frame_duration=frame_duration, num_repeats=num_repeats)
+            os.replace(tmp_path, path)
+            self.evict(keep=path)
+
+        if output is None:
+            return path
+        self.materialize(path, output)
+        return output
+
+    def load(self, transmitter, payload, frame_duration=0.2, num_repeats=3):
+        """إرجاع عينات PCM للحمولة كعرض mmap على الملف المخزن (بدون قراءته في الذاكرة)."""
+        from scipy.io import wavfile
+        path = self.render(transmitter, payload, frame_duration=frame_duration, num_repeats=num_repeats)
+        return wavfile.read(path, mmap=True)[1]
+
+    def pin(self, path):
+        """
+        منع حذف path في evict حتى unpin بعدد المرات نفسه (مثلاً دورة على الهواء يقرؤها المُذيع بـ mmap
+        بينما تولد البوابة أو بث آخر ملفات جديدة في نفس التخزين). يمكن التثبيت قبل توليد الملف.
+        """
+        with self._lock:
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def unpin(self, path):
+        with self._lock:
+            if self._pinned.get(path, 0) <= 1:
+                self._pinned.pop(path, None)
+            else:
+                self._pinned[path] -= 1
+
+    def evict(self, keep=None):
+        """حذف الملفات الأقدم استخداماً حتى يصبح الحجم الكلي أقل من الحد الأقصى (عدا الملف keep والملفات المثبتة)."""
+        # التخزين مشترك بين البث والبوابة و ParallelCodec: مرور واحد فقط في كل مرة
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".wav"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # حُذف بعد listdir (عملية أخرى تشارك المجلد)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep or path in self._pinned:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """عدادات الإصابة/الإخفاق للتخزين المؤقت."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def materialize(self, path, output):
+        """
+        نشر نسخة من ملف مخزن باسم output ذرياً: من يقرأ النسخة السابقة يكملها دون انقطاع.
+        نسخ وليس hard link: الكتابة لاحقاً في output (مثل generate_signal بنفس الاسم) لا تغير الملف المخزن.
+        """
+        tmp_output = temp_name(output)
+        shutil.copyfile(path, tmp_output)
+        os.replace(tmp_output, output)
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from metrics import METRICS
+from render_cache import temp_name
+
+# مجلد التخزين المؤقت للاستجابات والحجم الأقصى يمكن تغييرهما من البيئة السحابية
+UPSTREAM_CACHE_DIR = os.getenv("UPSTREAM_CACHE_DIR", "upstream_cache")
+UPSTREAM_CACHE_MAX_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# مدة الصلاحية (بالثواني) إذا لم يحددها الخادم في Cache-Control
+DEFAULT_TTL = 300
+
+# مدة صلاحية خاصة لكل مصدر (جزء من الرابط: المضيف أو بادئة)، تتقدم على ما يرسله الخادم.
+# الروابط عبر خدمة Jina تحتوي رابط المصدر الأصلي، فتنطبق عليها نفس القاعدة.
+TTL_OVERRIDES = {
+    "wikipedia.org": 3600,           # المقالات نادراً ما تتغير خلال ساعة
+    "wttr.in": 1800,                 # الطقس يتحدث كل نصف ساعة تقريباً
+    "worldtimeapi.org": 30,          # الوقت: الصلاحية قصيرة، لكن النسخة القديمة تُستخدم عند انقطاع الخدمة
+}
+
+
+class CachedResponse:
+    """استجابة من التخزين المؤقت أو من الشبكة، بنفس حقول requests.Response المستخدمة في المشروع."""
+    def __init__(self, url, status_code, content, headers, encoding=None, digest=None, from_cache=False,
+                 stale=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+        self.digest = digest
+        self.from_cache = from_cache
+        self.stale = stale
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class UpstreamCache:
+    """
+    تخزين مؤقت دائم (على القرص) لاستجابات المصادر الخارجية (صفحات، صور، API):
+    - يحترم Cache-Control (max-age / no-cache / no-store) ويعيد التحقق بـ ETag / Last-Modified
+      (طلب شرطي: إذا لم يتغير المحتوى يرد الخادم 304 بدون إعادة إرسال الصفحة).
+    - مدة صلاحية خاصة لكل مصدر (ttl_overrides).
+    - إذا كان المصدر غير متاح (خطأ اتصال أو 5xx) تُعاد آخر نسخة مخزنة حتى لو انتهت صلاحيتها.
+    - الأشكال المشتقة (النص المضغوط، الصورة المصغرة) تُخزن مع بصمة المحتوى، فإذا لم يتغير المحتوى
+      لا تُعاد عملية الضغط أيضاً.
+    الحجم الكلي محدود، ويتم حذف المدخلات الأقدم استخداماً أولاً (LRU) كما في RenderCache.
+    """
+    def __init__(self, directory=UPSTREAM_CACHE_DIR, max_bytes=UPSTREAM_CACHE_MAX_BYTES, fetcher=None,
+                 default_ttl=DEFAULT_TTL, ttl_overrides=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._fetcher = fetcher
+        self.default_ttl = default_ttl
+        self.ttl_overrides = TTL_OVERRIDES if ttl_overrides is None else ttl_overrides
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stale = 0
+        self.derived_hits = 0
+        self.derived_misses = 0
+        self.evictions = 0
+        # get و derive تُستدعى من عدة خيوط (FetchPool): العدادات و evict تحت نفس القفل
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def fetcher(self):
+        # FetchPool (ومعه requests) يُحمَّل عند أول طلب شبكة فقط، فإنشاء التخزين المؤقت لا يبطئ بدء البرامج
+        if self._fetcher is None:
+            from fetch_pool import FetchPool
+            self._fetcher = FetchPool()
+        return self._fetcher
+
+    def key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def ttl_for(self, url, headers):
+        """
+        مدة الصلاحية بالثواني، أو None إذا كان يجب عدم التخزين (no-store).
+        القاعدة الخاصة الأطول تطابقاً تتقدم على Cache-Control، و no-cache تعني التحقق في كل طلب.
+        """
+        cache_control = headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        matches = [pattern for pattern in self.ttl_overrides if pattern in url]
+        if matches:
+            return self.ttl_overrides[max(matches, key=len)]
+        if "no-cache" in cache_control:
+            return 0
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        if max_age is None:
+            return self.default_ttl
+        return max(0, int(max_age.group(1)) - int(headers.get("Age", 0) or 0))
+
+    def _load(self, key):
+        try:
+            with open(self._path(f"{key}.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(f"{key}.body"), 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, content
+
+    def _write(self, name, data):
+        path = self._path(name)
+        tmp_path = temp_name(path)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _save_meta(self, key, meta):
+        self._write(f"{key}.json", json.dumps(meta).encode('utf-8'))
+
+    def _response(self, meta, content, from_cache, stale=False):
+        return CachedResponse(meta["url"], meta["status_code"], content, meta["headers"], meta["encoding"],
+                              meta["digest"], from_cache, stale)
+
+    def get(self, url, **kwargs):
+        """
+        طلب GET عبر التخزين المؤقت. يعيد CachedResponse (from_cache / stale توضح مصدرها).
+        يرفع الخطأ فقط إذا فشل الاتصال ولا توجد نسخة مخزنة.
+        """
+        key = self.key(url)
+        meta, content = self._load(key)
+        now = time.time()
+        if meta is not None and now < meta["expires"]:
+            self._count("hits")
+            self._touch(f"{key}.json", f"{key}.body")
+            return self._response(meta, content, from_cache=True)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if meta is not None:
+            if meta["headers"].get("ETag"):
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        try:
+            with METRICS.timer("fetch"):
+                response = self.fetcher.get(url, headers=headers, **kwargs)
+        except Exception:
+            METRICS.count("fetch_errors")
+            if meta is None:
+                raise
+            self._count("stale")
+            return self._response(meta, content, from_cache=True, stale=True)
+
+        if meta is not None and response.status_code == 304:
+            # لم يتغير المحتوى: تجديد الصلاحية فقط (والأشكال المشتقة تبقى صالحة)
+            self._count("revalidated")
+            meta["headers"].update({name: response.headers[name] for name in ("ETag", "Last-Modified",
+                                    "Cache-Control", "Age") if name in response.headers})
+            ttl = self.ttl_for(url, meta["headers"])
+            meta["expires"] = now + (ttl or 0)
+            self._save_meta(key, meta)
+            return self._response(meta, content, from_cache=True)
+        if meta is not None and response.status_code >= 500:
+            self._count("stale")
+            return self._response(meta, content, from_cache=True, stale=True)
+
+        self._count("misses")
+        METRICS.count("fetch_bytes", len(response.content))
+        kept_headers = {name: response.headers[name] for name in ("ETag", "Last-Modified", "Cache-Control", "Age",
+                                                                  "Content-Type") if name in response.headers}
+        meta = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": kept_headers,
+            "encoding": response.encoding,
+            "digest": hashlib.sha256(response.content).hexdigest(),
+        }
+        ttl = self.ttl_for(url, kept_headers)
+        if response.status_code == 200 and ttl is not None:
+            meta["expires"] = now + ttl
+            self._write(f"{key}.body", response.content)
+            self._save_meta(key, meta)
+            self.evict(keep=key)
+        else:
+            # استجابة لا تُخزن: لا تُخزن أشكالها المشتقة أيضاً
+            meta["digest"] = None
+        return self._response(meta, response.content, from_cache=False)
+
+    def derive(self, response, name, build):
+        """
+        الشكل المشتق name (مثل "text1000.zlib-web") لمحتوى الاستجابة: من التخزين إن وُجد لنفس المحتوى،
+        وإلا يُحسب بـ build(response) ويُحفظ. يجب أن يعيد build بايتات.
+        """
+        if response.digest is None:
+            return build(response)
+        # باسم مفتاح الرابط أولاً: يُحذف مع الاستجابة في evict، وبصمة المحتوى تبطله إذا تغيرت الصفحة
+        key = self.key(response.url)
+        derived_name = f"{key}.{response.digest}.{name}.bin"
+        try:
+            with open(self._path(derived_name), 'rb') as f:
+                data = f.read()
+            self._count("derived_hits")
+            self._touch(derived_name)
+            return data
+        except OSError:
+            pass
+        self._count("derived_misses")
+        data = build(response)
+        self._write(derived_name, data)
+        self.evict(keep=key)
+        return data
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _touch(self, *names):
+        """تحديث وقت آخر استخدام (ترتيب LRU)."""
+        for name in names:
+            try:
+                os.utime(self._path(name))
+            except OSError:
+                pass
+
+    def evict(self, keep=None):
+        """
+        حذف المدخلات الأقدم استخداماً حتى يصبح الحجم أقل من الحد الأقصى. المدخل = كل الملفات التي تبدأ
+        بمفتاح الرابط: الاستجابة (json و body) مع أشكالها المشتقة، ووقت استخدامه هو الأحدث بينها.
+        """
+        with self._lock:
+            self._evict(keep)
+
+    def _evict(self, keep):
+        groups = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(self._path(name))
+            except FileNotFoundError:
+                # حُذف بعد listdir (عملية أخرى تشارك المجلد)
+                continue
+            group = groups.setdefault(name.split(".", 1)[0], [0.0, 0, []])
+            group[0] = max(group[0], stat.st_mtime)
+            group[1] += stat.st_size
+            group[2].append(name)
+
+        total = sum(size for _, size, _ in groups.values())
+        for group_key, (_, size, names) in sorted(groups.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            if group_key == keep:
+                continue
+            for name in names:
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """عدادات التخزين المؤقت: hits (صالحة)، revalidated (304)، stale (المصدر غير متاح)، misses."""
+        lookups = self.hits + self.revalidated + self.misses + self.stale
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stale": self.stale,
+            "derived_hits": self.derived_hits,
+            "derived_misses": self.derived_misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.revalidated + self.stale) / lookups if lookups else 0.0,
+        }